@@ -1,6 +1,10 @@
 from collections import defaultdict, deque
 from lark import Lark, Transformer, Token
-import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from tree_json import iter_d3_json, to_d3_json, write_d3_json
 
 class TreeNode:
     def __init__(self, symbol, children=None):
@@ -10,22 +14,25 @@ class TreeNode:
     def __str__(self):
         return self.symbol
 
+    @property
+    def name(self):
+        # backend/tree_json's encoders read .name
+        return self.symbol
+
     def to_d3_json(self):
-        return {
-            "name": self.symbol,
-            "children": [child.to_d3_json() for child in self.children] if self.children else []
-        }
+        return to_d3_json(self)
 
 def export_tree_to_json(tree_node, file_path=None):
+    """d3 JSON dicts for the tree; with file_path the JSON is streamed to the
+    file instead and nothing is built or returned"""
     if not tree_node:
         return None
-
-    tree_json = tree_node.to_d3_json()
     if file_path:
         with open(file_path, 'w') as f:
-            json.dump(tree_json, f, indent=2)
+            f.writelines(iter_d3_json(tree_node))
         print(f"✅ Tree exported to {file_path}")
-    return tree_json
+        return None
+    return to_d3_json(tree_node)
 
 # -------------------------------
 # 1. Input Grammar & Augmentation
@@ -108,7 +115,7 @@ def build_canonical_collection(grammar, start_symbol):
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             next_state = goto(current, symbol, grammar)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
@@ -306,10 +313,10 @@ def simulate_lr0_parsing_with_tree(input_string, ACTION, GOTO, productions):
     if parse_tree:
         print_parse_tree(parse_tree)
 
-        # Export for React-D3-Tree
-        tree_json = export_tree_to_json(parse_tree)
+        # Export for React-D3-Tree, streamed as compact JSON
         print("\n=== D3 JSON TREE ===")
-        print(json.dumps(tree_json, indent=2))
+        write_d3_json(parse_tree, sys.stdout)
+        print()
 
     return parse_tree
 
@@ -1,4 +1,9 @@
 from collections import defaultdict, deque
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atharva"))
+from grammar_analysis import GrammarAnalysis
 
 # -------------------------------
 # 1. Input Grammar & Augmentation
@@ -19,28 +24,7 @@ grammar.update(raw_grammar)
 # -------------------------------
 
 def compute_first(grammar):
-    first = defaultdict(set)
-
-    def _first(symbol):
-        if not symbol.isupper():
-            return {symbol}
-        if symbol in first:
-            return first[symbol]
-        result = set()
-        for prod in grammar[symbol]:
-            for char in prod:
-                f = _first(char)
-                result.update(f - {'ε'})
-                if 'ε' not in f:
-                    break
-            else:
-                result.add('ε')
-        first[symbol] = result
-        return result
-
-    for nonterminal in grammar:
-        _first(nonterminal)
-    return first
+    return defaultdict(set, GrammarAnalysis.from_strings(grammar).named_first())
 
 def get_terminals(grammar):
     terminals = set()
@@ -116,7 +100,7 @@ def build_clr1_canonical_collection(grammar, augmented_start):
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             next_state = goto_lr1(current, symbol, grammar, first)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
@@ -1,5 +1,10 @@
 from collections import defaultdict, deque
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atharva"))
+from grammar_analysis import GrammarAnalysis
 
 # ----------- INPUT GRAMMAR -----------
 raw_grammar = {
@@ -12,26 +17,7 @@ grammar = {aug_start: [start_symbol], **raw_grammar}
 
 # ----------- FIRST SETS -----------
 def compute_first(grammar):
-    first = defaultdict(set)
-    changed = True
-    for symbol in grammar:
-        first[symbol]
-    while changed:
-        changed = False
-        for lhs, prods in grammar.items():
-            for prod in prods:
-                for sym in prod:
-                    before = len(first[lhs])
-                    if sym.isupper():
-                        first[lhs].update(first[sym] - {'ε'})
-                        if 'ε' not in first[sym]:
-                            break
-                    else:
-                        first[lhs].add(sym)
-                        break
-                    if len(first[lhs]) != before:
-                        changed = True
-    return first
+    return defaultdict(set, GrammarAnalysis.from_strings(grammar).named_first())
 
 def first_of_string(grammar, string, first):
     result = set()
@@ -90,7 +76,7 @@ def build_clr1_collection(grammar, start):
     while queue:
         curr = queue.popleft()
         i = state_ids[curr]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             nxt = goto(curr, symbol, grammar, first)
             if nxt and nxt not in state_ids:
                 state_ids[nxt] = len(states)
@@ -1,5 +1,11 @@
 from collections import defaultdict, deque
-import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atharva"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from grammar_analysis import GrammarAnalysis
+from tree_json import iter_d3_json, to_d3_json, write_d3_json
 
 # -------------------------------
 # Tree Node Class for Parse Tree
@@ -12,20 +18,24 @@ class TreeNode:
     def __str__(self):
         return self.symbol
 
+    @property
+    def name(self):
+        # backend/tree_json's encoders read .name
+        return self.symbol
+
     def to_d3_json(self):
-        return {
-            "name": self.symbol,
-            "children": [child.to_d3_json() for child in self.children] if self.children else []
-        }
+        return to_d3_json(self)
 
 def export_tree_to_json(tree_node, file_path=None):
+    """d3 JSON dicts for the tree; with file_path the JSON is streamed to the
+    file instead and nothing is built or returned"""
     if not tree_node:
         return None
-    tree_json = tree_node.to_d3_json()
     if file_path:
         with open(file_path, 'w') as f:
-            json.dump(tree_json, f, indent=2)
-    return tree_json
+            f.writelines(iter_d3_json(tree_node))
+        return None
+    return to_d3_json(tree_node)
 
 def print_parse_tree(node, indent="", last=True):
     marker = "└── " if last else "├── "
@@ -108,7 +118,7 @@ def build_canonical_collection(grammar, start_symbol):
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             next_state = goto(current, symbol, grammar)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
@@ -122,53 +132,9 @@ def build_canonical_collection(grammar, start_symbol):
 # -------------------------------
 # FIRST & FOLLOW Sets
 # -------------------------------
-def first(grammar, symbol):
-    if not symbol.isupper():
-        return {symbol}
-    result = set()
-    for prod in grammar[symbol]:
-        if not prod:
-            result.add('ε')
-        else:
-            for char in prod:
-                result.update(first(grammar, char))
-                if 'ε' not in first(grammar, char):
-                    break
-    return result
-
 def compute_follow(grammar, start_symbol):
-    follow = defaultdict(set)
-    follow[start_symbol].add("$")
-    changed = True
-    while changed:
-        changed = False
-        for lhs, prods in grammar.items():
-            for prod in prods:
-                for i, symbol in enumerate(prod):
-                    if symbol.isupper():
-                        trailer = set()
-                        beta = prod[i + 1:]
-                        if beta:
-                            for b in beta:
-                                if b.isupper():
-                                    trailer.update(first(grammar, b))
-                                    if 'ε' not in trailer:
-                                        break
-                                else:
-                                    trailer.add(b)
-                                    break
-                            else:
-                                trailer.add('ε')
-                        else:
-                            trailer.add('ε')
-                        trailer.discard('ε')
-                        old_len = len(follow[symbol])
-                        follow[symbol].update(trailer)
-                        if 'ε' in trailer or not beta:
-                            follow[symbol].update(follow[lhs])
-                        if len(follow[symbol]) > old_len:
-                            changed = True
-    return follow
+    analysis = GrammarAnalysis.from_strings(grammar, start_symbol)
+    return defaultdict(set, analysis.named_follow())
 
 # -------------------------------
 # SLR Parsing Table Construction
@@ -255,7 +221,9 @@ def simulate_slr_parsing_with_tree(input_string, ACTION, GOTO, productions):
     print("\n=== PARSE TREE ===")
     print_parse_tree(parse_tree)
     print("\n=== D3 JSON TREE ===")
-    print(json.dumps(export_tree_to_json(parse_tree), indent=2))
+    if parse_tree:
+        write_d3_json(parse_tree, sys.stdout)
+        print()
     return parse_tree
 
 # -------------------------------
@@ -59,7 +59,7 @@ def build_canonical_collection(grammar, start_symbol):
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             next_state = goto(current, symbol, grammar)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
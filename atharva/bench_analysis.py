@@ -0,0 +1,91 @@
+import random
+import time
+
+from compiled_grammar import CompiledGrammar
+from grammar_analysis import GrammarAnalysis, iter_bits
+
+# Differential check of grammar_analysis against the "while changed" sweeps
+# it replaced, then timings on grammars with thousands of productions.
+# Run with: python bench_analysis.py
+
+def sweep_first_follow(cg):
+    """The old fixed-point FIRST/FOLLOW over Python sets, kept as the reference"""
+    nullable = set()
+    first = [{s} if cg.is_terminal(s) else set() for s in range(cg.n_symbols)]
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in zip(cg.prod_lhs, cg.prod_rhs):
+            before = len(first[lhs])
+            for s in rhs:
+                first[lhs] |= first[s]
+                if s not in nullable:
+                    break
+            else:
+                if lhs not in nullable:
+                    nullable.add(lhs)
+                    changed = True
+            if len(first[lhs]) != before:
+                changed = True
+
+    follow = [set() for _ in range(cg.n_symbols)]
+    follow[cg.prod_lhs[0]].add(0)
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in zip(cg.prod_lhs, cg.prod_rhs):
+            for k, s in enumerate(rhs):
+                if cg.is_terminal(s):
+                    continue
+                before = len(follow[s])
+                for t in rhs[k + 1:]:
+                    follow[s] |= first[t]
+                    if t not in nullable:
+                        break
+                else:
+                    follow[s] |= follow[lhs]
+                if len(follow[s]) != before:
+                    changed = True
+    return nullable, first, follow
+
+def random_grammar(rng, n_nonterminals, n_terminals, n_productions):
+    """Random rules, plus a chain N0 -> N1 x | ... so information has to
+    travel through every nonterminal"""
+    nonterminals = [f"N{i}" for i in range(n_nonterminals)]
+    terminals = [f"t{i}" for i in range(n_terminals)]
+    rules = {A: [] for A in nonterminals}
+    for i, A in enumerate(nonterminals):
+        rules[A].append((nonterminals[(i + 1) % n_nonterminals], rng.choice(terminals)))
+        rules[A].append((rng.choice(terminals),) if rng.random() < 0.8 else ())
+    for _ in range(n_productions - 2 * n_nonterminals):
+        A = rng.choice(nonterminals)
+        rules[A].append(tuple(rng.choice(nonterminals + terminals) for _ in range(rng.randint(0, 5))))
+    return rules
+
+def check_against_sweeps(cases=500, seed=0):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        cg = CompiledGrammar(random_grammar(rng, rng.randint(1, 10), rng.randint(1, 5), rng.randint(20, 40)))
+        nullable, first, follow = sweep_first_follow(cg)
+        analysis = GrammarAnalysis(cg)
+        for s in range(cg.n_symbols):
+            assert analysis.nullable[s] == (s in nullable)
+            assert set(iter_bits(analysis.first[s])) == first[s]
+            assert set(iter_bits(analysis.follow[s])) == follow[s]
+    print(f"✅ grammar_analysis matches the fixed-point sweeps on {cases} grammars")
+
+if __name__ == "__main__":
+    check_against_sweeps()
+
+    rng = random.Random(1)
+    print(f"\n{'Productions':<11} | {'sweeps (ms)':>11} | {'digraph (ms)':>12} | {'Speedup':>7}")
+    print("-" * 52)
+    for n_productions in (500, 2000, 5000, 10000):
+        cg = CompiledGrammar(random_grammar(rng, n_productions // 5, 40, n_productions))
+        start = time.perf_counter()
+        sweep_first_follow(cg)
+        sweeps = time.perf_counter() - start
+        start = time.perf_counter()
+        GrammarAnalysis(cg)
+        digraph = time.perf_counter() - start
+        print(f"{n_productions:<11} | {sweeps * 1000:>11.1f} | {digraph * 1000:>12.1f} | {sweeps / digraph:>6.1f}x")
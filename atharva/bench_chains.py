@@ -0,0 +1,101 @@
+import random
+import time
+
+from bench_packed import random_sentence
+from bench_tables import expression_grammar, statement_grammar
+from compiled_grammar import CompiledGrammar
+from lr_select import select_table
+from packed_tables import PackedTables
+from unit_chains import ChainBypass, UnitFreeGrammar, parse_tree, unit_productions
+
+# Parse steps and throughput with the unit reductions of unit_chains
+# removed, against the plain tables, on expression-heavy inputs. Before
+# timing, the full trees rebuilt through the restore hooks are checked to
+# equal the trees of the plain tables, and accept/reject to agree on
+# sentences with a token dropped or swapped.
+# Run with: python bench_chains.py
+
+def mutate(rng, tokens, terminals):
+    tokens = list(tokens)
+    if not tokens:
+        return [rng.choice(terminals)]
+    i = rng.randrange(len(tokens))
+    if rng.random() < 0.5:
+        del tokens[i]
+    else:
+        tokens[i] = rng.choice(terminals)
+    return tokens
+
+def variants(rules):
+    """(label, cg, action, goto, full-tree function) per way of parsing"""
+    cg = CompiledGrammar(rules)
+    selection = select_table(cg)
+    bypass = ChainBypass(cg, selection.action, selection.goto)
+    unit_free = UnitFreeGrammar(rules)
+    unit_free_selection = select_table(unit_free.cg)
+    return [
+        (f"plain tables ({selection.algorithm})", cg, selection.action, selection.goto,
+         lambda text: parse_tree(cg, selection.action, selection.goto, text)),
+        ("chain bypass", cg, bypass.action, bypass.goto, bypass.parse_tree),
+        (f"unit-free grammar ({unit_free_selection.algorithm})", unit_free.cg,
+         unit_free_selection.action, unit_free_selection.goto,
+         lambda text: unit_free.parse_tree(unit_free_selection.action, unit_free_selection.goto, text)),
+    ], bypass, unit_free, unit_free_selection
+
+def check(name, rules, rng, n_sentences=300):
+    rows, bypass, unit_free, unit_free_selection = variants(rules)
+    assert not unit_free_selection.conflicts, name
+    cg = rows[0][1]
+    terminals = [cg.symbols[t] for t in cg.terminals() if t]
+    sentences = [random_sentence(cg, rng, depth=8).split() for _ in range(n_sentences)]
+    for tokens in sentences:
+        text = " ".join(tokens)
+        expected = rows[0][4](text)
+        assert expected is not None, text
+        for label, _, _, _, tree in rows[1:]:
+            assert tree(text) == expected, (name, label, text)
+        broken = " ".join(mutate(rng, tokens, terminals))
+        accepted = rows[0][4](broken) is not None
+        for label, _, _, _, tree in rows[1:]:
+            assert (tree(broken) is not None) == accepted, (name, label, broken)
+    print(f"✅ {name}: full trees and accept/reject agree on {n_sentences} sentences and {n_sentences} mutations")
+
+def throughput(parse, texts, n_tokens, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return n_tokens / best
+
+def report(name, rules, rng, n_sentences=500):
+    rows, bypass, unit_free, _ = variants(rules)
+    cg = rows[0][1]
+    texts = [random_sentence(cg, rng, depth=10) for _ in range(n_sentences)]
+    n_tokens = sum(len(text.split()) for text in texts)
+    print(f"\n{name}: {len(unit_productions(cg))} unit productions, {n_sentences} sentences, {n_tokens} tokens")
+    print(f"  chain bypass: {bypass.bypassed} gotos redirected, {bypass.merged} merged states, "
+          f"{bypass.dropped} states dropped; unit-free grammar: {unit_free.cg.n_productions - 1} productions "
+          f"({unit_free.n_elided} standing for chains)")
+    print(f"{'tables':<30} {'states':>7} {'bytes':>7} {'steps':>8} {'recognize tok/s':>16} {'full trees tok/s':>17}")
+    base_steps = None
+    for label, grammar, action, goto_table, tree in rows:
+        packed = PackedTables.from_tables(grammar, action, goto_table)
+        steps = sum(packed.parse(text)[1] for text in texts)
+        base_steps = base_steps or steps
+        recognize = throughput(packed.parse, texts, n_tokens)
+        trees = throughput(tree, texts, n_tokens)
+        print(f"{label:<30} {len(action):>7} {packed.nbytes():>7} {steps:>8} {recognize:>16,.0f} {trees:>17,.0f}"
+              + (f"  ({1 - steps / base_steps:.0%} fewer steps)" if steps != base_steps else ""))
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    grammars = [
+        ("expression_grammar(8, 4)", expression_grammar(8, 4)),
+        ("statement_grammar(20)", statement_grammar(20)),
+    ]
+    for name, rules in grammars:
+        check(name, rules, rng)
+    for name, rules in grammars:
+        report(name, rules, rng)
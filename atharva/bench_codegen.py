@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+
+import lr_tables
+from bench_packed import random_sentence
+from bench_tables import expression_grammar, random_grammar, statement_grammar
+from compiled_grammar import CompiledGrammar
+from direct_codegen import generate_direct_module
+from lr0 import simulate_lr0_parsing
+from lr_select import select_table
+from packed_tables import PackedTables
+from standalone import generate_module
+
+# Parse throughput of the direct-coded modules from direct_codegen against
+# the table-driven standalone modules and the in-process drivers, after a
+# differential check that both generated backends build the same trees.
+# Run with: python bench_codegen.py
+
+def load_module(directory, name, source):
+    path = os.path.join(directory, name + ".py")
+    with open(path, "w") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def check_backends(directory, cases=300, seed=0):
+    rng = random.Random(seed)
+    checked = 0
+    for k in range(cases):
+        cg = CompiledGrammar(random_grammar(rng, rng.randint(1, 6), rng.randint(1, 4), rng.randint(4, 14)))
+        selection = select_table(cg)
+        if selection.conflicts:
+            continue  # e.g. A -> A cycles, where any driver may loop forever
+        tables = load_module(directory, f"check_tables_{k}", generate_module(cg, selection))
+        direct = load_module(directory, f"check_direct_{k}", generate_direct_module(cg, selection))
+        terminals = [cg.symbols[t] for t in cg.terminals() if t]
+        for _ in range(10):
+            tokens = [rng.choice(terminals) for _ in range(rng.randint(0, 6))] if terminals else []
+            try:
+                expected = tables.parse(tokens)
+            except tables.ParseError:
+                expected = tables.ParseError
+            try:
+                got = direct.parse(tokens)
+            except direct.ParseError:
+                got = tables.ParseError
+            assert got == expected, (k, tokens)
+            checked += 1
+    print(f"✅ Direct-coded and table-driven modules agree on {checked} inputs")
+
+def throughput(parse, sentences, n_tokens, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sentence in sentences:
+            parse(sentence)
+        best = min(best, time.perf_counter() - start)
+    return n_tokens / best
+
+def report(directory, name, cg, rng, n_sentences=300):
+    selection = select_table(cg)
+    tables = load_module(directory, f"{name}_tables", generate_module(cg, selection))
+    direct = load_module(directory, f"{name}_direct", generate_direct_module(cg, selection))
+    packed = PackedTables.from_tables(cg, selection.action, selection.goto)
+    ACTION, GOTO, productions = lr_tables.named_tables(cg, selection.action, selection.goto)
+
+    sentences = [random_sentence(cg, rng).split() for _ in range(n_sentences)]
+    n_tokens = sum(len(tokens) for tokens in sentences)
+    for tokens in sentences:
+        assert direct.parse(tokens) == tables.parse(tokens)
+    texts = [" ".join(tokens) for tokens in sentences]
+
+    print(f"\n{name}: {selection.algorithm}, {selection.n_states} states, {n_sentences} sentences, {n_tokens} tokens")
+    print(f"{'Driver':<36} | {'Tokens/s':>10}")
+    print("-" * 49)
+    rows = [
+        ("direct-coded, trees", lambda tokens: direct.parse(tokens), sentences),
+        ("direct-coded, recognize", direct.accepts, sentences),
+        ("standalone tables, trees", lambda tokens: tables.parse(tokens), sentences),
+        ("standalone tables, recognize", tables.accepts, sentences),
+        ("PackedTables.parse, recognize", packed.parse, texts),
+        ("simulate_lr0_parsing (dicts, trace)",
+         lambda text: simulate_lr0_parsing(text, ACTION, GOTO, productions, verbose=False), texts),
+    ]
+    for label, parse, inputs in rows:
+        print(f"{label:<36} | {throughput(parse, inputs, n_tokens):>10,.0f}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        sys.dont_write_bytecode = True
+        check_backends(directory)
+        rng = random.Random(0)
+        report(directory, "expressions", CompiledGrammar(expression_grammar(8, 4)), rng, 100)
+        report(directory, "statements", CompiledGrammar(statement_grammar(50)), rng, 1000)
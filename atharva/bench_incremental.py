@@ -0,0 +1,90 @@
+import gc
+import random
+import time
+
+from bench_tables import random_grammar, statement_grammar
+from compiled_grammar import CompiledGrammar
+from grammar_analysis import GrammarAnalysis
+from incremental_tables import ALGORITHMS, IncrementalTables, fresh_tables
+
+# Edit-to-table latency of incremental_tables against rebuilding from
+# scratch, on the 200-statement grammar of bench_tables, for edits of
+# different reach: a new statement form, a removed one, a new operator and
+# a new kind of primary expression (which every expression state sees).
+# Each edit and its undo are applied to the same tables, as an editor
+# would, and checked against a fresh build; building the tables in the
+# first place is reported on its own. Random add/remove sequences on small
+# random grammars are checked the same way first.
+# Run with: python bench_incremental.py
+
+EDITS = [
+    ("add statement s200", {"add": [("S", ("s200",)), ("s200", ("kw200", "E", ";"))]}),
+    ("remove s7 -> kw7 id = E ;", {"remove": [("s7", ("kw7", "id", "=", "E", ";"))]}),
+    ("add E -> E op8 T", {"add": [("E", ("E", "op8", "T"))]}),
+    ("add F -> [ E ]", {"add": [("F", ("[", "E", "]"))]}),
+]
+
+def check_random_edits(trials=200, seed=1):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        rules = random_grammar(rng, rng.randint(2, 6), rng.randint(1, 4), rng.randint(4, 12))
+        tables = IncrementalTables(rules, algorithm=rng.choice(ALGORITHMS))
+        names = list(rules) + ["N9", "t0", "t7"]
+        for _ in range(6):
+            removable = [(lhs, rhs) for lhs, prods in tables.rules.items() for rhs in prods
+                         if lhs != tables.start or len(prods) > 1]
+            added = [(rng.choice(list(tables.rules) + ["N9"]), tuple(rng.choice(names) for _ in range(rng.randint(0, 3))))
+                     for _ in range(rng.choice((1, 1, 2)))]
+            roll = rng.random()
+            if removable and roll < 0.4:
+                tables.edit(remove=[rng.choice(removable)])
+            elif removable and roll < 0.6:
+                tables.edit(remove=[rng.choice(removable)], add=added)
+            else:
+                tables.edit(add=added)
+            assert tables.matches_fresh_build(), tables.rules
+    print(f"✅ {trials} random grammars x 6 edits match fresh builds")
+
+def fresh_seconds(rules, algorithm, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cg = CompiledGrammar(rules)
+        fresh_tables(cg, algorithm, GrammarAnalysis(cg))
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def undo(edit):
+    return {"add": edit.get("remove", []), "remove": edit.get("add", [])}
+
+def report(n_statements=200, repeat=3):
+    print(f"\nstatement_grammar({n_statements}), edit-to-table latency, best of {repeat}")
+    print(f"{'algorithm':<8} {'edit':<28} {'states':>7} {'recomputed':>10} {'added':>6} {'removed':>7} {'rows':>5} "
+          f"{'edit':>9} {'undo':>9} {'fresh':>9} {'speedup':>7}")
+    for algorithm in ("lr0", "slr1", "lalr1"):
+        started = time.perf_counter()
+        tables = IncrementalTables(statement_grammar(n_statements), algorithm=algorithm)
+        initial = time.perf_counter() - started
+        fresh = fresh_seconds(tables.rules, algorithm)
+        for name, edit in EDITS:
+            stats = tables.edit(**edit)
+            assert tables.matches_fresh_build(), (algorithm, name)
+            tables.edit(**undo(edit))
+            assert tables.matches_fresh_build(), (algorithm, name, "undo")
+            forward = backward = float("inf")
+            gc.disable()
+            try:
+                for _ in range(repeat):
+                    forward = min(forward, tables.edit(**edit)["seconds"])
+                    backward = min(backward, tables.edit(**undo(edit))["seconds"])
+            finally:
+                gc.enable()
+            print(f"{algorithm:<8} {name:<28} {stats['states']:>7} {stats['recomputed']:>10} {stats['added']:>6} "
+                  f"{stats['removed']:>7} {stats['rows']:>5} {forward * 1000:>6.1f} ms {backward * 1000:>6.1f} ms "
+                  f"{fresh * 1000:>6.1f} ms {fresh / max(forward, backward):>6.1f}x")
+        print(f"{algorithm:<8} {'(building the tables)':<28} {tables.n_states:>7} {'':>10} {'':>6} {'':>7} {'':>5} "
+              f"{initial * 1000:>6.1f} ms {'':>9} {fresh * 1000:>6.1f} ms")
+
+if __name__ == "__main__":
+    check_random_edits()
+    report()
@@ -0,0 +1,52 @@
+import os
+import random
+import tempfile
+import time
+
+import lr_tables
+from bench_packed import random_sentence
+from bench_tables import statement_grammar
+from compiled_grammar import CompiledGrammar
+from lazy_lr1 import LazyLR1
+from lr1_automaton import LR1Automaton
+
+# Time to first parse with the whole CLR(1) collection built up front
+# against the lazy automaton, which only expands the states the input
+# reaches, then a warm start from the states a previous run saved.
+# Run with: python bench_lazy.py
+
+def report(name, cg, rng, n_sentences=20):
+    sentences = [random_sentence(cg, rng) for _ in range(n_sentences)]
+    print(f"\n{name}: {cg.n_productions} productions, {sum(len(s.split()) for s in sentences)} tokens in {n_sentences} sentences")
+
+    start = time.perf_counter()
+    automaton = LR1Automaton.build(cg)
+    lr_tables.build_lr1_table(cg, automaton)
+    eager = time.perf_counter() - start
+    print(f"  eager CLR(1)      {eager * 1000:>8.0f} ms to first parse, {automaton.n_states} states built")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "states.pickle")
+        start = time.perf_counter()
+        lazy = LazyLR1(cg, cache_path=path)
+        assert lazy.parse(sentences[0])[0]
+        first = time.perf_counter() - start
+        print(f"  lazy, first parse {first * 1000:>8.0f} ms, {lazy.expanded} states expanded ({lazy.n_states} discovered)")
+
+        start = time.perf_counter()
+        for sentence in sentences[1:]:
+            assert lazy.parse(sentence)[0]
+        rest = time.perf_counter() - start
+        print(f"  lazy, {n_sentences - 1} more      {rest * 1000:>8.0f} ms, {lazy.expanded} states expanded in all")
+        lazy.save()
+
+        start = time.perf_counter()
+        warm = LazyLR1(cg, cache_path=path)
+        for sentence in sentences:
+            assert warm.parse(sentence)[0]
+        print(f"  warm, all parses  {(time.perf_counter() - start) * 1000:>8.0f} ms, {warm.expanded} states expanded")
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    report("Statements", CompiledGrammar(statement_grammar(50)), rng)
+    report("Statements (large)", CompiledGrammar(statement_grammar(200)), rng)
@@ -0,0 +1,86 @@
+import gc
+import json
+import sys
+import time
+
+import lr_tables
+from bench_tables import expression_grammar, not_lalr_grammar, statement_grammar
+from build_observer import BuildObserver, BuildStats
+from compiled_grammar import CompiledGrammar
+from grammar_analysis import GrammarAnalysis
+from lr0_automaton import LR0Automaton
+from lr1_automaton import LR1Automaton
+from minimal_lr1 import build_minimal_lr1
+
+# Where table construction time goes, per grammar and algorithm, through
+# the observer hooks of build_observer, and what attaching an observer
+# costs: a build with no observer, with the do-nothing BuildObserver and
+# with BuildStats counting everything.
+# Run with: python bench_observer.py [stats.json]
+
+GRAMMARS = [
+    ("expression_grammar(8, 4)", expression_grammar(8, 4)),
+    ("statement_grammar(200)", statement_grammar(200)),
+    ("not_lalr_grammar(20)", not_lalr_grammar(20)),
+]
+
+def profile(name, rules):
+    """Every table kind for one grammar, under one BuildStats"""
+    cg = CompiledGrammar(rules)
+    stats = BuildStats(cg, name)
+    stats.phase_started("analysis")
+    analysis = GrammarAnalysis(cg)
+    stats.phase_finished("analysis")
+    lr0 = LR0Automaton(cg, observer=stats)
+    lr_tables.build_lr0_table(cg, lr0, observer=stats)
+    lr_tables.build_slr_table(cg, lr0, analysis, observer=stats)
+    lr_tables.build_lalr_table(cg, lr0, analysis, observer=stats)
+    minimal = build_minimal_lr1(cg, analysis=analysis, observer=stats)
+    lr_tables.build_lr1_table(cg, minimal, observer=stats, name="minimal_lr1")
+    clr1 = LR1Automaton.build(cg, analysis=analysis, observer=stats)
+    lr_tables.build_lr1_table(cg, clr1, observer=stats, name="clr1")
+    return stats
+
+def best_seconds(runs, repeat=9):
+    """Best time of each run, taking turns so that noise hits all of them
+    alike, with the garbage collector paused while timing"""
+    best = [float("inf")] * len(runs)
+    for _ in range(repeat):
+        for k, run in enumerate(runs):
+            gc.collect()
+            gc.disable()
+            started = time.perf_counter()
+            run()
+            best[k] = min(best[k], time.perf_counter() - started)
+            gc.enable()
+    return best
+
+def overhead(rules):
+    cg = CompiledGrammar(rules)
+    analysis = GrammarAnalysis(cg)
+    print(f"\nObserver overhead, statement_grammar(200) ({cg.n_productions} productions), best of 9")
+    print(f"{'build':<26} {'none':>10} {'no-op':>17} {'BuildStats':>17}")
+    builds = [
+        ("LR(0) collection", lambda observer: LR0Automaton(cg, observer=observer)),
+        ("minimal LR(1) collection", lambda observer: build_minimal_lr1(cg, analysis=analysis, observer=observer)),
+        ("CLR(1) collection", lambda observer: LR1Automaton.build(cg, analysis=analysis, observer=observer)),
+    ]
+    for label, build in builds:
+        none, noop, counted = best_seconds([
+            lambda: build(None), lambda: build(BuildObserver()), lambda: build(BuildStats(cg)),
+        ])
+        print(f"{label:<26} {none * 1000:>7.1f} ms {noop * 1000:>7.1f} ms ({noop / none - 1:+4.0%})"
+              f" {counted * 1000:>7.1f} ms ({counted / none - 1:+4.0%})")
+
+if __name__ == "__main__":
+    results = []
+    for name, rules in GRAMMARS:
+        stats = profile(name, rules)
+        print(f"\n== {name}")
+        print(stats.format_report())
+        results.append(stats.as_dict())
+    overhead(statement_grammar(200))
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Wrote {sys.argv[1]}")
@@ -0,0 +1,117 @@
+import random
+import sys
+import time
+
+import lr_tables
+from bench_tables import expression_grammar, not_lalr_grammar, statement_grammar
+from compiled_grammar import CompiledGrammar
+from lr0 import simulate_lr0_parsing
+from lr_select import select_table
+from packed_tables import ACCEPT, ERROR, PackedTables, encode, np
+
+# Size of the named ACTION/GOTO dicts against the packed int arrays, a check
+# that every lookup agrees, and lookup/parse throughput of both.
+# Run with: python bench_packed.py
+
+def deep_size(obj):
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return total
+
+def check_lookups(cg, action, goto_table, packed):
+    for state, row in enumerate(action):
+        for terminal in cg.terminals():
+            code = packed.action(state, terminal)
+            if terminal in row:
+                assert code == encode(row[terminal]), (state, terminal)
+            else:
+                # a default reduction may stand in for an error
+                assert code == ERROR or code < ACCEPT, (state, terminal)
+        for A, target in goto_table[state].items():
+            assert packed.goto(state, A) == target, (state, A)
+
+def random_sentence(cg, rng, depth=12):
+    """Tokens derived from the start symbol, preferring short productions once deep"""
+    def expand(symbol, level):
+        if cg.is_terminal(symbol):
+            return [cg.symbols[symbol]]
+        prods = cg.prods_by_lhs[symbol]
+        if level > depth:
+            prods = [min(prods, key=lambda p: sum(not cg.is_terminal(s) for s in cg.prod_rhs[p]))]
+        tokens = []
+        for s in cg.prod_rhs[rng.choice(prods)]:
+            tokens += expand(s, level + 1)
+        return tokens
+    return " ".join(expand(cg.prod_rhs[0][0], 0))
+
+def dict_lookups(ACTION, keys):
+    for state, terminal in keys:
+        ACTION[state].get(terminal)
+
+def packed_lookups(packed, keys):
+    # the lookup inlined, as the driver does it
+    rows, base, table, check, default = (packed.action_row, packed.action_base, packed.action_table,
+                                         packed.action_check, packed.default_action)
+    for state, terminal in keys:
+        row = rows[state]
+        i = base[row] + terminal
+        table[i] if check[i] == row else default[state]
+
+def report(name, cg, rng):
+    selection = select_table(cg)
+    action, goto_table = selection.action, selection.goto
+    ACTION, GOTO, _ = lr_tables.named_tables(cg, action, goto_table)
+
+    start = time.perf_counter()
+    packed = PackedTables.from_tables(cg, action, goto_table)
+    packing = time.perf_counter() - start
+    check_lookups(cg, action, goto_table, packed)
+
+    before = deep_size(ACTION) + deep_size(GOTO)
+    after = packed.nbytes()
+    print(f"\n{name} ({selection.algorithm}, {selection.n_states} states, {cg.n_terminals} terminals)")
+    print(f"  named dicts  {before / 1024:>9.1f} KB")
+    print(f"  packed       {after / 1024:>9.1f} KB  ({before / after:.0f}x smaller, packed in {packing * 1000:.0f} ms)")
+    print(f"  rows         {max(packed.action_row) + 1} distinct action rows, {max(packed.goto_row) + 1} distinct goto rows")
+
+    named_keys = [(s, cg.symbols[t]) for s in range(selection.n_states) for t in cg.terminals()] * 3
+    id_keys = [(s, t) for s in range(selection.n_states) for t in cg.terminals()] * 3
+    start = time.perf_counter()
+    dict_lookups(ACTION, named_keys)
+    dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    packed_lookups(packed, id_keys)
+    packed_time = time.perf_counter() - start
+    print(f"  lookups      dicts {len(id_keys) / dict_time / 1e6:.2f} M/s, packed {len(id_keys) / packed_time / 1e6:.2f} M/s")
+
+    # Derived sentences must parse; with one token dropped, both drivers agree
+    sentences = [random_sentence(cg, rng) for _ in range(50)]
+    for sentence in sentences:
+        assert packed.parse(sentence)[0], sentence
+        tokens = sentence.split()
+        if tokens:
+            del tokens[rng.randrange(len(tokens))]
+        damaged = " ".join(tokens)
+        expected = simulate_lr0_parsing(damaged, ACTION, GOTO, cg.named_productions(), verbose=False)[0]
+        assert packed.parse(damaged)[0] == expected, damaged
+    print(f"  parses       {len(sentences)} derived and {len(sentences)} damaged sentences agree")
+
+if __name__ == "__main__":
+    print("Arrays:", "numpy int32" if np is not None else "array('i')", "stored, array('i') looked up")
+    rng = random.Random(0)
+    report("Expressions", CompiledGrammar(expression_grammar(40, 20)), rng)
+    report("Statements", CompiledGrammar(statement_grammar(50)), rng)
+    report("Statements (large)", CompiledGrammar(statement_grammar(200)), rng)
+    report("Not LALR(1)", CompiledGrammar(not_lalr_grammar(20)), rng)
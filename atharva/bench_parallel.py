@@ -0,0 +1,84 @@
+import gc
+import os
+import time
+
+from bench_tables import not_lalr_grammar, statement_grammar
+from compiled_grammar import CompiledGrammar
+from grammar_analysis import GrammarAnalysis
+from lr1_automaton import LR1Automaton, closure_edges, successors
+from parallel_lr1 import MIN_PARALLEL, LR1Pool, build_lalr1_parallel, build_lr1_parallel
+
+# Serial LR1Automaton.build against the level-synchronous parallel build,
+# checking that both number every state the same way, for LR(1) and for
+# LALR(1) through merge_cores. Each pool is started once and reused across
+# the repeats, as a caller building several tables would; its startup is
+# reported on its own.
+#
+# calibrate() measures what MIN_PARALLEL rests on: the local cost of
+# expanding a state, the extra cost of shipping it to a worker and back,
+# and one pool round trip. From those, the best a W-core machine can do
+# is work / (work / W + shipping) per state.
+# Run with: python bench_parallel.py
+
+def best_ms(run, repeat=3):
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best * 1000
+
+def calibrate(name, cg, sample=2000):
+    analysis = GrammarAnalysis(cg)
+    closure_table = closure_edges(cg, analysis)
+    kernels = LR1Automaton.build(cg, analysis=analysis).kernels[:sample]
+    local = best_ms(lambda: [successors(cg, analysis, closure_table, kernel) for kernel in kernels])
+    start = time.perf_counter()
+    with LR1Pool(cg, analysis, workers=1) as pool:
+        pool.map([kernels[:1]])
+        startup = (time.perf_counter() - start) * 1000
+        round_trip = best_ms(lambda: pool.map([kernels[:1]]), repeat=5)
+        shipped = best_ms(lambda: pool.map([kernels[i:i + 250] for i in range(0, len(kernels), 250)]))
+    work = local * 1000 / len(kernels)
+    shipping = max(shipped - local, 0) * 1000 / len(kernels)
+    print(f"\n{name}: expand {work:.1f} us/state, shipping {shipping:.1f} us/state, "
+          f"round trip {round_trip:.2f} ms, pool startup {startup:.0f} ms")
+    print(f"  round trip paid for from {round_trip * 1000 / work:.0f} states a level (MIN_PARALLEL = {MIN_PARALLEL}); "
+          f"best case on 4 / 16 cores: {work / (work / 4 + shipping):.2f}x / {work / (work / 16 + shipping):.2f}x")
+
+def report(name, cg):
+    analysis = GrammarAnalysis(cg)
+    serial = LR1Automaton.build(cg, analysis=analysis)
+    lalr = serial.merge_cores()
+    serial_time = best_ms(lambda: LR1Automaton.build(cg, analysis=analysis))
+    print(f"\n{name}: {serial.n_states} LR(1) states, {lalr.n_states} LALR(1), {os.cpu_count()} CPUs")
+    print(f"{'Build':<12} | {'Time (ms)':>9} | {'Speedup':>7} | {'Startup (ms)':>12}")
+    print("-" * 51)
+    print(f"{'serial':<12} | {serial_time:>9.0f} | {1:>6.2f}x | {'':>12}")
+    # The default, workers=1, is the serial build itself
+    default = best_ms(lambda: build_lr1_parallel(cg, analysis=analysis))
+    print(f"{'default':<12} | {default:>9.0f} | {serial_time / default:>6.2f}x | {'':>12}")
+    for workers in sorted({2, 4, os.cpu_count() or 1} - {1}):
+        start = time.perf_counter()
+        with LR1Pool(cg, analysis, workers) as pool:
+            pool.map([[]] * workers)
+            startup = (time.perf_counter() - start) * 1000
+            parallel = build_lr1_parallel(cg, pool=pool)
+            assert parallel.kernels == serial.kernels and parallel.goto == serial.goto
+            merged = build_lalr1_parallel(cg, pool=pool)
+            assert merged.kernels == lalr.kernels and merged.goto == lalr.goto
+            elapsed = best_ms(lambda: build_lr1_parallel(cg, pool=pool))
+        print(f"{f'{workers} workers':<12} | {elapsed:>9.0f} | {serial_time / elapsed:>6.2f}x | {startup:>12.0f}")
+
+if __name__ == "__main__":
+    grammars = [("Statements (large)", CompiledGrammar(statement_grammar(200))),
+                ("Not LALR(1)", CompiledGrammar(not_lalr_grammar(200)))]
+    for name, cg in grammars:
+        calibrate(name, cg)
+    for name, cg in grammars:
+        report(name, cg)
+    print("\n✅ Parallel LR(1) and LALR(1) builds are identical to the serial build")
@@ -0,0 +1,180 @@
+import operator
+import random
+import sys
+import tempfile
+import time
+from fractions import Fraction
+
+from bench_codegen import load_module
+from compiled_grammar import CompiledGrammar
+from direct_codegen import generate_direct_module
+from lr_select import select_table
+from packed_tables import PackedTables
+from precedence import Precedence, parse_grammar
+from standalone import generate_module
+
+# The same expression language two ways: stratified into E/T/F levels, the
+# usual way to keep an LR grammar conflict-free, and as one ambiguous E
+# with yacc-style declarations settling its conflicts. Both parsers are
+# first checked to evaluate random expressions the way Python does, then
+# compared on table size and on parse steps and throughput, since the
+# declared grammar skips the E -> T and T -> F chain reductions.
+# Run with: python bench_precedence.py
+
+STRATIFIED = """
+E -> E + T | E - T | T
+T -> T * F | T / F | F
+F -> - F | ( E ) | n
+"""
+
+DECLARED = """
+%left + -
+%left * /
+%right UMINUS
+E -> E + E | E - E | E * E | E / E | - E %prec UMINUS | ( E ) | n
+"""
+
+# The declared grammar with a non-associative comparison on top, to check
+# that a < b < c is rejected rather than grouped
+COMPARISON = """
+%nonassoc <
+%left + -
+%left * /
+E -> E < E | E + E | E - E | E * E | E / E | ( E ) | n
+"""
+
+# Two reductions on the %nonassoc slot after E < E. When F -> E < E binds
+# tighter than <, it conflicts with E -> E < E, which must be reported, not
+# dropped because the slot is already an error; when it ties, the slot
+# stays an error
+NONASSOC_SLOT = """
+%nonassoc <
+%left HIGH
+S -> E | F < n
+E -> E < E | n
+F -> E < E %prec HIGH
+"""
+
+OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv}
+
+def load(text):
+    rules, declarations, rule_prec = parse_grammar(text)
+    cg = CompiledGrammar(rules)
+    precedence = Precedence(cg, declarations, rule_prec) if declarations else None
+    return cg, select_table(cg, precedence=precedence)
+
+def random_expression(rng, depth=0):
+    """(tokens, values, python source) for a random expression over n"""
+    roll = rng.random()
+    if depth > 6 or roll < 0.3:
+        value = rng.randint(1, 9)
+        return ["n"], [value], str(value)
+    if roll < 0.4:
+        tokens, values, source = random_expression(rng, depth + 1)
+        return ["-"] + tokens, values, f"-{source}"
+    if roll < 0.5:
+        tokens, values, source = random_expression(rng, depth + 1)
+        return ["("] + tokens + [")"], values, f"({source})"
+    left, right = random_expression(rng, depth + 1), random_expression(rng, depth + 1)
+    op = rng.choice("+-*/")
+    return left[0] + [op] + right[0], left[1] + right[1], f"{left[2]} {op} {right[2]}"
+
+def evaluate(module, tokens, values):
+    """Parse with module and fold the tree into a Fraction"""
+    numbers = iter(values)
+    def on_reduce(lhs, children):
+        if children == ["n"]:
+            return Fraction(next(numbers))
+        if len(children) == 1:
+            return children[0]
+        if len(children) == 2:
+            return -children[1]
+        if children[0] == "(":
+            return children[1]
+        return OPERATORS[children[1]](children[0], children[2])
+    return module.parse(tokens, on_reduce=on_reduce)
+
+def check(directory, modules, trials=2000, seed=0):
+    rng = random.Random(seed)
+    checked = 0
+    for _ in range(trials):
+        tokens, values, source = random_expression(rng)
+        try:
+            expected = eval(source.replace("/", "*Fraction(1)/"))
+        except ZeroDivisionError:
+            continue
+        for name, module in modules.items():
+            try:
+                got = evaluate(module, tokens, values)
+            except ZeroDivisionError:
+                got = None
+            assert got == expected, (name, source, got, expected)
+        checked += 1
+    print(f"✅ Stratified and declared parsers evaluate {checked} random expressions like Python")
+
+    cg, selection = load(COMPARISON)
+    assert not selection.conflicts
+    tables = load_module(directory, "comparison_tables", generate_module(cg, selection))
+    direct = load_module(directory, "comparison_direct", generate_direct_module(cg, selection))
+    packed = PackedTables.from_tables(cg, selection.action, selection.goto, errors=selection.errors)
+    for accepts in (tables.accepts, direct.accepts, lambda text: packed.parse(text)[0]):
+        assert accepts("n < n + n * n")
+        assert not accepts("n < n < n")
+    print("✅ %nonassoc rejects n < n < n and still accepts n < n + n * n, in all three backends")
+
+    # The error is reported at the second <, which is not listed as expected
+    for module in (tables, direct):
+        try:
+            module.parse("n < n < n")
+        except module.ParseError as e:
+            assert e.position == 3 and "<" not in e.expected and "+" in e.expected, (e.position, e.expected)
+        else:
+            raise AssertionError("n < n < n parsed")
+    print("✅ A %nonassoc error slot is not listed among the expected tokens")
+
+    cg, selection = load(NONASSOC_SLOT)
+    found = {(cg.symbols[t], kept[0], dropped[0]) for _, t, kept, dropped in selection.conflicts}
+    assert found == {("<", "reduce", "reduce")}, selection.conflicts
+    cg, selection = load(NONASSOC_SLOT.replace(" %prec HIGH", ""))
+    assert not selection.conflicts and selection.errors
+    print("✅ Later reductions on a %nonassoc error slot are settled by precedence or reported")
+
+def throughput(packed, texts, n_tokens, repeat=3):
+    best = float("inf")
+    steps = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        steps = 0
+        for text in texts:
+            accepted, n = packed.parse(text)
+            steps += n
+        best = min(best, time.perf_counter() - start)
+    return steps, n_tokens / best
+
+def report(grammars, n_sentences=2000, seed=1):
+    rng = random.Random(seed)
+    sentences = [random_expression(rng)[0] for _ in range(n_sentences)]
+    texts = [" ".join(tokens) for tokens in sentences]
+    n_tokens = sum(len(tokens) for tokens in sentences)
+
+    print(f"\n{n_sentences} random expressions, {n_tokens} tokens")
+    print(f"{'grammar':<11} {'table':<8} {'states':>7} {'entries':>8} {'bytes':>7} {'conflicts':>10} {'resolved':>9} "
+          f"{'steps':>8} {'tokens/s':>10}")
+    for name, (cg, selection) in grammars.items():
+        packed = PackedTables.from_tables(cg, selection.action, selection.goto, errors=selection.errors)
+        entries = sum(len(row) for row in selection.action) + sum(len(row) for row in selection.goto)
+        steps, speed = throughput(packed, texts, n_tokens)
+        print(f"{name:<11} {selection.algorithm:<8} {selection.n_states:>7} {entries:>8} {packed.nbytes():>7} "
+              f"{len(selection.conflicts):>10} {len(selection.resolved):>9} {steps:>8} {speed:>10,.0f}")
+
+if __name__ == "__main__":
+    grammars = {"stratified": load(STRATIFIED), "declared": load(DECLARED)}
+    with tempfile.TemporaryDirectory() as directory:
+        sys.dont_write_bytecode = True
+        modules = {name: load_module(directory, name, generate_module(cg, selection))
+                   for name, (cg, selection) in grammars.items()}
+        check(directory, modules)
+    report(grammars)
+    cg, selection = grammars["declared"]
+    print(f"\nHow the declared grammar's conflicts were settled ({selection.algorithm}):")
+    print(selection.precedence.format_report(selection.conflicts))
@@ -0,0 +1,151 @@
+import random
+import time
+import tracemalloc
+
+import lr_tables
+from compiled_grammar import CompiledGrammar
+from lr0_automaton import LR0Automaton
+from lr1_automaton import LR1Automaton
+from lr_select import select_table
+from minimal_lr1 import build_minimal_lr1
+
+# Differential checks of the DeRemer-Pennello LALR(1) builder against
+# merging the canonical LR(1) automaton and of minimal LR(1) against
+# canonical LR(1), then build time, peak memory, state and
+# conflict counts per table kind, minimal LR(1) included, and what
+# lr_select settles on.
+# Run with: python bench_tables.py
+
+def random_grammar(rng, n_nonterminals, n_terminals, n_productions):
+    nonterminals = [f"N{i}" for i in range(n_nonterminals)]
+    terminals = [f"t{i}" for i in range(n_terminals)]
+    rules = {A: [tuple(rng.choice(terminals) for _ in range(rng.randint(0, 2)))] for A in nonterminals}
+    for _ in range(n_productions - n_nonterminals):
+        A = rng.choice(nonterminals)
+        rules[A].append(tuple(rng.choice(nonterminals + terminals) for _ in range(rng.randint(0, 4))))
+    return rules
+
+def expression_grammar(n_operators, n_functions):
+    """E -> E op T | T, T -> T * F | F, F -> ( E ) | id | f ( E )"""
+    return {
+        "E": [("E", f"op{i}", "T") for i in range(n_operators)] + [("T",)],
+        "T": [("T", "*", "F"), ("F",)],
+        "F": [("(", "E", ")"), ("id",)] + [(f"f{i}", "(", "E", ")") for i in range(n_functions)],
+    }
+
+def statement_grammar(n_statements):
+    """A block-structured language with n statement forms over expressions"""
+    rules = {"P": [("L",)], "L": [("L", "S"), ()]}
+    rules["S"] = [(f"s{i}",) for i in range(n_statements)] + [("{", "L", "}")]
+    for i in range(n_statements):
+        rules[f"s{i}"] = [(f"kw{i}", "E", ";"), (f"kw{i}", "(", "E", ")", "S"), (f"kw{i}", "id", "=", "E", ";")]
+    rules.update(expression_grammar(8, 4))
+    return rules
+
+def not_lalr_grammar(n_copies):
+    """n copies of S -> a A d | b B d | a B e | b A e, A -> c, B -> c: LR(1)
+    but not LALR(1), since merging the two "c ." states mixes d and e"""
+    rules = {"S": [("E",)]}
+    for i in range(n_copies):
+        rules["S"] += [(f"a{i}", f"A{i}", "d"), (f"b{i}", f"B{i}", "d"), (f"a{i}", f"B{i}", "e"), (f"b{i}", f"A{i}", "e")]
+        rules[f"A{i}"] = [(f"c{i}",)]
+        rules[f"B{i}"] = [(f"c{i}",)]
+    rules.update(expression_grammar(8, 4))
+    return rules
+
+def same_tables(cg, merged, lr0, merged_table, lalr_table):
+    """Equal up to state numbering; states correspond through their LR(0) kernels"""
+    ids = {kernel: i for i, kernel in enumerate(lr0.kernels)}
+    perm = [ids[tuple(item for item, _ in kernel)] for kernel in merged.kernels]
+    (a1, g1, c1), (a2, g2, c2) = merged_table, lalr_table
+    for s in range(merged.n_states):
+        row = {t: ("shift", perm[act[1]]) if act[0] == "shift" else act for t, act in a1[s].items()}
+        if row != a2[perm[s]] or {A: perm[x] for A, x in g1[s].items()} != g2[perm[s]]:
+            return False
+    return {(perm[c[0]], c[1]) for c in c1} == {c[:2] for c in c2}
+
+def check_lalr_against_merge(cases=500, seed=0):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        cg = CompiledGrammar(random_grammar(rng, rng.randint(1, 6), rng.randint(1, 4), rng.randint(4, 14)))
+        lr0 = LR0Automaton(cg)
+        merged = LR1Automaton.build(cg).merge_cores()
+        assert same_tables(cg, merged, lr0, lr_tables.build_lr1_table(cg, merged), lr_tables.build_lalr_table(cg, lr0))
+    print(f"✅ DeRemer-Pennello LALR(1) matches merged LR(1) on {cases} grammars")
+
+def check_minimal_against_canonical(cases=500, seed=0):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        cg = CompiledGrammar(random_grammar(rng, rng.randint(1, 6), rng.randint(1, 4), rng.randint(4, 14)))
+        lr0 = LR0Automaton(cg)
+        minimal = build_minimal_lr1(cg)
+        conflicts = lr_tables.build_lr1_table(cg, minimal)[2]
+        assert bool(conflicts) == bool(lr_tables.build_lr1_table(cg, LR1Automaton.build(cg))[2])
+        if not lr_tables.build_lalr_table(cg, lr0)[2]:
+            assert minimal.n_states == lr0.n_states
+    print(f"✅ Minimal LR(1) has conflicts exactly when CLR(1) does, and LALR(1) size without them, on {cases} grammars")
+
+def build_slr(cg):
+    automaton = LR0Automaton(cg)
+    return automaton, lr_tables.build_slr_table(cg, automaton)
+
+def build_lalr(cg):
+    automaton = LR0Automaton(cg)
+    return automaton, lr_tables.build_lalr_table(cg, automaton)
+
+def build_lalr_merge(cg):
+    automaton = LR1Automaton.build(cg).merge_cores()
+    return automaton, lr_tables.build_lr1_table(cg, automaton)
+
+def build_minimal(cg):
+    automaton = build_minimal_lr1(cg)
+    return automaton, lr_tables.build_lr1_table(cg, automaton)
+
+def build_clr(cg):
+    automaton = LR1Automaton.build(cg)
+    return automaton, lr_tables.build_lr1_table(cg, automaton)
+
+BUILDERS = [
+    ("SLR(1)", build_slr),
+    ("LALR(1)", build_lalr),
+    ("LALR(1) merge", build_lalr_merge),
+    ("Minimal LR(1)", build_minimal),
+    ("CLR(1)", build_clr),
+]
+
+def measure(build, cg, repeat=3):
+    # Timed without tracemalloc, which slows every allocation and so the
+    # allocation-heavy builders most; the peak comes from one more run
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        automaton, (_, _, conflicts) = build(cg)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    tracemalloc.start()
+    build(cg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return automaton.n_states, len(conflicts), elapsed, peak
+
+def report(name, cg):
+    print(f"\n{name}: {cg.n_productions} productions, {cg.n_terminals} terminals")
+    print(f"{'Table':<14} | {'States':>6} | {'Conflicts':>9} | {'Time (ms)':>9} | {'Peak (KB)':>9}")
+    print("-" * 60)
+    for label, build in BUILDERS:
+        states, conflicts, elapsed, peak = measure(build, cg)
+        print(f"{label:<14} | {states:>6} | {conflicts:>9} | {elapsed * 1000:>9.1f} | {peak / 1024:>9.0f}")
+
+def report_selection(name, cg):
+    selection = select_table(cg)
+    print(f"\n{name}: settled on {selection.algorithm}")
+    print(selection.format_report())
+
+if __name__ == "__main__":
+    check_lalr_against_merge()
+    check_minimal_against_canonical()
+    report("Expressions", CompiledGrammar(expression_grammar(40, 20)))
+    report("Statements", CompiledGrammar(statement_grammar(50)))
+    report("Statements (large)", CompiledGrammar(statement_grammar(200)))
+    report("Not LALR(1)", CompiledGrammar(not_lalr_grammar(20)))
+    report_selection("Expressions", CompiledGrammar(expression_grammar(40, 20)))
+    report_selection("Not LALR(1)", CompiledGrammar(not_lalr_grammar(20)))
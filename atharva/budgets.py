@@ -0,0 +1,81 @@
+import time
+
+# -------------------------------
+# Resource budgets for table builds and parse runs
+# -------------------------------
+#
+# Builders and simulate_* drivers take an optional budget and call its
+# check_* methods as they go. When a limit is hit, BudgetExceeded is raised
+# carrying the statistics gathered so far, so callers can report how far
+# the work got. Any limit left as None is not enforced.
+
+ITEM_BYTES = 200   # rough cost of one item tuple plus its strings
+STATE_BYTES = 400  # rough cost of one frozenset state and its dict entries
+TIME_CHECK_EVERY = 1024  # driver steps between wall-clock checks
+
+class BudgetExceeded(Exception):
+    def __init__(self, limit, value, maximum, stats):
+        super().__init__(f"{limit} budget exceeded ({value} > {maximum})")
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        self.stats = stats
+
+    def result(self):
+        return {
+            "status": "budget_exceeded",
+            "limit": self.limit,
+            "value": self.value,
+            "maximum": self.maximum,
+            "stats": self.stats,
+        }
+
+class Budget:
+    def __init__(self, max_states=None, max_items=None, max_memory=None, max_steps=None, max_seconds=None):
+        self.max_states = max_states
+        self.max_items = max_items
+        self.max_memory = max_memory
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.started = None
+
+    def start(self):
+        """Start the wall clock if it is not running yet. Builders and drivers
+        call this on entry, so one budget passed through several of them
+        (select_table trying each table kind) is one time limit for all"""
+        if self.started is None:
+            self.started = time.monotonic()
+        return self
+
+    def elapsed(self):
+        return 0.0 if self.started is None else time.monotonic() - self.started
+
+    def _exceeded(self, limit, value, maximum, stats):
+        stats["elapsed"] = round(self.elapsed(), 6)
+        raise BudgetExceeded(limit, value, maximum, stats)
+
+    def _check_time(self, stats):
+        if self.max_seconds is not None:
+            elapsed = self.elapsed()
+            if elapsed > self.max_seconds:
+                self._exceeded("max_seconds", round(elapsed, 6), self.max_seconds, stats)
+
+    def check_build(self, states, items, queue=0):
+        """Called by builders after each new state is added"""
+        stats = {"states": states, "items": items, "queue": queue,
+                 "estimated_bytes": items * ITEM_BYTES + states * STATE_BYTES}
+        if self.max_states is not None and states > self.max_states:
+            self._exceeded("max_states", states, self.max_states, stats)
+        if self.max_items is not None and items > self.max_items:
+            self._exceeded("max_items", items, self.max_items, stats)
+        if self.max_memory is not None and stats["estimated_bytes"] > self.max_memory:
+            self._exceeded("max_memory", stats["estimated_bytes"], self.max_memory, stats)
+        self._check_time(stats)
+
+    def check_step(self, step, position, stack_depth):
+        """Called by parse drivers once per shift/reduce step"""
+        if self.max_steps is not None and step > self.max_steps:
+            stats = {"steps": step, "position": position, "stack_depth": stack_depth}
+            self._exceeded("max_steps", step, self.max_steps, stats)
+        if step % TIME_CHECK_EVERY == 0:
+            self._check_time({"steps": step, "position": position, "stack_depth": stack_depth})
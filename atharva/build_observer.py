@@ -0,0 +1,159 @@
+import json
+import time
+
+# -------------------------------
+# Instrumentation hooks for the table builders
+# -------------------------------
+#
+# LR0Automaton, LR1Automaton.build, build_minimal_lr1, the build_*_table
+# functions of lr_tables and select_table take an optional observer, like
+# they take a budget, and call its hooks as they go:
+#
+#   phase_started(name) / phase_finished(name)
+#       around "analysis", "lr0_collection", "lr1_collection",
+#       "minimal_lr1_collection", "lalr_lookaheads" and "<table>_table"
+#       (lr0, slr1, lalr1, and lr1 or the name given to build_lr1_table)
+#   expanded(n_items, symbols, n_new)
+#       once per state expanded while building a collection: the size of
+#       its closure, the symbols of the successors computed from it, and
+#       how many of those successors were new states (the rest were
+#       duplicate hits)
+#   table(name, automaton, action, goto_table, conflicts)
+#       when a table is finished
+#
+# The hooks are batched per state rather than called per successor, so an
+# observer costs one call per state; without one the builders only test
+# `if observer`.
+# BuildObserver is the do-nothing base to subclass; BuildStats collects
+# counters per phase, timers and table statistics, and exports them as
+# JSON for comparing grammars and algorithms.
+
+class BuildObserver:
+    def phase_started(self, name):
+        pass
+
+    def phase_finished(self, name):
+        pass
+
+    def expanded(self, n_items, symbols, n_new):
+        pass
+
+    def table(self, name, automaton, action, goto_table, conflicts):
+        pass
+
+class _Counters:
+    __slots__ = ("closure_calls", "closure_items", "goto_calls", "new_states", "duplicate_states", "goto_by_symbol")
+
+    def __init__(self, n_symbols):
+        self.closure_calls = self.closure_items = self.goto_calls = 0
+        self.new_states = self.duplicate_states = 0
+        self.goto_by_symbol = [0] * n_symbols  # by symbol id
+
+class BuildStats(BuildObserver):
+    def __init__(self, cg, label=None):
+        self.cg = cg
+        self.label = label
+        self.phases = {}    # name -> seconds, summed when a phase repeats
+        self.counters = {}  # phase name -> _Counters, for the phases that expand states
+        self.tables = []    # one dict per finished table, see table()
+        self._open = []     # (name, started) of the phases running, innermost last
+        self._now = None    # counters of the innermost running phase, made on first use
+
+    def phase_started(self, name):
+        self._open.append((name, time.perf_counter()))
+        self._now = None
+
+    def phase_finished(self, name):
+        open_name, started = self._open.pop()
+        if open_name != name:
+            raise ValueError(f"Phase {name!r} finished while {open_name!r} was running")
+        self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+        self._now = None
+
+    def _current(self):
+        name = self._open[-1][0] if self._open else "unphased"
+        if name not in self.counters:
+            self.counters[name] = _Counters(self.cg.n_symbols)
+        self._now = self.counters[name]
+        return self._now
+
+    def expanded(self, n_items, symbols, n_new):
+        counters = self._now or self._current()
+        counters.closure_calls += 1
+        counters.closure_items += n_items
+        counters.goto_calls += len(symbols)
+        counters.new_states += n_new
+        counters.duplicate_states += len(symbols) - n_new
+        by_symbol = counters.goto_by_symbol
+        for symbol in symbols:
+            by_symbol[symbol] += 1
+
+    def table(self, name, automaton, action, goto_table, conflicts):
+        cg = self.cg
+        n_states = automaton.n_states
+        action_entries = sum(len(row) for row in action)
+        goto_entries = sum(len(row) for row in goto_table)
+        # the augmented start never labels a goto, so it has no column
+        action_cells = n_states * cg.n_terminals
+        goto_cells = n_states * (cg.n_symbols - cg.n_terminals - 1)
+        self.tables.append({
+            "table": name,
+            "states": n_states,
+            "kernel_items": sum(len(kernel) for kernel in automaton.kernels),
+            "action_entries": action_entries,
+            "goto_entries": goto_entries,
+            "action_density": action_entries / action_cells if action_cells else 0.0,
+            "goto_density": goto_entries / goto_cells if goto_cells else 0.0,
+            "density": (action_entries + goto_entries) / (action_cells + goto_cells) if n_states else 0.0,
+            "conflicts": len(conflicts),
+        })
+
+    # -------------------------------
+    # Export
+    # -------------------------------
+
+    def as_dict(self):
+        cg = self.cg
+        counters = {}
+        for phase, c in self.counters.items():
+            values = {name: getattr(c, name) for name in _Counters.__slots__}
+            values["goto_by_symbol"] = {cg.symbols[s]: n for s, n in enumerate(c.goto_by_symbol) if n}
+            counters[phase] = values
+        return {
+            "label": self.label,
+            "grammar": {
+                "terminals": cg.n_terminals,
+                "nonterminals": cg.n_symbols - cg.n_terminals - 1,
+                "productions": cg.n_productions - 1,
+                "items": cg.n_items,
+            },
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "counters": counters,
+            "tables": self.tables,
+        }
+
+    def to_json(self, path=None, indent=2):
+        """The statistics as JSON text, also written to path when given"""
+        text = json.dumps(self.as_dict(), indent=indent)
+        if path:
+            with open(path, "w") as f:
+                f.write(text + "\n")
+        return text
+
+    def format_report(self):
+        lines = [f"{'Phase':<24} | {'Time (ms)':>9}", "-" * 36]
+        lines += [f"{name:<24} | {seconds * 1000:>9.2f}" for name, seconds in self.phases.items()]
+        for phase, c in self.counters.items():
+            lines.append("")
+            lines.append(f"{phase}: {c.closure_calls} closures ({c.closure_items} items), "
+                         f"{c.goto_calls} gotos, {c.new_states} new states, "
+                         f"{c.duplicate_states} duplicate hits")
+            busiest = sorted(range(len(c.goto_by_symbol)), key=lambda s: -c.goto_by_symbol[s])[:5]
+            busiest = ", ".join(f"{self.cg.symbols[s]} {c.goto_by_symbol[s]}" for s in busiest)
+            lines.append(f"  most gotos on: {busiest}")
+        lines.append("")
+        for t in self.tables:
+            lines.append(f"{t['table']}: {t['states']} states, {t['kernel_items']} kernel items, "
+                         f"density {t['density']:.1%} (ACTION {t['action_density']:.1%}, "
+                         f"GOTO {t['goto_density']:.1%}), {t['conflicts']} conflicts")
+        return "\n".join(lines)
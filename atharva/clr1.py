@@ -1,5 +1,7 @@
 from collections import defaultdict, deque
 
+from grammar_analysis import GrammarAnalysis
+
 # -------------------------------
 # 1. Input Grammar & Augmentation
 # -------------------------------
@@ -19,28 +21,7 @@ grammar.update(raw_grammar)
 # -------------------------------
 
 def compute_first(grammar):
-    first = defaultdict(set)
-
-    def _first(symbol):
-        if not symbol.isupper():
-            return {symbol}
-        if symbol in first:
-            return first[symbol]
-        result = set()
-        for prod in grammar[symbol]:
-            for char in prod:
-                f = _first(char)
-                result.update(f - {'ε'})
-                if 'ε' not in f:
-                    break
-            else:
-                result.add('ε')
-        first[symbol] = result
-        return result
-
-    for nonterminal in grammar:
-        _first(nonterminal)
-    return first
+    return GrammarAnalysis.from_strings(grammar).named_first()
 
 def closure_lr1(items, grammar, first):
     closure_set = set(items)
@@ -62,7 +43,7 @@ def closure_lr1(items, grammar, first):
                         break
                 else:
                     f.add(la)
-                lookaheads.update(f)
+                lookaheads.update(f - {'ε'})
             else:
                 lookaheads.add(la)
 
@@ -88,15 +69,23 @@ def goto_lr1(items, symbol, grammar, first):
 # 3. Build CLR(1) Canonical Collection
 # -------------------------------
 
-def build_clr1_canonical_collection(grammar, augmented_start):
+def build_clr1_canonical_collection(grammar, augmented_start, progress=None, resume=None, budget=None):
+    # progress(states, transitions, queue) is called after each state is
+    # expanded and may raise to stop the build; resume takes a previous
+    # (states, transitions, queue) snapshot and carries on from there
     first = compute_first(grammar)
-    start_items = [(augmented_start, "." + grammar[augmented_start][0], "$")]
-    I0 = closure_lr1(start_items, grammar, first)
 
-    states = [I0]
-    transitions = dict()
-    state_ids = {I0: 0}
-    queue = deque([I0])
+    if resume:
+        states, transitions, pending = resume
+        state_ids = {state: i for i, state in enumerate(states)}
+        queue = deque(pending)
+    else:
+        start_items = [(augmented_start, "." + grammar[augmented_start][0], "$")]
+        I0 = closure_lr1(start_items, grammar, first)
+        states = [I0]
+        transitions = dict()
+        state_ids = {I0: 0}
+        queue = deque([0])
 
     symbols = set()
     for rhs_list in grammar.values():
@@ -104,17 +93,26 @@ def build_clr1_canonical_collection(grammar, augmented_start):
             symbols.update(prod)
     symbols.update(grammar.keys())
 
+    if budget:
+        budget.start()
+    items = sum(len(state) for state in states)
+
     while queue:
-        current = queue.popleft()
-        current_id = state_ids[current]
-        for symbol in symbols:
+        current_id = queue.popleft()
+        current = states[current_id]
+        for symbol in sorted(symbols):
             next_state = goto_lr1(current, symbol, grammar, first)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
                 states.append(next_state)
-                queue.append(next_state)
+                queue.append(state_ids[next_state])
+                items += len(next_state)
+                if budget:
+                    budget.check_build(len(states), items, len(queue))
             if next_state:
                 transitions[(current_id, symbol)] = state_ids[next_state]
+        if progress:
+            progress(states, transitions, queue)
 
     return states, transitions, state_ids, first
 
@@ -122,7 +120,7 @@ def build_clr1_canonical_collection(grammar, augmented_start):
 # 4. Build CLR(1) Parsing Table
 # -------------------------------
 
-def build_clr1_parsing_table(states, transitions, state_ids, grammar, first):
+def build_clr1_parsing_table(states, transitions, state_ids, grammar, first, augmented_start):
     action = defaultdict(dict)
     goto_table = defaultdict(dict)
     productions = []
@@ -159,7 +157,7 @@ def build_clr1_parsing_table(states, transitions, state_ids, grammar, first):
 # 5. Simulate CLR(1) Shift/Reduce Parsing
 # -------------------------------
 
-def simulate_clr_parsing(input_string, action, goto_table, productions):
+def simulate_clr_parsing(input_string, action, goto_table, productions, verbose=True, budget=None, trace=True):
     input_tokens = input_string.strip().split() + ["$"]
     stack = [0]
     steps = []
@@ -167,18 +165,26 @@ def simulate_clr_parsing(input_string, action, goto_table, productions):
     idx = 0
     step = 1
 
+    if budget:
+        budget.start()
+
     while True:
+        if budget:
+            budget.check_step(step, idx, len(stack))
         current_state = stack[-1]
         current_token = input_tokens[idx]
 
         act = action.get(current_state, {}).get(current_token)
-        stack_repr = ' '.join(str(s) for s in stack)
-        input_repr = ' '.join(input_tokens[idx:])
-        act_repr = str(act) if act else "ERROR"
-        steps.append((step, stack_repr, input_repr, act_repr))
+        if trace:
+            stack_repr = ' '.join(str(s) for s in stack)
+            input_repr = ' '.join(input_tokens[idx:])
+            act_repr = str(act) if act else "ERROR"
+            steps.append((step, stack_repr, input_repr, act_repr))
 
         if not act:
-            print("\n🚫 Parsing Error! String rejected.\n")
+            accepted = False
+            if verbose:
+                print("\n🚫 Parsing Error! String rejected.\n")
             break
 
         if act[0] == "shift":
@@ -188,50 +194,57 @@ def simulate_clr_parsing(input_string, action, goto_table, productions):
         elif act[0] == "reduce":
             prod_index = act[1]
             lhs, rhs = productions[prod_index]
-            if rhs != "":
+            if rhs:
                 stack = stack[:-2 * len(rhs)]
             top_state = stack[-1]
             stack.append(lhs)
             stack.append(goto_table[top_state][lhs])
         elif act[0] == "accept":
-            print("\n✅ String accepted by the grammar!\n")
+            accepted = True
+            if verbose:
+                print("\n✅ String accepted by the grammar!\n")
             break
         step += 1
 
-    print("\n=== PARSING STEPS ===")
-    print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
-    print("-" * 70)
-    for s in steps:
-        print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+    if verbose and trace:
+        print("\n=== PARSING STEPS ===")
+        print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
+        print("-" * 70)
+        for s in steps:
+            print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+
+    # Without trace, only the number of steps is kept
+    return accepted, steps if trace else step
 
 # -------------------------------
 # 6. Run It All (CLR(1) Parser)
 # -------------------------------
 
-states, transitions, state_ids, first = build_clr1_canonical_collection(grammar, augmented_start)
-action, goto_table, productions = build_clr1_parsing_table(states, transitions, state_ids, grammar, first)
-
-# Print item sets
-for i, state in enumerate(states):
-    print(f"\nItem Set I{i}:")
-    for lhs, rhs, lookahead in sorted(state):
-        print(f"  {lhs} -> {rhs} , {lookahead}")
-
-# Print parsing tables
-print("\n=== ACTION TABLE ===")
-for state in sorted(action):
-    for symbol in sorted(action[state]):
-        print(f"ACTION[{state}, '{symbol}'] = {action[state][symbol]}")
-
-print("\n=== GOTO TABLE ===")
-for state in sorted(goto_table):
-    for symbol in sorted(goto_table[state]):
-        print(f"GOTO[{state}, '{symbol}'] = {goto_table[state][symbol]}")
-
-print("\n=== PRODUCTIONS ===")
-for i, (lhs, rhs) in enumerate(productions):
-    print(f"{i}: {lhs} → {rhs}")
-
-# Try it out
-test_string = "c d d"
-simulate_clr_parsing(test_string, action, goto_table, productions)
\ No newline at end of file
+if __name__ == "__main__":
+    states, transitions, state_ids, first = build_clr1_canonical_collection(grammar, augmented_start)
+    action, goto_table, productions = build_clr1_parsing_table(states, transitions, state_ids, grammar, first, augmented_start)
+
+    # Print item sets
+    for i, state in enumerate(states):
+        print(f"\nItem Set I{i}:")
+        for lhs, rhs, lookahead in sorted(state):
+            print(f"  {lhs} -> {rhs} , {lookahead}")
+
+    # Print parsing tables
+    print("\n=== ACTION TABLE ===")
+    for state in sorted(action):
+        for symbol in sorted(action[state]):
+            print(f"ACTION[{state}, '{symbol}'] = {action[state][symbol]}")
+
+    print("\n=== GOTO TABLE ===")
+    for state in sorted(goto_table):
+        for symbol in sorted(goto_table[state]):
+            print(f"GOTO[{state}, '{symbol}'] = {goto_table[state][symbol]}")
+
+    print("\n=== PRODUCTIONS ===")
+    for i, (lhs, rhs) in enumerate(productions):
+        print(f"{i}: {lhs} → {rhs}")
+
+    # Try it out
+    test_string = "c d d"
+    simulate_clr_parsing(test_string, action, goto_table, productions)
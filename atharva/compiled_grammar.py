@@ -0,0 +1,133 @@
+from collections import OrderedDict
+
+# -------------------------------
+# Integer-interned grammar shared by the table builders
+# -------------------------------
+#
+# Symbols are interned to dense ids: terminals first ("$" is always 0), then
+# the augmented start, then the grammar's nonterminals, so a symbol is a
+# terminal exactly when its id is below n_terminals. Productions are
+# (lhs, rhs) with rhs a tuple of ids; production 0 is S' -> S.
+#
+# LR(0) items are dense ints too. The items of production p are
+# item_offset[p] .. item_offset[p] + len(rhs), one per dot position, so
+# moving the dot is just item + 1 and the per-item arrays below answer
+# "which production / where is the dot / what comes next" by indexing.
+
+EPSILON = "ε"
+END = "$"
+
+class CompiledGrammar:
+    def __init__(self, rules, start=None):
+        """rules maps each nonterminal to a list of symbol sequences.
+
+        Anything that is not a key of rules is a terminal, so symbols can be
+        multi-character tokens. An empty sequence (or one holding just ε)
+        is an epsilon production.
+        """
+        rules = OrderedDict((lhs, [tuple(s for s in rhs if s != EPSILON) for rhs in prods])
+                            for lhs, prods in rules.items())
+        start = start or next(iter(rules))
+        if start not in rules:
+            raise ValueError(f"Start symbol {start!r} has no productions")
+        augmented_start = start + "'"
+        while augmented_start in rules:
+            augmented_start += "'"
+
+        terminals = [END]
+        seen = {END}
+        for prods in rules.values():
+            for rhs in prods:
+                for symbol in rhs:
+                    if symbol not in rules and symbol not in seen:
+                        seen.add(symbol)
+                        terminals.append(symbol)
+
+        self.start = start
+        self.augmented_start = augmented_start
+        self.symbols = terminals + [augmented_start] + list(rules)
+        self.symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+        self.n_terminals = len(terminals)
+        self.n_symbols = len(self.symbols)
+
+        ids = self.symbol_ids
+        self.prod_lhs = [ids[augmented_start]]
+        self.prod_rhs = [(ids[start],)]
+        for lhs, prods in rules.items():
+            for rhs in prods:
+                self.prod_lhs.append(ids[lhs])
+                self.prod_rhs.append(tuple(ids[s] for s in rhs))
+        self.n_productions = len(self.prod_lhs)
+
+        # prods_by_lhs[A] lists production ids for nonterminal id A
+        self.prods_by_lhs = [[] for _ in range(self.n_symbols)]
+        for p, lhs in enumerate(self.prod_lhs):
+            self.prods_by_lhs[lhs].append(p)
+
+        self.item_offset = []
+        self.item_prod = []
+        self.item_dot = []
+        self.item_next = []  # symbol id after the dot, or -1 when complete
+        for p, rhs in enumerate(self.prod_rhs):
+            self.item_offset.append(len(self.item_prod))
+            for dot in range(len(rhs) + 1):
+                self.item_prod.append(p)
+                self.item_dot.append(dot)
+                self.item_next.append(rhs[dot] if dot < len(rhs) else -1)
+        self.n_items = len(self.item_prod)
+
+    @classmethod
+    def from_strings(cls, grammar, start=None):
+        """Build from the single-character {"S": ["CC"], ...} form the scripts use"""
+        rules = OrderedDict((lhs, [tuple(rhs) for rhs in prods]) for lhs, prods in grammar.items())
+        return cls(rules, start)
+
+    # -------------------------------
+    # Symbols, productions and items
+    # -------------------------------
+
+    def is_terminal(self, symbol):
+        return symbol < self.n_terminals
+
+    def terminals(self):
+        return range(self.n_terminals)
+
+    def nonterminals(self):
+        return range(self.n_terminals, self.n_symbols)
+
+    def item(self, prod, dot=0):
+        return self.item_offset[prod] + dot
+
+    def is_complete(self, item):
+        return self.item_next[item] < 0
+
+    def format_item(self, item):
+        p, dot = self.item_prod[item], self.item_dot[item]
+        rhs = [self.symbols[s] for s in self.prod_rhs[p]]
+        rhs.insert(dot, ".")
+        return f"{self.symbols[self.prod_lhs[p]]} -> {' '.join(rhs)}"
+
+    def format_production(self, prod):
+        rhs = " ".join(self.symbols[s] for s in self.prod_rhs[prod]) or EPSILON
+        return f"{self.symbols[self.prod_lhs[prod]]} -> {rhs}"
+
+    def named_productions(self):
+        """(lhs, rhs tuple) pairs by name, in the form the simulate_* drivers use"""
+        return [
+            (self.symbols[lhs], tuple(self.symbols[s] for s in rhs))
+            for lhs, rhs in zip(self.prod_lhs, self.prod_rhs)
+        ]
+
+def parse_rules(text):
+    """Parse 'E -> E + T | T' lines with whitespace-separated symbols"""
+    rules = OrderedDict()
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if "->" not in line:
+            raise ValueError(f"Expected 'A -> ...' but got {line.strip()!r}")
+        lhs, rhs = line.split("->", 1)
+        alternatives = rules.setdefault(lhs.strip(), [])
+        for alt in rhs.split("|"):
+            alternatives.append(tuple(alt.split()))
+    return rules
@@ -0,0 +1,190 @@
+import py_compile
+import sys
+from collections import Counter
+
+from lr_select import select_table
+from standalone import DRIVER_HEAD, DRIVER_TAIL, load_grammar, module_header, tuple_constant
+
+# -------------------------------
+# Direct-coded LR parser modules
+# -------------------------------
+#
+# The second backend next to standalone.py: instead of interpreting packed
+# tables, every LR state becomes a Python function that tests the
+# lookahead itself and carries out its action in place:
+#
+# - shifts push the target state (an if-chain for a few terminals, one
+#   probe of a per-state dict for many) and return 1 so the driver moves
+#   to the next token; accepting returns 2 and an error -1
+# - reductions are straight-line code: pop the right-hand side, build the
+#   value, and push the goto target. The states the parser can be exposed
+#   to after the pop are exactly those that reach this state by reading
+#   the right-hand side, so the goto is usually a constant, or else a short
+#   if-chain on the exposed state. They return 0
+# - the state's most common reduction is its default branch, as with the
+#   default reductions of packed_tables, after a test for any %nonassoc
+#   error slots of the state
+#
+# The driver is then one list index and one call per step. Both backends
+# take the same TableSelection from lr_select, i.e. the tables of
+# lr_tables.build_slr_table / build_lalr_table / build_lr1_table.
+#
+# Run with: python direct_codegen.py grammar.txt parser_module.py
+
+DICT_SHIFTS = 5  # states shifting on at least this many terminals use a dict
+
+DRIVER = DRIVER_HEAD + '''    build = on_reduce or _tree
+    state_functions, token_ids = STATE_FUNCTIONS, TOKEN_IDS
+
+    st = [0]
+    vs = []
+    position = 0
+    t = token_ids.get(tokens[0], -1)
+    while True:
+        result = state_functions[st[-1]](t, st, vs, build)
+        if result == 1:
+            vs.append(tokens[position])
+            position += 1
+            t = token_ids.get(tokens[position], -1)
+        elif result == 2:
+            return vs[0]
+        elif result:
+            expected = [SYMBOLS[e] for e in EXPECTED[st[-1]]]
+            raise ParseError(tokens[position], position, expected)
+
+def _tree(lhs, children):
+    return (lhs, children)
+''' + DRIVER_TAIL
+
+def _predecessors(automaton):
+    """pred[target][symbol] = states with a transition to target on symbol"""
+    pred = [{} for _ in range(automaton.n_states)]
+    for state, edges in enumerate(automaton.goto):
+        for symbol, target in edges.items():
+            pred[target].setdefault(symbol, set()).add(state)
+    return pred
+
+def _exposed(cg, pred, state, prod):
+    """States left on top after popping prod's rhs in state"""
+    states = {state}
+    for symbol in reversed(cg.prod_rhs[prod]):
+        states = set().union(*(pred[s].get(symbol, ()) for s in states))
+    return states
+
+def _test(values, var="t"):
+    if len(values) == 1:
+        return f"{var} == {values[0]}"
+    return f"{var} in {{{', '.join(map(str, values))}}}"
+
+def _reduce_lines(cg, goto_table, pred, state, prod, indent):
+    pad = " " * indent
+    n = len(cg.prod_rhs[prod])
+    lhs = cg.prod_lhs[prod]
+    name = repr(cg.symbols[lhs])
+    lines = [f"{pad}# {cg.format_production(prod)}"]
+    if n == 1:
+        lines.append(f"{pad}del st[-1]")
+        lines.append(f"{pad}vs[-1] = build({name}, [vs[-1]])")
+    elif n:
+        lines.append(f"{pad}del st[-{n}:]")
+        lines.append(f"{pad}vs[-{n}:] = [build({name}, vs[-{n}:])]")
+    else:
+        lines.append(f"{pad}vs.append(build({name}, []))")
+
+    by_target = {}
+    for g in sorted(_exposed(cg, pred, state, prod)):
+        by_target.setdefault(goto_table[g][lhs], []).append(g)
+    targets = sorted(by_target, key=lambda target: -len(by_target[target]))
+    if len(targets) == 1:
+        lines.append(f"{pad}st.append({targets[0]})")
+    else:
+        lines.append(f"{pad}g = st[-1]")
+        for k, target in enumerate(targets[:-1]):
+            keyword = "if" if k == 0 else "elif"
+            lines.append(f"{pad}{keyword} {_test(by_target[target], 'g')}:")
+            lines.append(f"{pad}    st.append({target})")
+        lines.append(f"{pad}else:")
+        lines.append(f"{pad}    st.append({targets[-1]})")
+    lines.append(f"{pad}return 0")
+    return lines
+
+def _state_function(cg, action, goto_table, pred, state, constants, errors=()):
+    row = action[state]
+    shifts = {t: act[1] for t, act in row.items() if act[0] == "shift"}
+    accept = [t for t, act in row.items() if act[0] == "accept"]
+    reductions = {}
+    for t, act in sorted(row.items()):
+        if act[0] == "reduce":
+            reductions.setdefault(act[1], []).append(t)
+    counts = Counter({prod: len(ts) for prod, ts in reductions.items()})
+    default = counts.most_common(1)[0][0] if counts else None
+
+    lines = [f"def _state_{state}(t, st, vs, build):"]
+    if len(shifts) >= DICT_SHIFTS:
+        constants.append(f"_SHIFT_{state} = {{{', '.join(f'{t}: {s}' for t, s in sorted(shifts.items()))}}}")
+        lines += [
+            f"    target = _SHIFT_{state}.get(t)",
+            "    if target is not None:",
+            "        st.append(target)",
+            "        return 1",
+        ]
+    else:
+        for t, target in sorted(shifts.items()):
+            lines += [f"    if t == {t}:", f"        st.append({target})", "        return 1"]
+    if accept:
+        lines += [f"    if {_test(accept)}:", "        return 2"]
+    for prod in sorted(reductions, key=lambda p: -counts[p]):
+        if prod != default:
+            lines.append(f"    if {_test(reductions[prod])}:")
+            lines += _reduce_lines(cg, goto_table, pred, state, prod, 8)
+    if default is not None:
+        if errors:
+            lines += [f"    if {_test(sorted(errors))}:", "        return -1"]
+        lines += _reduce_lines(cg, goto_table, pred, state, default, 4)
+    else:
+        lines.append("    return -1")
+    return lines
+
+def generate_direct_module(cg, selection, source=None):
+    """Source text of a direct-coded parser module for a TableSelection"""
+    automaton = selection.automaton
+    action, goto_table = selection.action, selection.goto
+    pred = _predecessors(automaton)
+    errors = {}
+    for state, terminal in selection.errors:
+        errors.setdefault(state, []).append(terminal)
+
+    parts = [module_header(cg, selection, "direct-coded by atharva/direct_codegen.py", source)]
+    constants = []
+    functions = []
+    for state in range(automaton.n_states):
+        functions.append("\n".join(_state_function(cg, action, goto_table, pred, state, constants, errors.get(state, ()))))
+
+    # %nonassoc error slots are not expected tokens
+    expected = [tuple(sorted(t for t in action[state] if t not in errors.get(state, ())))
+                for state in range(automaton.n_states)]
+    parts.append(tuple_constant("SYMBOLS", cg.symbols))
+    parts.append(f"N_TERMINALS = {cg.n_terminals}\n")
+    parts.append(tuple_constant("EXPECTED", expected))
+    if constants:
+        parts.append("\n" + "\n".join(constants) + "\n")
+    parts.append("\n" + "\n\n".join(functions) + "\n\n")
+    names = tuple_constant("STATE_FUNCTIONS", [f"_state_{state}" for state in range(automaton.n_states)])
+    parts.append(names.replace("'", ""))  # function names, not strings
+    parts.append(DRIVER)
+    return "".join(parts)
+
+def write_direct_module(grammar_path, module_path, lr1="minimal_lr1"):
+    cg, precedence = load_grammar(grammar_path)
+    selection = select_table(cg, lr1, precedence=precedence)
+    with open(module_path, "w") as f:
+        f.write(generate_direct_module(cg, selection, source=grammar_path))
+    py_compile.compile(module_path)
+    return selection
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python direct_codegen.py grammar.txt parser_module.py")
+        sys.exit(2)
+    selection = write_direct_module(sys.argv[1], sys.argv[2])
+    print(f"✅ Wrote {sys.argv[2]}: {selection.algorithm}, {selection.n_states} states, {len(selection.conflicts)} conflicts")
@@ -0,0 +1,174 @@
+from compiled_grammar import CompiledGrammar, EPSILON
+
+# -------------------------------
+# Nullable, FIRST and FOLLOW for every builder
+# -------------------------------
+#
+# Terminal sets are int bitsets over terminal ids (bit 0 is "$"), so a union
+# is a single "|". FIRST and FOLLOW are both "F(x) = F'(x) plus F(y) for
+# every y that x is related to" problems, which the DeRemer & Pennello
+# digraph algorithm solves in one traversal. Strongly connected components
+# (left recursion, mutually recursive FOLLOWs) end up sharing one set,
+# instead of being swept with "while changed" loops until nothing moves.
+
+def iter_bits(bits):
+    """Terminal ids in a bitset, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+def digraph(initial, relation):
+    """F(x) = initial[x] | F(y) for y in relation[x], for x in 0..n-1.
+
+    Tarjan's SCC walk, written with an explicit stack so grammars with long
+    dependency chains do not hit the recursion limit.
+    """
+    n = len(initial)
+    F = list(initial)
+    depth = [0] * n
+    done = n + 1
+    stack = []
+    for root in range(n):
+        if depth[root]:
+            continue
+        if not relation[root]:
+            depth[root] = done  # a sink is an SCC of its own with F = initial
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        work = [(root, iter(relation[root]), len(stack))]
+        while work:
+            x, edges, d = work[-1]
+            for y in edges:
+                if depth[y] == 0:
+                    if not relation[y]:
+                        depth[y] = done
+                        F[x] |= F[y]
+                        continue
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    work.append((y, iter(relation[y]), len(stack)))
+                    break
+                depth[x] = min(depth[x], depth[y])
+                F[x] |= F[y]
+            else:
+                work.pop()
+                if depth[x] == d:
+                    # x is the root of an SCC: everything above it shares F(x)
+                    while True:
+                        top = stack.pop()
+                        depth[top] = done
+                        F[top] = F[x]
+                        if top == x:
+                            break
+                if work:
+                    parent = work[-1][0]
+                    depth[parent] = min(depth[parent], depth[x])
+                    F[parent] |= F[x]
+    return F
+
+def compute_nullable(cg):
+    """nullable[symbol id] for every symbol, in time linear in the grammar"""
+    nullable = [False] * cg.n_symbols
+    remaining = [len(rhs) for rhs in cg.prod_rhs]
+    uses = [[] for _ in range(cg.n_symbols)]
+    for p, rhs in enumerate(cg.prod_rhs):
+        for s in rhs:
+            uses[s].append(p)
+    work = [cg.prod_lhs[p] for p, n in enumerate(remaining) if n == 0]
+    while work:
+        A = work.pop()
+        if nullable[A]:
+            continue
+        nullable[A] = True
+        for p in uses[A]:
+            remaining[p] -= 1
+            if remaining[p] == 0:
+                work.append(cg.prod_lhs[p])
+    return nullable
+
+def compute_first(cg, nullable):
+    initial = [0] * cg.n_symbols
+    relation = [set() for _ in range(cg.n_symbols)]
+    for t in cg.terminals():
+        initial[t] = 1 << t
+    for lhs, rhs in zip(cg.prod_lhs, cg.prod_rhs):
+        for s in rhs:
+            if cg.is_terminal(s):
+                initial[lhs] |= 1 << s
+                break
+            relation[lhs].add(s)
+            if not nullable[s]:
+                break
+    return digraph(initial, relation)
+
+def compute_follow(cg, nullable, first):
+    initial = [0] * cg.n_symbols
+    relation = [set() for _ in range(cg.n_symbols)]
+    initial[cg.prod_lhs[0]] = 1  # $ follows S'
+    for lhs, rhs in zip(cg.prod_lhs, cg.prod_rhs):
+        trailer, trailer_nullable = 0, True
+        for s in reversed(rhs):
+            if not cg.is_terminal(s):
+                initial[s] |= trailer
+                if trailer_nullable:
+                    relation[s].add(lhs)
+            trailer = first[s] | (trailer if nullable[s] else 0)
+            trailer_nullable = trailer_nullable and nullable[s]
+    return digraph(initial, relation)
+
+class GrammarAnalysis:
+    def __init__(self, cg):
+        self.cg = cg
+        self.nullable = compute_nullable(cg)
+        self.first = compute_first(cg, self.nullable)
+        self.follow = compute_follow(cg, self.nullable, self.first)
+
+        # FIRST of what follows the symbol after the dot, per LR(0) item,
+        # and whether it can vanish; this is what LR(1) closure asks for
+        self.trail_first = [0] * cg.n_items
+        self.trail_nullable = [True] * cg.n_items
+        for p, rhs in enumerate(cg.prod_rhs):
+            base = cg.item_offset[p]
+            trailer, trailer_nullable = 0, True
+            for dot in range(len(rhs) - 1, -1, -1):
+                self.trail_first[base + dot] = trailer
+                self.trail_nullable[base + dot] = trailer_nullable
+                s = rhs[dot]
+                trailer = self.first[s] | (trailer if self.nullable[s] else 0)
+                trailer_nullable = trailer_nullable and self.nullable[s]
+
+    @classmethod
+    def from_strings(cls, grammar, start=None):
+        return cls(CompiledGrammar.from_strings(grammar, start))
+
+    def first_of(self, seq):
+        """(FIRST bitset, all nullable) of a sequence of symbol ids"""
+        bits = 0
+        for s in seq:
+            bits |= self.first[s]
+            if not self.nullable[s]:
+                return bits, False
+        return bits, True
+
+    # -------------------------------
+    # Named views for the string-based scripts
+    # -------------------------------
+
+    def names(self, bits):
+        return {self.cg.symbols[t] for t in iter_bits(bits)}
+
+    def _grammar_nonterminals(self):
+        # every nonterminal except the augmented start CompiledGrammar adds
+        return range(self.cg.n_terminals + 1, self.cg.n_symbols)
+
+    def named_first(self):
+        """{nonterminal: FIRST set}, with ε in it when the nonterminal is nullable"""
+        result = {}
+        for A in self._grammar_nonterminals():
+            result[self.cg.symbols[A]] = self.names(self.first[A]) | ({EPSILON} if self.nullable[A] else set())
+        return result
+
+    def named_follow(self):
+        return {self.cg.symbols[A]: self.names(self.follow[A]) for A in self._grammar_nonterminals()}
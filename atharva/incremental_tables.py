@@ -0,0 +1,1010 @@
+import heapq
+import time
+from collections import OrderedDict, deque
+
+import lr_tables
+from compiled_grammar import END, EPSILON, CompiledGrammar
+from grammar_analysis import GrammarAnalysis, iter_bits
+from lr0_automaton import LR0Automaton
+
+# -------------------------------
+# Incremental LR(0) / SLR(1) / LALR(1) tables across grammar edits
+# -------------------------------
+#
+# IncrementalTables keeps a grammar together with its LR(0) automaton, the
+# analysis its lookaheads need and the ACTION/GOTO table, and edit() adds
+# and removes productions by updating them in place:
+#
+# - Ids are stable. Symbols, productions, items and states are numbered
+#   once (_Grammar below); a symbol is a nonterminal while it has
+#   productions. A state whose kernel is gone frees its id for a later one,
+#   and its row is empty until then.
+# - The changed nonterminals are those whose production list changed. A
+#   state's closure can only change if a nonterminal after a dot in its
+#   kernel reaches a changed one through leftmost symbols (before or after
+#   the edit); by_next finds those states. Only their successors on the
+#   first symbols of the productions their closure gained or lost are
+#   recomputed, worked out once per tuple of symbols after the dots.
+#   Kernels not seen before become new states and are expanded.
+# - States that are no longer reachable are found from the BFS depth each
+#   state keeps: a state that lost an incoming edge, or whose parent at the
+#   depth above went, looks for another predecessor above it; what finds
+#   none and cannot be reattached is dropped (decremental BFS).
+# - Nullable, FIRST and FOLLOW (SLR(1)) are updated for the symbols that
+#   can see a changed one. Each set is a digraph problem, which _Digraph
+#   keeps solved by delete and rederive: bits that lost a source are
+#   withdrawn where they may have spread, then what can be derived again
+#   is propagated, so only nodes whose value can change are visited.
+# - LALR(1) lookaheads are DeRemer & Pennello's (lalr_lookaheads.py), kept
+#   the same way. Read depends only on the state a transition enters, so
+#   it is a digraph over states. Follow is a digraph over transitions
+#   (p, A), whose includes edges and lookbacks come from the states a
+#   kernel item's production started in: its origins, the union of the
+#   predecessors' origins one dot back, updated along the item chains when
+#   predecessors change.
+#   Only the transitions of new states, the changed edges of recomputed
+#   ones, and those whose includes, Read or nullable suffix changed are
+#   set again.
+# - New states get a row. The recomputed ones, and those whose lookaheads
+#   changed (FOLLOW of a reduction's left-hand side for SLR(1), the Follow
+#   of a lookback for LALR(1), the set of terminals for LR(0), which
+#   reduces on all of them), have their row patched: only the terminals
+#   whose shift or lookahead bits changed are resolved again, conflicts
+#   included.
+#
+# So an edit costs what it changes in the automaton and its sets, not the
+# size of the grammar. That includes the lookahead sets: an edit that adds
+# a terminal to FIRST of a symbol that can follow many transitions changes
+# the LALR(1) Follow of each of them, and costs in proportion (see
+# bench_incremental.py). matches_fresh_build() checks the result against a
+# from-scratch build, state for state through the kernels: every edge,
+# row, conflict and (for SLR(1)) FIRST and FOLLOW set. Conflicts are
+# resolved as lr_tables does, the production earlier in the rules winning
+# between reductions, and the reductions of a state are placed in the
+# order the fresh build closes it in, so the same conflicts are recorded.
+
+ALGORITHMS = ("lr0", "slr1", "lalr1")
+
+def fresh_tables(cg, algorithm, analysis=None):
+    """(automaton, (action, goto, conflicts)) built from scratch"""
+    automaton = LR0Automaton(cg)
+    if algorithm == "lr0":
+        return automaton, lr_tables.build_lr0_table(cg, automaton)
+    if algorithm == "slr1":
+        return automaton, lr_tables.build_slr_table(cg, automaton, analysis)
+    return automaton, lr_tables.build_lalr_table(cg, automaton, analysis)
+
+def _rhs(rhs):
+    return tuple(s for s in rhs if s != EPSILON)
+
+class _Grammar:
+    """Symbols, productions and items that keep their ids across edits; the
+    attributes mirror CompiledGrammar's, but removed productions stay
+    numbered (alive[p] is False)"""
+
+    def __init__(self, start):
+        self.symbols = [END, start + "'"]
+        self.symbol_ids = {END: 0}  # the augmented start is not looked up by name
+        self.prods_by_lhs = [[], []]     # live productions, in rule order
+        self.starting_with = [set(), set()]  # live productions by first symbol
+        self.uses = [set(), set()]       # live productions by rhs symbol
+        self.lhs_rank = [0, -1]          # position of the nonterminal in the rules
+        self.empty = set()               # live epsilon productions
+        self.prod_lhs, self.prod_rhs, self.alive = [], [], []
+        self.item_offset, self.item_prod, self.item_dot, self.item_next = [], [], [], []
+
+    @property
+    def n_symbols(self):
+        return len(self.symbols)
+
+    def symbol(self, name):
+        if name not in self.symbol_ids:
+            self.symbol_ids[name] = len(self.symbols)
+            self.symbols.append(name)
+            self.prods_by_lhs.append([])
+            self.starting_with.append(set())
+            self.uses.append(set())
+            self.lhs_rank.append(0)
+        return self.symbol_ids[name]
+
+    def is_nonterminal(self, symbol):
+        return bool(self.prods_by_lhs[symbol])
+
+    def rank(self, prod):
+        """Sorts productions as their numbers in a fresh CompiledGrammar"""
+        return self.lhs_rank[self.prod_lhs[prod]], prod
+
+    def add(self, lhs, rhs):
+        p = len(self.prod_lhs)
+        self.prod_lhs.append(lhs)
+        self.prod_rhs.append(rhs)
+        self.alive.append(True)
+        self.prods_by_lhs[lhs].append(p)
+        if rhs:
+            self.starting_with[rhs[0]].add(p)
+        else:
+            self.empty.add(p)
+        for s in rhs:
+            self.uses[s].add(p)
+        self.item_offset.append(len(self.item_prod))
+        for dot in range(len(rhs) + 1):
+            self.item_prod.append(p)
+            self.item_dot.append(dot)
+            self.item_next.append(rhs[dot] if dot < len(rhs) else -1)
+        return p
+
+    def remove(self, p):
+        rhs = self.prod_rhs[p]
+        self.alive[p] = False
+        self.prods_by_lhs[self.prod_lhs[p]].remove(p)
+        if rhs:
+            self.starting_with[rhs[0]].discard(p)
+        else:
+            self.empty.discard(p)
+        for s in rhs:
+            self.uses[s].discard(p)
+
+    def nullable_from(self, item, nullable):
+        """Whether everything from the dot of item on can vanish"""
+        return all(nullable[s] for s in self.prod_rhs[self.item_prod[item]][self.item_dot[item]:])
+
+    def named_productions(self):
+        return [
+            (self.symbols[lhs], tuple(self.symbols[s] for s in rhs))
+            for lhs, rhs in zip(self.prod_lhs, self.prod_rhs)
+        ]
+
+class _Digraph:
+    """The digraph problem of grammar_analysis kept up to date: F(x) is
+    init[x] | F(y) for y in relation[x]. After set() and remove(), solve()
+    withdraws the bits that lost a source (init bits dropped, the values of
+    relation edges dropped) from the node and, along the users, from those
+    that may have them through it, then works the pending and withdrawn
+    nodes out again and propagates what they gain (delete and rederive).
+    So it costs the nodes whose value can change, not the relation's size."""
+
+    def __init__(self):
+        self.init = {}
+        self.relation = {}
+        self.users = {}  # node -> nodes whose relation holds it
+        self.value = {}
+        self.pending = set()
+        self.lost = {}  # pending node -> bits that lost a source
+
+    def set(self, x, init, relation):
+        old = self.relation.get(x)
+        if old is not None:
+            if init == self.init[x] and relation == old:
+                return
+            lost = self.init[x] & ~init
+            for y in old - relation:
+                lost |= self.value.get(y, 0)
+            if lost:
+                self.lost[x] = self.lost.get(x, 0) | lost
+            for y in old:
+                self.users[y].discard(x)
+        self.init[x] = init
+        self.relation[x] = relation
+        for y in relation:
+            if y in self.users:
+                self.users[y].add(x)
+            else:
+                self.users[y] = {x}
+        self.pending.add(x)
+
+    def remove(self, x):
+        for y in self.relation.pop(x, ()):
+            self.users[y].discard(x)
+        self.init.pop(x, None)
+        self.pending.add(x)
+        self.lost[x] = self.value.get(x, 0)
+
+    def solve(self):
+        """Nodes whose value changed"""
+        value, relation, users = self.value, self.relation, self.users
+        get, users_of = value.get, users.get
+        old = {}
+        withdrawn = {}
+        for x, bits in self.lost.items():
+            bits &= get(x, 0)
+            if bits:
+                withdrawn[x] = bits
+        stack = list(withdrawn.items())
+        while stack:
+            x, bits = stack.pop()
+            for u in users_of(x, ()):
+                lost = bits & get(u, 0) & ~withdrawn.get(u, 0)
+                if lost:
+                    withdrawn[u] = withdrawn.get(u, 0) | lost
+                    stack.append((u, lost))
+        for x, bits in withdrawn.items():
+            old[x] = value[x]
+            value[x] &= ~bits
+
+        work = []
+        for x in self.pending | withdrawn.keys():
+            if x not in relation:
+                if x in value:
+                    old.setdefault(x, value.pop(x))
+                continue
+            bits = self.init[x]
+            for y in relation[x]:
+                bits |= get(y, 0)
+            current = get(x)
+            if current is None:
+                old[x] = None
+                value[x] = bits
+                work.append((x, bits))
+            elif bits & ~current:
+                old.setdefault(x, current)
+                value[x] = current | bits
+                work.append((x, bits & ~current))
+        while work:
+            x, bits = work.pop()
+            for u in users_of(x, ()):
+                current = get(u)
+                if current is not None and bits & ~current:
+                    if u not in old:
+                        old[u] = current
+                    value[u] = current | bits
+                    work.append((u, bits & ~current))
+        self.pending.clear()
+        self.lost.clear()
+        return [x for x, bits in old.items() if x in relation and value[x] != bits]
+
+class IncrementalTables:
+    def __init__(self, rules, start=None, algorithm="lalr1"):
+        """rules as for CompiledGrammar; algorithm is lr0, slr1 or lalr1"""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+        self.algorithm = algorithm
+        self.start = start or next(iter(rules))
+        if self.start not in rules:
+            raise ValueError(f"Start symbol {self.start!r} has no productions")
+        self.rules = OrderedDict()
+        self.grammar = _Grammar(self.start)
+        self._n_ranked = 0
+
+        # Per symbol
+        self.nullable, self.reach, self.by_next, self.sources = [], [], [], []
+        self.nullable_symbols = set()
+        self.first, self.follow = _Digraph(), _Digraph()
+        self.terminal_bits = 1  # "$"
+        self.nonterminal_bits = 0
+        # Per state
+        self.kernels, self.goto, self.preds, self.depth, self.edge_bits = [], [], [], [], []
+        self.reductions, self.action, self.goto_table, self.row_conflicts = [], [], [], []
+        self.row_reductions, self.row_lookaheads = [], []  # what the row was made from
+        self.origins, self.transitions, self.lookback = [], [], []
+        self.state_ids = {}
+        self.free = []
+        self.reducers = {}  # nonterminal -> states reducing one of its productions
+        self.read, self.lalr_follow = _Digraph(), _Digraph()
+        self.looked_back = {}  # transition -> states with a lookback to it
+        self.accept_state = None
+
+        start_id = self.grammar.symbol(self.start)
+        self.last_edit = self.edit(add=[(lhs, rhs) for lhs, prods in rules.items() for rhs in prods],
+                                   _start=[(1, (start_id,))])
+
+    @property
+    def conflicts(self):
+        return [conflict for row in self.row_conflicts for found in row.values() for conflict in found]
+
+    @property
+    def n_states(self):
+        return len(self.state_ids)
+
+    def tables(self):
+        """(action, goto, conflicts) as the lr_tables builders return them,
+        over the ids of self.grammar"""
+        return self.action, self.goto_table, self.conflicts
+
+    def named_tables(self):
+        return lr_tables.named_tables(self.grammar, self.action, self.goto_table)
+
+    # -------------------------------
+    # Edits
+    # -------------------------------
+
+    def add(self, lhs, rhs):
+        return self.edit(add=[(lhs, rhs)])
+
+    def remove(self, lhs, rhs):
+        return self.edit(remove=[(lhs, rhs)])
+
+    def edit(self, add=(), remove=(), _start=()):
+        """Apply (lhs, rhs) removals, then additions; returns the edit's stats"""
+        started = time.perf_counter()
+        g = self.grammar
+        lists = OrderedDict()
+        for lhs, rhs in remove:
+            rhs = _rhs(rhs)
+            prods = lists.setdefault(lhs, list(self.rules.get(lhs, ())))
+            if rhs not in prods:
+                raise ValueError(f"No production {lhs} -> {' '.join(rhs) or EPSILON}")
+            prods.remove(rhs)
+        for lhs, rhs in add:
+            lists.setdefault(lhs, list(self.rules.get(lhs, ()))).append(_rhs(rhs))
+        if not lists.get(self.start, True):
+            raise ValueError(f"Start symbol {self.start!r} has no productions")
+
+        # The first live production with each removed rhs, as list.remove does
+        removed = []
+        for lhs, rhs in remove:
+            ids = tuple(g.symbol_ids[s] for s in _rhs(rhs))
+            removed.append(next(p for p in g.prods_by_lhs[g.symbol_ids[lhs]]
+                                if g.prod_rhs[p] == ids and p not in removed))
+        for lhs, prods in lists.items():
+            if lhs not in self.rules and prods:
+                g.lhs_rank[g.symbol(lhs)] = self._n_ranked
+                self._n_ranked += 1
+            if prods:
+                self.rules[lhs] = prods
+            else:
+                del self.rules[lhs]  # what is left of it is a terminal now
+        added = list(_start) + [(g.symbol(lhs), tuple(g.symbol(s) for s in _rhs(rhs))) for lhs, rhs in add]
+        stats = self._update(removed, added)
+        stats["changed"] = sorted(lists)
+        stats["seconds"] = time.perf_counter() - started
+        self.last_edit = stats
+        return stats
+
+    def matches_fresh_build(self):
+        """Whether automaton, tables, conflicts and the analysis equal a
+        from-scratch build, with states matched through their kernels"""
+        g = self.grammar
+        cg = CompiledGrammar(self.rules, self.start)
+        analysis = GrammarAnalysis(cg)
+        automaton, (action, goto_table, conflicts) = fresh_tables(cg, self.algorithm, analysis)
+
+        symbol_map = {X: cg.symbol_ids[name] for X, name in enumerate(g.symbols)
+                      if X != 1 and name in cg.symbol_ids}
+        symbol_map[1] = cg.symbol_ids[cg.augmented_start]
+        prod_map = {0: 0}
+        for lhs in self.rules:
+            prod_map.update(zip(g.prods_by_lhs[g.symbol_ids[lhs]], cg.prods_by_lhs[cg.symbol_ids[lhs]]))
+        fresh_ids = {kernel: s for s, kernel in enumerate(automaton.kernels)}
+        state_map = {}
+        for s, kernel in enumerate(self.kernels):
+            if kernel is not None:
+                fresh = tuple(sorted(cg.item_offset[prod_map[g.item_prod[i]]] + g.item_dot[i] for i in kernel))
+                state_map[s] = fresh_ids.get(fresh)
+        if None in state_map.values() or len(set(state_map.values())) != automaton.n_states:
+            return False
+
+        def act(a):
+            if a[0] == "shift":
+                return ("shift", state_map[a[1]])
+            return a if a[0] == "accept" else ("reduce", prod_map[a[1]])
+
+        def names(bits):
+            return {g.symbols[t] for t in iter_bits(bits)}
+
+        for s, fresh in state_map.items():
+            if ({symbol_map[X]: state_map[t] for X, t in self.goto[s].items()} != automaton.goto[fresh]
+                    or {symbol_map[t]: act(a) for t, a in self.action[s].items()} != action[fresh]
+                    or {symbol_map[A]: state_map[t] for A, t in self.goto_table[s].items()} != goto_table[fresh]):
+                return False
+        mine = {(state_map[s], symbol_map[t], act(kept), act(dropped)) for s, t, kept, dropped in self.conflicts}
+        if mine != set(conflicts) or len(self.conflicts) != len(conflicts):
+            return False
+        for name in self.rules:
+            X, A = g.symbol_ids[name], cg.symbol_ids[name]
+            if self.nullable[X] != analysis.nullable[A]:
+                return False
+            if self.algorithm == "slr1" and (names(self.first.value[X]) != analysis.names(analysis.first[A])
+                                            or names(self.follow.value[X]) != analysis.names(analysis.follow[A])):
+                return False
+        return True
+
+    # -------------------------------
+    # Updating
+    # -------------------------------
+
+    def _update(self, removed, added):
+        g = self.grammar
+        changed = {g.prod_lhs[p] for p in removed} | {A for A, _ in added}
+        was_nonterminal = {A: g.is_nonterminal(A) for A in changed}
+        dirty = self._left_corner_users(changed)
+        removed_by_lhs, added_by_lhs = {}, {}
+        touched = set(changed)
+        for p in removed:
+            g.remove(p)
+            removed_by_lhs.setdefault(g.prod_lhs[p], []).append(p)
+            touched.update(g.prod_rhs[p])
+        for A, rhs in added:
+            added_by_lhs.setdefault(A, []).append(g.add(A, rhs))
+            touched.update(rhs)
+        while len(self.nullable) < g.n_symbols:
+            self.nullable.append(False)
+            self.reach.append(frozenset())
+            self.by_next.append(set())
+            self.sources.append(set())
+        dirty |= self._left_corner_users(changed)
+        old_reach = {A: self.reach[A] for A in dirty}
+        for A in dirty:
+            self.reach[A] = self._reach(A)
+
+        terminal_bits = self.terminal_bits
+        for X in touched:
+            if X and g.uses[X] and not g.is_nonterminal(X):
+                terminal_bits |= 1 << X
+            elif X:
+                terminal_bits &= ~(1 << X)
+        terminals_changed, self.terminal_bits = terminal_bits != self.terminal_bits, terminal_bits
+        status = {A for A in changed if was_nonterminal[A] != g.is_nonterminal(A)}
+        for A in status:
+            self.nonterminal_bits ^= 1 << A
+        nullable_changed = self._update_nullable(changed)
+        follow_changed = self._update_first_follow(changed, touched, nullable_changed) if self.algorithm == "slr1" else ()
+
+        # The automaton
+        self._closures, self._edge_changes = {}, {}
+        self._edges_added, self._lost, self._pred_changed, new_states = [], [], set(), []
+        recompute = set()
+        for A in dirty:
+            recompute |= self.by_next[A]
+        lost_prods = {A: removed_by_lhs.get(A, []) + added_by_lhs.get(A, []) for A in changed}
+        deltas = {}
+        for s in recompute:
+            kernel = self.kernels[s]
+            if not all(g.alive[g.item_prod[i]] for i in kernel):
+                continue  # holds a removed production: unreachable once its predecessors move on
+            nexts = self._nexts(kernel)
+            affected = deltas.get(nexts)
+            if affected is None:
+                affected = deltas[nexts] = self._affected_symbols(nexts, old_reach, lost_prods, removed_by_lhs)
+            closure, epsilons, _ = self._closure(nexts)
+            for Y in affected:
+                items = [i + 1 for i in kernel if g.item_next[i] == Y]
+                items += [g.item_offset[p] + 1 for p in g.starting_with[Y] if g.prod_lhs[p] in closure]
+                self._retarget(s, Y, tuple(sorted(items)), new_states)
+            self._set_reductions(s, epsilons)
+        if not self.kernels:
+            self._retarget(None, None, (g.item_offset[0],), new_states)
+        queue = deque(new_states)
+        while queue:
+            s = queue.popleft()
+            kernel = self.kernels[s]
+            _, epsilons, buckets = self._closure(self._nexts(kernel))
+            successors = {Y: list(items) for Y, items in buckets.items()}
+            for i in kernel:
+                Y = g.item_next[i]
+                if Y >= 0:
+                    successors.setdefault(Y, []).append(i + 1)
+            n = len(new_states)
+            for Y, items in successors.items():
+                self._retarget(s, Y, tuple(sorted(items)), new_states)
+            queue.extend(new_states[n:])
+            self._set_reductions(s, epsilons)
+        dead = self._collect()
+
+        # Lookaheads and rows. New states get a row; the recomputed ones have
+        # it patched where an edge changed (or moved between ACTION and GOTO),
+        # and so do those whose lookaheads changed
+        new = {s for s in new_states if self.kernels[s] is not None}
+        patches = {}
+        for s in recompute:
+            if self.kernels[s] is not None:
+                patches[s] = self._edge_changes.get(s, set()) | {A for A in status if A in self.goto[s]}
+        if self.algorithm == "lalr1":
+            relooked = self._update_lalr(new, patches, dead, nullable_changed)
+        elif self.algorithm == "slr1":
+            relooked = set()
+            for A in follow_changed:
+                relooked |= self.reducers.get(A, set())
+        else:
+            relooked = set().union(*self.reducers.values()) if terminals_changed else set()
+        for s in new:
+            self._emit_row(s)
+        for s, symbols in patches.items():
+            self._patch_row(s, symbols)
+        relooked -= new | patches.keys()
+        for s in relooked:
+            self._patch_row(s, ())
+        return dict(states=len(self.state_ids), recomputed=len(recompute), added=len(new),
+                    removed=len(dead - set(new_states)), rows=len(new) + len(patches) + len(relooked))
+
+    def _left_corner_users(self, roots):
+        """The nonterminals that reach one of roots through leftmost symbols"""
+        g = self.grammar
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            for p in g.starting_with[stack.pop()]:
+                A = g.prod_lhs[p]
+                if A not in seen:
+                    seen.add(A)
+                    stack.append(A)
+        return seen
+
+    def _reach(self, A):
+        g = self.grammar
+        if not g.is_nonterminal(A):
+            return frozenset()
+        seen = {A}
+        stack = [A]
+        while stack:
+            for p in g.prods_by_lhs[stack.pop()]:
+                rhs = g.prod_rhs[p]
+                if rhs and rhs[0] not in seen and g.is_nonterminal(rhs[0]):
+                    seen.add(rhs[0])
+                    stack.append(rhs[0])
+        return frozenset(seen)
+
+    # -------------------------------
+    # Nullable, FIRST and FOLLOW
+    # -------------------------------
+
+    def _update_nullable(self, changed):
+        """Least fixpoint over the nonterminals that can see a changed one
+        through productions without terminals (before or after the edit);
+        returns those that flipped"""
+        g, nullable = self.grammar, self.nullable
+        seen = set(changed)
+        stack = list(changed)
+        while stack:
+            for p in g.uses[stack.pop()]:
+                A = g.prod_lhs[p]
+                if A not in seen and all(s in changed or g.is_nonterminal(s) for s in g.prod_rhs[p]):
+                    seen.add(A)
+                    stack.append(A)
+        old = {A: nullable[A] for A in seen}
+        for A in seen:
+            nullable[A] = False
+        work = [A for A in seen for p in g.prods_by_lhs[A] if all(nullable[s] for s in g.prod_rhs[p])]
+        while work:
+            A = work.pop()
+            if nullable[A]:
+                continue
+            nullable[A] = True
+            for p in g.uses[A]:
+                B = g.prod_lhs[p]
+                if B in seen and not nullable[B] and all(nullable[s] for s in g.prod_rhs[p]):
+                    work.append(B)
+        flipped = {A for A in seen if nullable[A] != old[A]}
+        for A in flipped:
+            if nullable[A]:
+                self.nullable_symbols.add(A)
+            else:
+                self.nullable_symbols.discard(A)
+        return flipped
+
+    def _update_first_follow(self, changed, touched, nullable_changed):
+        """Returns the symbols whose FOLLOW changed"""
+        g, nullable = self.grammar, self.nullable
+        nodes = set(touched)
+        for X in nullable_changed:
+            nodes.update(g.prod_lhs[p] for p in g.uses[X])
+        for X in nodes:
+            if not g.is_nonterminal(X):
+                self.first.set(X, 1 << X, frozenset())
+                continue
+            relation = set()
+            for p in g.prods_by_lhs[X]:
+                for s in g.prod_rhs[p]:
+                    relation.add(s)
+                    if not nullable[s]:
+                        break
+            self.first.set(X, 0, frozenset(relation))
+        first_changed = self.first.solve()
+
+        # FOLLOW(B) is read off B's occurrences, so it is redone for the
+        # symbols of changed productions and for those in front of a symbol
+        # whose FIRST or nullability changed
+        nodes = set(touched)
+        for X in set(first_changed) | nullable_changed:
+            for p in g.uses[X]:
+                rhs = g.prod_rhs[p]
+                nodes.update(rhs[:max(k for k, s in enumerate(rhs) if s == X)])
+        first = self.first.value
+        for B in nodes:
+            init, relation = (1 if B == 1 else 0), set()
+            if g.is_nonterminal(B):
+                for p in g.uses[B]:
+                    rhs = g.prod_rhs[p]
+                    for k, s in enumerate(rhs):
+                        if s != B:
+                            continue
+                        for s in rhs[k + 1:]:
+                            init |= first[s]
+                            if not nullable[s]:
+                                break
+                        else:
+                            relation.add(g.prod_lhs[p])
+            self.follow.set(B, init, frozenset(relation))
+        return self.follow.solve()
+
+    # -------------------------------
+    # States
+    # -------------------------------
+
+    def _nexts(self, kernel):
+        """The symbols after the dots, in the order a fresh build closes the kernel in"""
+        g = self.grammar
+        items = sorted(kernel, key=lambda i: (g.lhs_rank[g.prod_lhs[g.item_prod[i]]], i))
+        return tuple(dict.fromkeys(g.item_next[i] for i in items if g.item_next[i] >= 0))
+
+    def _closure(self, nexts):
+        """(closure nonterminals, epsilon productions in closure order, dot-0
+        items advanced, by symbol) of a kernel, for the current edit"""
+        result = self._closures.get(nexts)
+        if result is None:
+            g = self.grammar
+            reaches = [self.reach[s] for s in nexts]
+            closure = frozenset().union(*reaches)
+            buckets = {}
+            for B in closure:
+                for p in g.prods_by_lhs[B]:
+                    rhs = g.prod_rhs[p]
+                    if rhs:
+                        buckets.setdefault(rhs[0], []).append(g.item_offset[p] + 1)
+            # A fresh closure adds the reach of each symbol after a dot in
+            # turn, and each reach by nonterminal id
+            epsilons = [p for p in g.empty if g.prod_lhs[p] in closure]
+            epsilons.sort(key=lambda p: (next(k for k, reach in enumerate(reaches) if g.prod_lhs[p] in reach), g.rank(p)))
+            result = self._closures[nexts] = (closure, tuple(epsilons), buckets)
+        return result
+
+    def _affected_symbols(self, nexts, old_reach, lost_prods, removed_by_lhs):
+        """First symbols of the productions the closure gained or lost"""
+        g = self.grammar
+        closure = self._closure(nexts)[0]
+        old_closure = frozenset().union(*(old_reach.get(s, self.reach[s]) for s in nexts))
+        prods = []
+        for B in closure ^ old_closure:
+            prods += g.prods_by_lhs[B] + removed_by_lhs.get(B, [])
+        for B in closure & old_closure:
+            prods += lost_prods.get(B, ())
+        return {g.prod_rhs[p][0] for p in prods if g.prod_rhs[p]}
+
+    def _retarget(self, s, Y, kernel, new_states):
+        """Point s's edge on Y at the state with kernel (none if empty),
+        making that state if it is new"""
+        target = self.state_ids.get(kernel) if kernel else None
+        if target is None and kernel:
+            target = self.free.pop() if self.free else len(self.kernels)
+            if target == len(self.kernels):
+                for column in (self.kernels, self.goto, self.preds, self.depth, self.edge_bits, self.reductions,
+                               self.action, self.goto_table, self.row_conflicts, self.row_reductions,
+                               self.row_lookaheads, self.origins, self.transitions, self.lookback):
+                    column.append(None)
+            self.state_ids[kernel] = target
+            self.kernels[target] = kernel
+            self.goto[target], self.preds[target], self.edge_bits[target] = {}, set(), 0
+            self.depth[target] = 0 if s is None else self.depth[s] + 1
+            self.reductions[target], self.origins[target], self.transitions[target] = (), {}, set()
+            self.action[target], self.goto_table[target], self.row_conflicts[target] = {}, {}, {}
+            self.row_reductions[target], self.row_lookaheads[target], self.lookback[target] = (), (), ()
+            for i in kernel:
+                if self.grammar.item_next[i] >= 0:
+                    self.by_next[self.grammar.item_next[i]].add(target)
+            new_states.append(target)
+        if s is None:
+            return
+        edges = self.goto[s]
+        old = edges.get(Y)
+        if old == target:
+            return
+        if old is not None:
+            self.preds[old].discard(s)
+            self._pred_changed.add(old)
+            self._lost.append(old)
+        if target is None:
+            del edges[Y]
+            self.sources[Y].discard(s)
+            self.edge_bits[s] &= ~(1 << Y)
+        else:
+            edges[Y] = target
+            self.sources[Y].add(s)
+            self.preds[target].add(s)
+            self.edge_bits[s] |= 1 << Y
+            self._pred_changed.add(target)
+            self._edges_added.append((s, target))
+        self._edge_changes.setdefault(s, set()).add(Y)
+
+    def _set_reductions(self, s, epsilons):
+        g = self.grammar
+        kernel = sorted(self.kernels[s], key=lambda i: g.rank(g.item_prod[i]))
+        reductions = tuple(g.item_prod[i] for i in kernel if g.item_next[i] < 0) + epsilons
+        for p in self.reductions[s]:
+            self.reducers[g.prod_lhs[p]].discard(s)
+        for p in reductions:
+            self.reducers.setdefault(g.prod_lhs[p], set()).add(s)
+        self.reductions[s] = reductions
+
+    def _collect(self):
+        """Drop the states no longer reachable from state 0 and fix up the
+        depths; returns the dropped ones"""
+        depth, preds, goto = self.depth, self.preds, self.goto
+        heap = [(depth[s], s) for s in set(self._lost) if self.kernels[s] is not None]
+        self._lost = []
+        heapq.heapify(heap)
+        lost = set()
+        while heap:
+            d, s = heapq.heappop(heap)
+            if s in lost or s == 0 or any(depth[p] < d and p not in lost for p in preds[s]):
+                continue
+            lost.add(s)
+            for t in goto[s].values():
+                if depth[t] == d + 1 and t not in lost:
+                    heapq.heappush(heap, (d + 1, t))
+        heap = []
+        for s in lost:
+            above = [depth[p] for p in preds[s] if p not in lost]
+            if above:
+                heap.append((min(above) + 1, s))
+        heapq.heapify(heap)
+        while heap:
+            d, s = heapq.heappop(heap)
+            if s in lost:
+                lost.discard(s)
+                depth[s] = d
+                for t in goto[s].values():
+                    if t in lost:
+                        heapq.heappush(heap, (d + 1, t))
+        for s in lost:
+            self._drop(s)
+
+        heap = [(depth[s] + 1, t) for s, t in self._edges_added
+                if self.kernels[s] is not None and self.kernels[t] is not None and depth[s] + 1 < depth[t]]
+        heapq.heapify(heap)
+        while heap:
+            d, s = heapq.heappop(heap)
+            if d < depth[s]:
+                depth[s] = d
+                for t in goto[s].values():
+                    if d + 1 < depth[t]:
+                        heapq.heappush(heap, (d + 1, t))
+        return lost
+
+    def _drop(self, s):
+        g = self.grammar
+        for Y, t in self.goto[s].items():
+            self.preds[t].discard(s)
+            self._pred_changed.add(t)
+            self.sources[Y].discard(s)
+        for i in self.kernels[s]:
+            if g.item_next[i] >= 0:
+                self.by_next[g.item_next[i]].discard(s)
+        for p in self.reductions[s]:
+            self.reducers[g.prod_lhs[p]].discard(s)
+        del self.state_ids[self.kernels[s]]
+        self.kernels[s] = None
+        self.goto[s], self.preds[s], self.edge_bits[s], self.reductions[s] = {}, set(), 0, ()
+        self.action[s], self.goto_table[s], self.row_conflicts[s] = {}, {}, {}
+        self.row_reductions[s], self.row_lookaheads[s] = (), ()
+        self.free.append(s)
+
+    # -------------------------------
+    # LALR(1) lookaheads
+    # -------------------------------
+
+    def _update_lalr(self, new, patches, dead, nullable_changed):
+        """Update Read, origins, Follow and lookbacks; returns the states
+        whose lookbacks or lookaheads changed"""
+        g, goto = self.grammar, self.goto
+        for s in dead:
+            self.read.remove(s)
+            for A in self.transitions[s]:
+                self.lalr_follow.remove((s, A))
+            self._set_lookback(s, ())
+            self.origins[s], self.transitions[s] = {}, set()
+        reads = new | patches.keys()
+        for X in nullable_changed:
+            reads |= self.sources[X]
+        accept_state = goto[0].get(g.prod_rhs[0][0])
+        if accept_state != self.accept_state:
+            reads.update(s for s in (accept_state, self.accept_state) if s is not None and self.kernels[s] is not None)
+            self.accept_state = accept_state
+        for r in reads:
+            self.read.set(r, self._direct_reads(r), self._nullable_targets(r))
+        read_changed = self.read.solve()
+
+        # Origins, along the item chains from the states whose predecessors changed
+        origins_changed = set()
+        pred_changed = {s for s in self._pred_changed if self.kernels[s] is not None}
+        queue, queued = deque(pred_changed), set(pred_changed)
+        while queue:
+            s = queue.popleft()
+            queued.discard(s)
+            origins = {}
+            for i in self.kernels[s]:
+                if g.item_dot[i] >= 2:
+                    found = set()
+                    for q in self.preds[s]:
+                        found |= self.preds[q] if g.item_dot[i] == 2 else self.origins[q].get(i - 1, set())
+                    origins[i] = found
+            if origins != self.origins[s] or s in pred_changed:
+                pred_changed.discard(s)
+                self.origins[s] = origins
+                origins_changed.add(s)
+                for i in self.kernels[s]:
+                    t = goto[s].get(g.item_next[i])
+                    if t is not None and t not in queued and g.item_dot[i]:
+                        queue.append(t)
+                        queued.add(t)
+
+        # The transitions whose Follow inputs may have changed, by state: the
+        # edges of new states and the changed edges of recomputed ones, those
+        # whose includes come from kernel items with other origins, those
+        # entering a state whose Read changed, and those in front of a
+        # symbol whose nullability changed
+        refresh = {s: set(goto[s]) for s in new}
+        for s, symbols in patches.items():
+            refresh[s] = set(symbols)
+        for s in origins_changed:
+            refresh.setdefault(s, set()).update(
+                g.item_next[i] for i in self.kernels[s] if g.item_dot[i] and g.item_next[i] >= 0)
+        for r in read_changed:
+            if r:
+                i = self.kernels[r][0]
+                A = g.prod_rhs[g.item_prod[i]][g.item_dot[i] - 1]  # the symbol r is entered on
+                for p in self.preds[r]:
+                    refresh.setdefault(p, set()).add(A)
+        for X in nullable_changed:
+            for p in g.uses[X]:
+                rhs = g.prod_rhs[p]
+                for A in rhs[:max(k for k, s in enumerate(rhs) if s == X)]:
+                    for s in self.sources[A]:
+                        refresh.setdefault(s, set()).add(A)
+        follow = self.lalr_follow
+        for s, symbols in refresh.items():
+            closure, transitions = None, self.transitions[s]
+            for A in symbols:
+                if A in goto[s] and g.is_nonterminal(A):
+                    if closure is None:
+                        closure = self._closure(self._nexts(self.kernels[s]))[0]
+                    transitions.add(A)
+                    follow.set((s, A), self.read.value[goto[s][A]], self._includes(s, A, closure))
+                elif A in transitions:
+                    transitions.discard(A)
+                    follow.remove((s, A))
+        follow_changed = follow.solve()
+
+        rows = set()
+        for s in new | patches.keys() | origins_changed:
+            lookbacks = self._lookbacks(s)
+            if lookbacks != self.lookback[s]:
+                self._set_lookback(s, lookbacks)
+                rows.add(s)
+        for t in follow_changed:
+            rows |= self.looked_back.get(t, set())
+        return rows
+
+    def _direct_reads(self, r):
+        bits = self.edge_bits[r] & ~self.nonterminal_bits
+        return bits | 1 if r == self.accept_state else bits  # $ after S
+
+    def _nullable_targets(self, r):
+        """The states r reaches on a nullable nonterminal"""
+        edges = self.goto[r]
+        if len(self.nullable_symbols) < len(edges):
+            return frozenset(edges[C] for C in self.nullable_symbols if C in edges)
+        return frozenset(t for C, t in edges.items() if C in self.nullable_symbols)
+
+    def _origins(self, s, item):
+        """States the production of a kernel item was started in"""
+        return self.preds[s] if self.grammar.item_dot[item] == 1 else self.origins[s][item]
+
+    def _includes(self, s, A, closure):
+        """The transitions (s, A) includes, closure being the closure nonterminals of s"""
+        g = self.grammar
+        targets = set()
+        for i in self.kernels[s]:
+            if g.item_next[i] == A and g.item_dot[i] and g.nullable_from(i + 1, self.nullable):
+                B = g.prod_lhs[g.item_prod[i]]
+                targets.update((q, B) for q in self._origins(s, i))
+        for p in g.starting_with[A]:
+            B = g.prod_lhs[p]
+            if B in closure and g.nullable_from(g.item_offset[p] + 1, self.nullable):
+                targets.add((s, B))
+        return frozenset(targets)
+
+    def _lookbacks(self, s):
+        g = self.grammar
+        lookbacks = []
+        for p in self.reductions[s]:
+            B, n = g.prod_lhs[p], len(g.prod_rhs[p])
+            if p == 0:
+                lookbacks.append(())
+            elif n == 0:
+                lookbacks.append(((s, B),))
+            else:
+                lookbacks.append(tuple((q, B) for q in self._origins(s, g.item_offset[p] + n)))
+        return tuple(lookbacks)
+
+    def _set_lookback(self, s, lookbacks):
+        for transitions in self.lookback[s] or ():
+            for t in transitions:
+                self.looked_back[t].discard(s)
+        for transitions in lookbacks:
+            for t in transitions:
+                self.looked_back.setdefault(t, set()).add(s)
+        self.lookback[s] = lookbacks
+
+    # -------------------------------
+    # Rows
+    # -------------------------------
+
+    def _lookaheads(self, s):
+        g = self.grammar
+        if self.algorithm == "lr0":
+            return [1 if p == 0 else self.terminal_bits for p in self.reductions[s]]
+        if self.algorithm == "slr1":
+            return [self.follow.value[g.prod_lhs[p]] for p in self.reductions[s]]
+        value = self.lalr_follow.value
+        result = []
+        for p, transitions in zip(self.reductions[s], self.lookback[s]):
+            bits = 1 if p == 0 else 0
+            for t in transitions:
+                bits |= value[t]
+            result.append(bits)
+        return result
+
+    def _emit_row(self, s, lookaheads=None):
+        """The state's row, through the conflict policy of lr_tables with
+        productions ranked by their place in the rules"""
+        g = self.grammar
+        lookaheads = tuple(self._lookaheads(s)) if lookaheads is None else lookaheads
+        row, gotos, conflicts = {}, {}, {}
+        for Y, t in self.goto[s].items():
+            if g.is_nonterminal(Y):
+                gotos[Y] = t
+            else:
+                row[Y] = ("shift", t)
+        for p, bits in zip(self.reductions[s], lookaheads):
+            action = ("accept",) if p == 0 else ("reduce", p)
+            for terminal in iter_bits(bits):
+                current = row.get(terminal)
+                if current is None or current == action:
+                    row[terminal] = action
+                elif current[0] != "reduce" or g.rank(current[1]) < g.rank(p):
+                    conflicts.setdefault(terminal, []).append((s, terminal, current, action))
+                else:
+                    conflicts.setdefault(terminal, []).append((s, terminal, action, current))
+                    row[terminal] = action
+        self.action[s], self.goto_table[s], self.row_conflicts[s] = row, gotos, conflicts
+        self.row_reductions[s], self.row_lookaheads[s] = self.reductions[s], lookaheads
+
+    def _patch_row(self, s, symbols):
+        """Bring the row of s up to date after its edges on symbols or its
+        lookaheads changed, resolving only the terminals involved"""
+        lookaheads = tuple(self._lookaheads(s))
+        if self.row_reductions[s] != self.reductions[s]:
+            return self._emit_row(s, lookaheads)
+        g, edges, gotos = self.grammar, self.goto[s], self.goto_table[s]
+        terminals = 0
+        for Y in symbols:
+            if Y in edges and g.is_nonterminal(Y):
+                gotos[Y] = edges[Y]
+            else:
+                gotos.pop(Y, None)
+            terminals |= 1 << Y  # it may have been a terminal before
+        for before, after in zip(self.row_lookaheads[s], lookaheads):
+            terminals |= before ^ after
+        row, conflicts = self.action[s], self.row_conflicts[s]
+        for terminal in iter_bits(terminals):
+            current = ("shift", edges[terminal]) if terminal in edges and not g.is_nonterminal(terminal) else None
+            found = []
+            for p, bits in zip(self.reductions[s], lookaheads):
+                if not bits >> terminal & 1:
+                    continue
+                action = ("accept",) if p == 0 else ("reduce", p)
+                if current is None:
+                    current = action
+                elif current[0] != "reduce" or g.rank(current[1]) < g.rank(p):
+                    found.append((s, terminal, current, action))
+                else:
+                    found.append((s, terminal, action, current))
+                    current = action
+            if current is None:
+                row.pop(terminal, None)
+            else:
+                row[terminal] = current
+            if found:
+                conflicts[terminal] = found
+            else:
+                conflicts.pop(terminal, None)
+        self.row_lookaheads[s] = lookaheads
@@ -2,6 +2,8 @@
 from collections import defaultdict, deque
 from copy import deepcopy
 
+from grammar_analysis import GrammarAnalysis
+
 # -------------------------------
 # 1. Input Grammar & Augmentation
 # -------------------------------
@@ -20,67 +22,18 @@ grammar.update(raw_grammar)
 # 2. Utility Functions
 # -------------------------------
 
-def first(grammar, symbol, memo=None):
-    if memo is None:
-        memo = {}
-    if symbol in memo:
-        return memo[symbol]
-    if not symbol.isupper():
-        return {symbol}
-    result = set()
-    for prod in grammar[symbol]:
-        if not prod:
-            result.add('ε')
-        else:
-            for char in prod:
-                sub_first = first(grammar, char, memo)
-                result.update(sub_first - {'ε'})
-                if 'ε' not in sub_first:
-                    break
-            else:
-                result.add('ε')
-    memo[symbol] = result
-    return result
+def compute_first(grammar):
+    return GrammarAnalysis.from_strings(grammar).named_first()
 
 def compute_follow(grammar, start_symbol):
-    follow = defaultdict(set)
-    follow[start_symbol].add("$")
-    changed = True
-    while changed:
-        changed = False
-        for lhs, prods in grammar.items():
-            for prod in prods:
-                for i, symbol in enumerate(prod):
-                    if symbol.isupper():
-                        trailer = set()
-                        beta = prod[i + 1:]
-                        if beta:
-                            for b in beta:
-                                if b.isupper():
-                                    trailer.update(first(grammar, b))
-                                    if 'ε' not in first(grammar, b):
-                                        break
-                                else:
-                                    trailer.add(b)
-                                    break
-                            else:
-                                trailer.add('ε')
-                        else:
-                            trailer.add('ε')
-                        trailer.discard('ε')
-                        old_len = len(follow[symbol])
-                        follow[symbol].update(trailer)
-                        if 'ε' in trailer or not beta:
-                            follow[symbol].update(follow[lhs])
-                        if len(follow[symbol]) > old_len:
-                            changed = True
-    return follow
+    analysis = GrammarAnalysis.from_strings(grammar, start_symbol)
+    return defaultdict(set, analysis.named_follow())
 
 # -------------------------------
 # 3. Closure and GOTO with Lookahead
 # -------------------------------
 
-def closure_lr1(items, grammar):
+def closure_lr1(items, grammar, first):
     closure_set = set(items)
     queue = deque(items)
 
@@ -94,8 +47,9 @@ def closure_lr1(items, grammar):
             if beta:
                 first_beta = set()
                 for b in beta:
-                    first_beta |= first(grammar, b)
-                    if 'ε' not in first(grammar, b):
+                    first_b = first[b] if b.isupper() else {b}
+                    first_beta |= first_b
+                    if 'ε' not in first_b:
                         break
                 else:
                     first_beta.add(lookahead)
@@ -113,21 +67,22 @@ def closure_lr1(items, grammar):
                             queue.append(item)
     return frozenset(closure_set)
 
-def goto_lr1(item_set, symbol, grammar):
+def goto_lr1(item_set, symbol, grammar, first):
     moved_items = []
     for lhs, rhs, la in item_set:
         dot_pos = rhs.find(".")
         if dot_pos < len(rhs) - 1 and rhs[dot_pos + 1] == symbol:
             new_rhs = rhs[:dot_pos] + symbol + "." + rhs[dot_pos + 2:]
             moved_items.append((lhs, new_rhs, la))
-    return closure_lr1(moved_items, grammar) if moved_items else None
+    return closure_lr1(moved_items, grammar, first) if moved_items else None
 
 # -------------------------------
 # 4. Build LALR(1) Canonical Collection
 # -------------------------------
 
-def build_lalr1_states(grammar, start_symbol):
-    initial = closure_lr1([(start_symbol, "." + grammar[start_symbol][0], "$")], grammar)
+def build_lalr1_states(grammar, start_symbol, budget=None):
+    first = compute_first(grammar)
+    initial = closure_lr1([(start_symbol, "." + grammar[start_symbol][0], "$")], grammar, first)
     C = [initial]
     transitions = dict()
     state_ids = {initial: 0}
@@ -139,15 +94,22 @@ def build_lalr1_states(grammar, start_symbol):
             symbols.update(prod)
     symbols.update(grammar.keys())
 
+    if budget:
+        budget.start()
+    items = sum(len(state) for state in C)
+
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
-            next_state = goto_lr1(current, symbol, grammar)
+        for symbol in sorted(symbols):
+            next_state = goto_lr1(current, symbol, grammar, first)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(C)
                 C.append(next_state)
                 queue.append(next_state)
+                items += len(next_state)
+                if budget:
+                    budget.check_build(len(C), items, len(queue))
             if next_state:
                 transitions[(current_id, symbol)] = state_ids[next_state]
 
@@ -217,7 +179,7 @@ def build_lalr_parsing_table(states, transitions, grammar, augmented_start):
 # 6. Simulate Shift/Reduce Parsing
 # -------------------------------
 
-def simulate_parsing(input_string, ACTION, GOTO, productions):
+def simulate_parsing(input_string, ACTION, GOTO, productions, verbose=True, budget=None, trace=True):
     input_tokens = input_string.strip().split() + ["$"]
     stack = [0]
     steps = []
@@ -225,19 +187,27 @@ def simulate_parsing(input_string, ACTION, GOTO, productions):
     idx = 0
     step = 1
 
+    if budget:
+        budget.start()
+
     while True:
+        if budget:
+            budget.check_step(step, idx, len(stack))
         current_state = stack[-1]
         current_token = input_tokens[idx]
 
         action = ACTION.get(current_state, {}).get(current_token)
 
-        stack_repr = ' '.join(str(s) for s in stack)
-        input_repr = ' '.join(input_tokens[idx:])
-        action_repr = str(action) if action else "ERROR"
-        steps.append((step, stack_repr, input_repr, action_repr))
+        if trace:
+            stack_repr = ' '.join(str(s) for s in stack)
+            input_repr = ' '.join(input_tokens[idx:])
+            action_repr = str(action) if action else "ERROR"
+            steps.append((step, stack_repr, input_repr, action_repr))
 
         if not action:
-            print("\n🚫 Parsing Error! String rejected.\n")
+            accepted = False
+            if verbose:
+                print("\n🚫 Parsing Error! String rejected.\n")
             break
 
         if action[0] == "shift":
@@ -256,46 +226,53 @@ def simulate_parsing(input_string, ACTION, GOTO, productions):
             stack.append(GOTO[top_state][lhs])
 
         elif action[0] == "accept":
-            print("\n✅ String accepted by the grammar!\n")
+            accepted = True
+            if verbose:
+                print("\n✅ String accepted by the grammar!\n")
             break
 
         step += 1
 
-    print("\n=== PARSING STEPS ===")
-    print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
-    print("-" * 70)
-    for s in steps:
-        print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+    if verbose and trace:
+        print("\n=== PARSING STEPS ===")
+        print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
+        print("-" * 70)
+        for s in steps:
+            print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+
+    # Without trace, only the number of steps is kept
+    return accepted, steps if trace else step
 
 # -------------------------------
 # 7. Run Everything
 # -------------------------------
 
-states, transitions = build_lalr1_states(grammar, augmented_start)
-follow = compute_follow(grammar, start_symbol)
-ACTION, GOTO, productions = build_lalr_parsing_table(states, transitions, grammar, augmented_start)
-
-# Print item sets
-for i, state in enumerate(states):
-    print(f"\nItem Set I{i}:")
-    for lhs, rhs, la in sorted(state):
-        print(f"  {lhs} -> {rhs}, {la}")
-
-# Print parsing tables
-print("\n=== ACTION TABLE ===")
-for state in sorted(ACTION):
-    for symbol in sorted(ACTION[state]):
-        print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
-
-print("\n=== GOTO TABLE ===")
-for state in sorted(GOTO):
-    for symbol in sorted(GOTO[state]):
-        print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
-
-print("\n=== PRODUCTIONS ===")
-for i, (lhs, rhs) in enumerate(productions):
-    print(f"{i}: {lhs} → {rhs}")
-
-# Try parsing
-test_string = "c d d"
-simulate_parsing(test_string, ACTION, GOTO, productions)
+if __name__ == "__main__":
+    states, transitions = build_lalr1_states(grammar, augmented_start)
+    follow = compute_follow(grammar, start_symbol)
+    ACTION, GOTO, productions = build_lalr_parsing_table(states, transitions, grammar, augmented_start)
+
+    # Print item sets
+    for i, state in enumerate(states):
+        print(f"\nItem Set I{i}:")
+        for lhs, rhs, la in sorted(state):
+            print(f"  {lhs} -> {rhs}, {la}")
+
+    # Print parsing tables
+    print("\n=== ACTION TABLE ===")
+    for state in sorted(ACTION):
+        for symbol in sorted(ACTION[state]):
+            print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
+
+    print("\n=== GOTO TABLE ===")
+    for state in sorted(GOTO):
+        for symbol in sorted(GOTO[state]):
+            print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
+
+    print("\n=== PRODUCTIONS ===")
+    for i, (lhs, rhs) in enumerate(productions):
+        print(f"{i}: {lhs} → {rhs}")
+
+    # Try parsing
+    test_string = "c d d"
+    simulate_parsing(test_string, ACTION, GOTO, productions)
@@ -0,0 +1,119 @@
+from grammar_analysis import GrammarAnalysis, digraph
+
+# -------------------------------
+# LALR(1) lookaheads on the LR(0) automaton (DeRemer & Pennello)
+# -------------------------------
+#
+# Instead of building the canonical LR(1) collection and merging states
+# with equal cores, the lookaheads are computed directly on the LR(0)
+# automaton from relations between its nonterminal transitions (p, A):
+#
+#   DR(p, A)     terminals shifted right after goto(p, A)
+#   reads        (p, A) reads (r, C) if r = goto(p, A) and C is nullable
+#   includes     (p, A) includes (p', B) if B -> b A g, g is nullable and
+#                p' reaches p by reading b
+#   lookback     a reduction by B -> w in state q looks back to (p', B)
+#                if p' reaches q by reading w
+#
+#   Read = digraph(DR, reads), Follow = digraph(Read, includes) and
+#   LA(q, B -> w) is the union of Follow over its lookbacks.
+#
+# Production 0 (S' -> S) has no transition to look back to; its lookahead
+# is "$", which is seeded into DR(0, S) so that it flows into everything
+# that can end a sentence.
+
+class LALRLookaheads:
+    def __init__(self, cg, automaton, analysis=None):
+        self.cg = cg
+        self.automaton = automaton
+        self.analysis = analysis or GrammarAnalysis(cg)
+
+        # Number the nonterminal transitions, and index them by state so
+        # the relations below find (state, A) with two list/dict lookups
+        self.transitions = []  # index -> (state, nonterminal)
+        self.by_state = [dict() for _ in automaton.goto]  # state -> {nonterminal: index}
+        for state, edges in enumerate(automaton.goto):
+            ids = self.by_state[state]
+            for symbol in sorted(edges):
+                if symbol >= cg.n_terminals:
+                    ids[symbol] = len(self.transitions)
+                    self.transitions.append((state, symbol))
+
+        read = digraph(self._direct_reads(), self._reads())
+        includes, self.lookback = self._includes_and_lookback()
+        self.follow = digraph(read, includes)
+
+    def _direct_reads(self):
+        goto, n_terminals = self.automaton.goto, self.cg.n_terminals
+        dr = []
+        for state, A in self.transitions:
+            bits = 0
+            for symbol in goto[goto[state][A]]:
+                if symbol < n_terminals:
+                    bits |= 1 << symbol
+            dr.append(bits)
+        dr[self.by_state[0][self.cg.prod_rhs[0][0]]] |= 1  # $ after S
+        return dr
+
+    def _reads(self):
+        goto, by_state = self.automaton.goto, self.by_state
+        nullable = [C for C in range(self.cg.n_terminals, self.cg.n_symbols) if self.analysis.nullable[C]]
+        relation = []
+        for state, A in self.transitions:
+            ids = by_state[goto[state][A]]
+            relation.append([ids[C] for C in nullable if C in ids])
+        return relation
+
+    def _includes_and_lookback(self):
+        cg, goto, by_state = self.cg, self.automaton.goto, self.by_state
+        n_terminals, trail_nullable = cg.n_terminals, self.analysis.trail_nullable
+        n_productions = cg.n_productions
+        # Per production, the rhs and whether each position can be an
+        # includes target (a nonterminal followed by something nullable)
+        shapes = [
+            (rhs, [symbol >= n_terminals and trail_nullable[cg.item_offset[p] + k] for k, symbol in enumerate(rhs)])
+            for p, rhs in enumerate(cg.prod_rhs)
+        ]
+        # Reading B -> X w from different states p' usually reaches the same
+        # state after X (every statement start goes to one "kw . E ;"), so
+        # the walk over w is done once per (goto(p', X), production): its
+        # end state and the transitions it passes that are includes targets
+        suffixes = {}
+        includes = [[] for _ in self.transitions]
+        lookback = [dict() for _ in goto]  # state -> {production: transition indices}
+        for t, (start, B) in enumerate(self.transitions):
+            for p in cg.prods_by_lhs[B]:
+                rhs, targets = shapes[p]
+                if not rhs:
+                    state = start
+                else:
+                    if targets[0]:
+                        includes[by_state[start][rhs[0]]].append(t)
+                    after = goto[start][rhs[0]]
+                    key = after * n_productions + p
+                    walked = suffixes.get(key)
+                    if walked is None:
+                        state, passed = after, []
+                        for k in range(1, len(rhs)):
+                            if targets[k]:
+                                passed.append(by_state[state][rhs[k]])
+                            state = goto[state][rhs[k]]
+                        walked = suffixes[key] = (state, passed)
+                    state, passed = walked
+                    for u in passed:
+                        includes[u].append(t)
+                back = lookback[state]
+                if p in back:
+                    back[p].append(t)
+                else:
+                    back[p] = [t]
+        return includes, lookback
+
+    def lookaheads(self, state, prod):
+        """Bitset of terminals on which state reduces by prod"""
+        if prod == 0:
+            return 1
+        bits = 0
+        for t in self.lookback[state].get(prod, ()):
+            bits |= self.follow[t]
+        return bits
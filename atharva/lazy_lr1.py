@@ -0,0 +1,197 @@
+import hashlib
+import os
+import pickle
+
+from grammar_analysis import GrammarAnalysis, iter_bits
+from lr1_automaton import closure_edges, closure_lr1, successors
+from lr_tables import set_action
+
+# -------------------------------
+# Lazy canonical LR(1) automaton
+# -------------------------------
+#
+# Builds CLR(1) states while parsing instead of up front. A state is known
+# by its kernel as soon as some expanded state has a transition to it, but
+# its closure, successors and ACTION/GOTO rows are only computed the first
+# time a driver asks for its row, and are memoized from then on. Only the
+# nullable/FIRST analysis is global, so a parse costs the states its input
+# actually passes through.
+#
+# LALR(1) and minimal LR(1) cannot be built this way, since their
+# lookaheads depend on states the input may never reach.
+#
+# With cache_path, the discovered states and their rows are pickled by
+# save() and picked up again by the next LazyLR1 for the same grammar, so
+# later runs start warm. Rows use the lr_tables format and conflict policy.
+
+def grammar_digest(cg):
+    text = repr((cg.symbols, cg.prod_lhs, cg.prod_rhs))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class LazyLR1:
+    def __init__(self, cg, analysis=None, cache_path=None, budget=None):
+        self.cg = cg
+        self.analysis = analysis or GrammarAnalysis(cg)
+        self.closure_table = closure_edges(cg, self.analysis)
+        self.cache_path = cache_path
+        self.budget = budget
+        self.digest = grammar_digest(cg)
+
+        self.kernels = [((cg.item(0), 1),)]  # S' -> . S, {$}
+        self.action = [None]  # state id -> {terminal: action}, None until expanded
+        self.goto = [None]    # state id -> {nonterminal: state}
+        self.conflicts = []
+        self.expanded = 0     # states expanded by this instance
+        if cache_path and os.path.exists(cache_path):
+            self._load()
+        self.state_ids = {kernel: i for i, kernel in enumerate(self.kernels)}
+        self.items = sum(len(kernel) for kernel in self.kernels)
+        if budget:
+            budget.start()
+
+    @property
+    def n_states(self):
+        """States discovered so far, expanded or not"""
+        return len(self.kernels)
+
+    def _expand(self, state):
+        cg = self.cg
+        action, goto, edges = {}, {}, {}
+        for symbol, kernel in successors(cg, self.analysis, self.closure_table, self.kernels[state]):
+            target = self.state_ids.get(kernel)
+            if target is None:
+                target = self.state_ids[kernel] = len(self.kernels)
+                self.kernels.append(kernel)
+                self.action.append(None)
+                self.goto.append(None)
+                self.items += len(kernel)
+                if self.budget:
+                    self.budget.check_build(len(self.kernels), self.items)
+            edges[symbol] = target
+        for symbol, target in edges.items():
+            if cg.is_terminal(symbol):
+                action[symbol] = ("shift", target)
+            else:
+                goto[symbol] = target
+
+        item_next, item_prod = cg.item_next, cg.item_prod
+        for item, bits in closure_lr1(cg, self.analysis, self.closure_table, self.kernels[state]).items():
+            if item_next[item] < 0:
+                prod = item_prod[item]
+                act = ("accept",) if prod == 0 else ("reduce", prod)
+                for terminal in iter_bits(bits):
+                    set_action(action, terminal, act, state, self.conflicts)
+        self.action[state] = action
+        self.goto[state] = goto
+        self.expanded += 1
+
+    def action_row(self, state):
+        if self.action[state] is None:
+            self._expand(state)
+        return self.action[state]
+
+    def goto_row(self, state):
+        if self.goto[state] is None:
+            self._expand(state)
+        return self.goto[state]
+
+    # -------------------------------
+    # Drivers
+    # -------------------------------
+
+    def parse(self, input_string):
+        """Accept or reject whitespace-separated tokens; returns (accepted, steps)"""
+        ids = self.cg.symbol_ids
+        n_terminals, prod_lhs, prod_rhs = self.cg.n_terminals, self.cg.prod_lhs, self.cg.prod_rhs
+        tokens = [ids.get(token, -1) for token in input_string.split()] + [0]
+        stack = [0]
+        idx = 0
+        steps = 0
+        while True:
+            steps += 1
+            terminal = tokens[idx]
+            act = self.action_row(stack[-1]).get(terminal) if 0 <= terminal < n_terminals else None
+            if act is None:
+                return False, steps
+            if act[0] == "shift":
+                stack.append(act[1])
+                idx += 1
+            elif act[0] == "reduce":
+                n = len(prod_rhs[act[1]])
+                if n:
+                    del stack[-n:]
+                stack.append(self.goto_row(stack[-1])[prod_lhs[act[1]]])
+            else:
+                return True, steps
+
+    def named_views(self):
+        """(ACTION, GOTO, productions) for the simulate_* drivers, expanding
+        states as they look rows up"""
+        return LazyActions(self), LazyGotos(self), self.cg.named_productions()
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+
+    def save(self, path=None):
+        path = path or self.cache_path
+        snapshot = {
+            "digest": self.digest,
+            "kernels": self.kernels,
+            "action": self.action,
+            "goto": self.goto,
+            "conflicts": self.conflicts,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if snapshot.get("digest") != self.digest:
+            return  # another grammar (or an edited one); start cold
+        self.kernels = snapshot["kernels"]
+        self.action = snapshot["action"]
+        self.goto = snapshot["goto"]
+        self.conflicts = snapshot["conflicts"]
+
+# -------------------------------
+# Name-keyed views for the simulate_* drivers
+# -------------------------------
+
+class LazyActions:
+    def __init__(self, lazy):
+        self.lazy = lazy
+        self.rows = {}
+
+    def get(self, state, default=None):
+        row = self.rows.get(state)
+        if row is None:
+            if not 0 <= state < self.lazy.n_states:
+                return default
+            symbols = self.lazy.cg.symbols
+            row = self.rows[state] = {symbols[t]: act for t, act in self.lazy.action_row(state).items()}
+        return row
+
+    def __getitem__(self, state):
+        row = self.get(state)
+        if row is None:
+            raise KeyError(state)
+        return row
+
+class LazyGotos:
+    def __init__(self, lazy):
+        self.lazy = lazy
+        self.rows = {}
+
+    def __getitem__(self, state):
+        row = self.rows.get(state)
+        if row is None:
+            symbols = self.lazy.cg.symbols
+            row = self.rows[state] = {symbols[A]: target for A, target in self.lazy.goto_row(state).items()}
+        return row
@@ -65,7 +65,7 @@ def get_terminals(grammar):
 # 3. Build Canonical LR(0) Collection
 # -------------------------------
 
-def build_canonical_collection(grammar, start_symbol):
+def build_canonical_collection(grammar, start_symbol, budget=None):
     start_items = get_items(start_symbol, grammar[start_symbol])
     I0 = closure(start_items, grammar)
     states = [I0]
@@ -79,15 +79,23 @@ def build_canonical_collection(grammar, start_symbol):
             symbols.update(prod)
     symbols.update(grammar.keys())  # Include non-terminals
 
+    if budget:
+        budget.start()
+    items = sum(len(state) for state in states)
+
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        # Sorted, so state numbers do not depend on set iteration order
+        for symbol in sorted(symbols):
             next_state = goto(current, symbol, grammar)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
                 states.append(next_state)
                 queue.append(next_state)
+                items += len(next_state)
+                if budget:
+                    budget.check_build(len(states), items, len(queue))
             if next_state:
                 transitions[(current_id, symbol)] = state_ids[next_state]
 
@@ -137,42 +145,10 @@ def build_parsing_table(states, transitions, grammar, augmented_start):
     return ACTION, GOTO, productions
 
 # -------------------------------
-# 5. Run Everything and Display
+# 5. Simulate Shift/Reduce Parsing
 # -------------------------------
 
-# Build item sets and parsing table
-states, transitions = build_canonical_collection(grammar, augmented_start)
-ACTION, GOTO, productions = build_parsing_table(states, transitions, grammar, augmented_start)
-
-# Print item sets
-for i, state in enumerate(states):
-    print(f"\nItem Set I{i}:")
-    for lhs, rhs in sorted(state):
-        print(f"  {lhs} -> {rhs}")
-
-# Print transitions
-print("\n=== TRANSITIONS ===")
-for (from_state, symbol), to_state in sorted(transitions.items()):
-    print(f"  I{from_state} -- {symbol} --> I{to_state}")
-
-# Print ACTION table
-print("\n=== ACTION TABLE ===")
-for state in sorted(ACTION):
-    for symbol in sorted(ACTION[state]):
-        print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
-
-# Print GOTO table
-print("\n=== GOTO TABLE ===")
-for state in sorted(GOTO):
-    for symbol in sorted(GOTO[state]):
-        print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
-
-# Print production rules
-print("\n=== PRODUCTIONS ===")
-for i, (lhs, rhs) in enumerate(productions):
-    print(f"{i}: {lhs} → {rhs}")
-
-def simulate_lr0_parsing(input_string, ACTION, GOTO, productions):
+def simulate_lr0_parsing(input_string, ACTION, GOTO, productions, verbose=True, budget=None, trace=True):
     input_tokens = input_string.strip().split() + ["$"]
     stack = [0]
     steps = []
@@ -180,20 +156,28 @@ def simulate_lr0_parsing(input_string, ACTION, GOTO, productions):
     idx = 0  # pointer to input
     step = 1
 
+    if budget:
+        budget.start()
+
     while True:
+        if budget:
+            budget.check_step(step, idx, len(stack))
         current_state = stack[-1]
         current_token = input_tokens[idx]
 
         action = ACTION.get(current_state, {}).get(current_token)
 
         # Record current step
-        stack_repr = ' '.join(str(s) for s in stack)
-        input_repr = ' '.join(input_tokens[idx:])
-        action_repr = str(action) if action else "ERROR"
-        steps.append((step, stack_repr, input_repr, action_repr))
+        if trace:
+            stack_repr = ' '.join(str(s) for s in stack)
+            input_repr = ' '.join(input_tokens[idx:])
+            action_repr = str(action) if action else "ERROR"
+            steps.append((step, stack_repr, input_repr, action_repr))
 
         if not action:
-            print("\n🚫 Parsing Error! String rejected.\n")
+            accepted = False
+            if verbose:
+                print("\n🚫 Parsing Error! String rejected.\n")
             break
 
         if action[0] == "shift":
@@ -205,7 +189,7 @@ def simulate_lr0_parsing(input_string, ACTION, GOTO, productions):
             prod_index = action[1]
             lhs, rhs = productions[prod_index]
             rhs_len = len(rhs) * 2  # because stack is symbol+state pairs
-            if rhs != "ε":
+            if rhs:
                 stack = stack[:-rhs_len]
 
             top_state = stack[-1]
@@ -213,18 +197,61 @@ def simulate_lr0_parsing(input_string, ACTION, GOTO, productions):
             stack.append(GOTO[top_state][lhs])
 
         elif action[0] == "accept":
-            print("\n✅ String accepted by the grammar!\n")
+            accepted = True
+            if verbose:
+                print("\n✅ String accepted by the grammar!\n")
             break
 
         step += 1
 
     # Print table
-    print("\n=== PARSING STEPS ===")
-    print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
-    print("-" * 70)
-    for s in steps:
-        print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
-
-# 🔥 Try it with a string
-test_string = "c d d"
-simulate_lr0_parsing(test_string, ACTION, GOTO, productions)
\ No newline at end of file
+    if verbose and trace:
+        print("\n=== PARSING STEPS ===")
+        print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
+        print("-" * 70)
+        for s in steps:
+            print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+
+    # Without trace, only the number of steps is kept
+    return accepted, steps if trace else step
+
+# -------------------------------
+# 6. Run Everything and Display
+# -------------------------------
+
+if __name__ == "__main__":
+    # Build item sets and parsing table
+    states, transitions = build_canonical_collection(grammar, augmented_start)
+    ACTION, GOTO, productions = build_parsing_table(states, transitions, grammar, augmented_start)
+
+    # Print item sets
+    for i, state in enumerate(states):
+        print(f"\nItem Set I{i}:")
+        for lhs, rhs in sorted(state):
+            print(f"  {lhs} -> {rhs}")
+
+    # Print transitions
+    print("\n=== TRANSITIONS ===")
+    for (from_state, symbol), to_state in sorted(transitions.items()):
+        print(f"  I{from_state} -- {symbol} --> I{to_state}")
+
+    # Print ACTION table
+    print("\n=== ACTION TABLE ===")
+    for state in sorted(ACTION):
+        for symbol in sorted(ACTION[state]):
+            print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
+
+    # Print GOTO table
+    print("\n=== GOTO TABLE ===")
+    for state in sorted(GOTO):
+        for symbol in sorted(GOTO[state]):
+            print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
+
+    # Print production rules
+    print("\n=== PRODUCTIONS ===")
+    for i, (lhs, rhs) in enumerate(productions):
+        print(f"{i}: {lhs} → {rhs}")
+
+    # 🔥 Try it with a string
+    test_string = "c d d"
+    simulate_lr0_parsing(test_string, ACTION, GOTO, productions)
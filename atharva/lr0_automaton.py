@@ -0,0 +1,143 @@
+from collections import deque
+
+# -------------------------------
+# LR(0) automaton on a CompiledGrammar
+# -------------------------------
+#
+# The canonical collection without the per-symbol goto() calls:
+#
+# - A state is identified by its kernel (the sorted tuple of its kernel
+#   items). The closure is never stored or hashed; it is rebuilt from the
+#   kernel when needed.
+# - Closing over a nonterminal always adds the same dot-0 items, namely the
+#   productions of every nonterminal reachable through leftmost symbols. That
+#   set is computed once per nonterminal up front.
+# - All successors of a state come out of a single pass over its items,
+#   bucketed by the symbol after the dot. Each bucket, advanced by one, is
+#   the kernel of the successor on that symbol.
+#
+# Expanding a state therefore costs O(items in the state) instead of
+# O(symbols x items) plus a fresh closure per symbol.
+#
+# An observer (build_observer.py) sees the "lr0_collection" phase, one
+# closure per state expanded and every successor edge.
+
+def closure_nonterminals(cg):
+    """Per symbol id, the nonterminals whose productions a closure adds when
+    that nonterminal is after the dot (itself included); empty for terminals"""
+    n_terminals = cg.n_terminals
+    left_corners = [set() for _ in range(cg.n_symbols)]
+    for lhs, rhs in zip(cg.prod_lhs, cg.prod_rhs):
+        if rhs and rhs[0] >= n_terminals:
+            left_corners[lhs].add(rhs[0])
+
+    reach = [() for _ in range(cg.n_symbols)]
+    for A in cg.nonterminals():
+        seen = {A}
+        stack = [A]
+        while stack:
+            for B in left_corners[stack.pop()]:
+                if B not in seen:
+                    seen.add(B)
+                    stack.append(B)
+        reach[A] = tuple(sorted(seen))
+    return reach
+
+class LR0Automaton:
+    def __init__(self, cg, budget=None, observer=None):
+        self.cg = cg
+        self.reach = closure_nonterminals(cg)
+        # dot-0 items contributed by each nonterminal's own productions
+        self.start_items = [tuple(cg.item_offset[p] for p in cg.prods_by_lhs[A]) for A in range(cg.n_symbols)]
+        self.kernels = []  # state id -> sorted tuple of kernel items
+        self.goto = []     # state id -> {symbol id: state id}
+        if observer:
+            observer.phase_started("lr0_collection")
+        self._build(budget, observer)
+        if observer:
+            observer.phase_finished("lr0_collection")
+
+    @property
+    def n_states(self):
+        return len(self.kernels)
+
+    def closure(self, state):
+        """All items of a state: its kernel followed by the closure items"""
+        item_next, n_terminals = self.cg.item_next, self.cg.n_terminals
+        items = list(self.kernels[state])
+        added = set()
+        for item in self.kernels[state]:
+            s = item_next[item]
+            if s >= n_terminals and s not in added:
+                for B in self.reach[s]:
+                    if B not in added:
+                        added.add(B)
+                        items.extend(self.start_items[B])
+        return items
+
+    def _successors_of(self, closure):
+        """(symbol, successor kernel) pairs, by symbol id"""
+        item_next = self.cg.item_next
+        buckets = {}
+        for item in closure:
+            s = item_next[item]
+            if s >= 0:
+                if s in buckets:
+                    buckets[s].append(item + 1)
+                else:
+                    buckets[s] = [item + 1]
+        return [(symbol, tuple(sorted(buckets[symbol]))) for symbol in sorted(buckets)]
+
+    def _build(self, budget, observer):
+        state_ids = {}
+        queue = deque()
+
+        def add_state(kernel):
+            state_ids[kernel] = len(self.kernels)
+            self.kernels.append(kernel)
+            self.goto.append({})
+            queue.append(state_ids[kernel])
+            return state_ids[kernel]
+
+        if budget:
+            budget.start()
+        add_state((self.cg.item(0),))
+        items = 1
+
+        while queue:
+            state = queue.popleft()
+            edges = self.goto[state]
+            closure = self.closure(state)
+            n_states = len(self.kernels)
+            for symbol, kernel in self._successors_of(closure):
+                target = state_ids.get(kernel)
+                if target is None:
+                    target = add_state(kernel)
+                    items += len(kernel)
+                    if budget:
+                        budget.check_build(len(self.kernels), items, len(queue))
+                edges[symbol] = target
+            if observer:
+                observer.expanded(len(closure), edges, len(self.kernels) - n_states)
+
+    # -------------------------------
+    # Views for the table builders
+    # -------------------------------
+
+    def item_sets(self):
+        """Closed item sets, one frozenset per state"""
+        return [frozenset(self.closure(state)) for state in range(self.n_states)]
+
+    def complete_items(self):
+        """(state, production) for every item with the dot at the end"""
+        item_next, item_prod = self.cg.item_next, self.cg.item_prod
+        for state in range(self.n_states):
+            for item in self.closure(state):
+                if item_next[item] < 0:
+                    yield state, item_prod[item]
+
+    def transitions(self):
+        """{(state, symbol): target}, the form the string builders use"""
+        return {(state, symbol): target
+                for state, edges in enumerate(self.goto)
+                for symbol, target in edges.items()}
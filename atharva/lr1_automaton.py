@@ -0,0 +1,194 @@
+from collections import deque
+
+from grammar_analysis import GrammarAnalysis
+
+# -------------------------------
+# LR(1) automaton with lookahead-set items
+# -------------------------------
+#
+# An LR(1) item is an LR(0) item (an int from compiled_grammar) carrying a
+# bitset of lookahead terminals, instead of one (item, terminal) pair per
+# lookahead. Closure grows one bitset per nonterminal to a fixed point, so
+# its size is bounded by the LR(0) closure no matter how many terminals the
+# grammar has.
+#
+# A state is identified by its kernel: the sorted tuple of (item, bits)
+# pairs, i.e. its kernel cores together with their lookahead sets. As in
+# lr0_automaton, successors for every symbol come from one pass over the
+# closure bucketed by the symbol after the dot. An observer
+# (build_observer.py) passed to build sees the "lr1_collection" phase.
+
+def closure_edges(cg, analysis):
+    """Per nonterminal B, the (C, bits, passes) triples saying that closing
+    over B feeds C's productions the lookaheads bits, plus B's own when
+    passes is true. Productions of B starting with the same C are merged."""
+    edges = [() for _ in range(cg.n_symbols)]
+    for B in cg.nonterminals():
+        merged = {}
+        for p in cg.prods_by_lhs[B]:
+            rhs = cg.prod_rhs[p]
+            if rhs and not cg.is_terminal(rhs[0]):
+                j = cg.item_offset[p]
+                bits, passes = merged.get(rhs[0], (0, False))
+                merged[rhs[0]] = (bits | analysis.trail_first[j], passes or analysis.trail_nullable[j])
+        edges[B] = tuple((C, bits, passes) for C, (bits, passes) in merged.items())
+    return edges
+
+def closure_lr1(cg, analysis, edges, kernel):
+    """{item: lookahead bits} for the closure of kernel's (item, bits) pairs.
+
+    All dot-0 items of one nonterminal get the same lookaheads, so the fixed
+    point runs over nonterminals rather than items.
+    """
+    item_next, n_terminals = cg.item_next, cg.n_terminals
+    trail_first, trail_nullable = analysis.trail_first, analysis.trail_nullable
+    lookaheads = {}
+    work = []
+
+    def feed(C, bits):
+        old = lookaheads.get(C)
+        if old is None:
+            lookaheads[C] = bits
+            work.append(C)
+        elif bits & ~old:
+            lookaheads[C] = old | bits
+            work.append(C)
+
+    for item, bits in kernel:
+        B = item_next[item]
+        if B >= n_terminals:
+            feed(B, trail_first[item] | (bits if trail_nullable[item] else 0))
+    while work:
+        B = work.pop()
+        bits = lookaheads[B]
+        for C, first_bits, passes in edges[B]:
+            feed(C, first_bits | bits if passes else first_bits)
+
+    items = dict(kernel)
+    for B, bits in lookaheads.items():
+        for p in cg.prods_by_lhs[B]:
+            items[cg.item_offset[p]] = bits
+    return items
+
+def successors(cg, analysis, edges, kernel):
+    """(symbol, successor kernel) pairs of a state, by increasing symbol id"""
+    return successors_of(cg, closure_lr1(cg, analysis, edges, kernel))
+
+def successors_of(cg, closure):
+    """successors() from an already computed closure"""
+    item_next = cg.item_next
+    buckets = {}
+    for item, bits in closure.items():
+        s = item_next[item]
+        if s >= 0:
+            if s in buckets:
+                buckets[s].append((item + 1, bits))
+            else:
+                buckets[s] = [(item + 1, bits)]
+    return [(symbol, tuple(sorted(buckets[symbol]))) for symbol in sorted(buckets)]
+
+class LR1Automaton:
+    def __init__(self, cg, analysis, kernels, goto):
+        self.cg = cg
+        self.analysis = analysis
+        self.closure_table = closure_edges(cg, analysis)
+        self.kernels = kernels  # state id -> sorted tuple of (item, bits)
+        self.goto = goto        # state id -> {symbol id: state id}
+
+    @property
+    def n_states(self):
+        return len(self.kernels)
+
+    @classmethod
+    def build(cls, cg, budget=None, progress=None, resume=None, analysis=None, observer=None):
+        """Canonical LR(1) collection.
+
+        progress(kernels, goto, queue) is called after each state is
+        expanded; passing such a snapshot back as resume continues the
+        build from there, as clr1.build_clr1_canonical_collection does.
+        """
+        analysis = analysis or GrammarAnalysis(cg)
+        closure_table = closure_edges(cg, analysis)
+
+        if resume:
+            kernels, goto, pending = resume
+            state_ids = {kernel: i for i, kernel in enumerate(kernels)}
+            queue = deque(pending)
+        else:
+            kernels = [((cg.item(0), 1),)]  # S' -> . S, {$}
+            goto = [{}]
+            state_ids = {kernels[0]: 0}
+            queue = deque([0])
+
+        if budget:
+            budget.start()
+        if observer:
+            observer.phase_started("lr1_collection")
+        items = sum(len(kernel) for kernel in kernels)
+
+        while queue:
+            state = queue.popleft()
+            edges = goto[state]
+            closure = closure_lr1(cg, analysis, closure_table, kernels[state])
+            n_states = len(kernels)
+            for symbol, kernel in successors_of(cg, closure):
+                target = state_ids.get(kernel)
+                if target is None:
+                    target = state_ids[kernel] = len(kernels)
+                    kernels.append(kernel)
+                    goto.append({})
+                    queue.append(target)
+                    items += len(kernel)
+                    if budget:
+                        budget.check_build(len(kernels), items, len(queue))
+                edges[symbol] = target
+            if observer:
+                observer.expanded(len(closure), edges, len(kernels) - n_states)
+            if progress:
+                progress(kernels, goto, queue)
+
+        if observer:
+            observer.phase_finished("lr1_collection")
+        return cls(cg, analysis, kernels, goto)
+
+    def merge_cores(self):
+        """LALR(1) by merging states whose kernels have the same LR(0) items"""
+        core_ids = {}
+        merged_of = []
+        merged = []
+        for kernel in self.kernels:
+            core = tuple(item for item, _ in kernel)
+            if core not in core_ids:
+                core_ids[core] = len(merged)
+                merged.append(dict(kernel))
+            else:
+                lookaheads = merged[core_ids[core]]
+                for item, bits in kernel:
+                    lookaheads[item] |= bits
+            merged_of.append(core_ids[core])
+
+        goto = [{} for _ in merged]
+        for state, edges in enumerate(self.goto):
+            goto[merged_of[state]].update((symbol, merged_of[target]) for symbol, target in edges.items())
+        kernels = [tuple(sorted(lookaheads.items())) for lookaheads in merged]
+        return LR1Automaton(self.cg, self.analysis, kernels, goto)
+
+    # -------------------------------
+    # Views for the table builders
+    # -------------------------------
+
+    def closure(self, state):
+        return closure_lr1(self.cg, self.analysis, self.closure_table, self.kernels[state])
+
+    def transitions(self):
+        return {(state, symbol): target
+                for state, edges in enumerate(self.goto)
+                for symbol, target in edges.items()}
+
+    def reductions(self):
+        """(state, production, lookahead bitset) for each complete item"""
+        item_next, item_prod = self.cg.item_next, self.cg.item_prod
+        for state in range(self.n_states):
+            for item, bits in self.closure(state).items():
+                if item_next[item] < 0:
+                    yield state, item_prod[item], bits
@@ -0,0 +1,110 @@
+import time
+
+import lr_tables
+from grammar_analysis import GrammarAnalysis
+from lr0_automaton import LR0Automaton
+from lr1_automaton import LR1Automaton
+from minimal_lr1 import build_minimal_lr1
+
+# -------------------------------
+# Weakest conflict-free LR table from one shared automaton
+# -------------------------------
+#
+# LR(0), SLR(1) and LALR(1) all share the LR(0) automaton and differ only in
+# the lookaheads put on its reductions, so the automaton (and the
+# nullable/FIRST/FOLLOW analysis) is built once and the tables are tried
+# from weakest to strongest. Only if LALR(1) still has conflicts is an LR(1)
+# automaton built: minimal LR(1) by default, which has the same conflicts
+# as canonical LR(1) with far fewer states, or CLR(1) on request. If that
+# still conflicts the grammar is not LR(1) and the LR(1) table is returned
+# with its conflicts, resolved as in lr_tables.
+#
+# Every attempt is timed and recorded in the report, with the time to
+# build the automaton it ran on counted against the first table using it.
+# With a precedence.Precedence, conflicts it settles do not count, so an
+# ambiguous expression grammar with declarations can stop at SLR(1) or
+# LALR(1); the selection keeps the log of the table it settled on. An
+# observer (build_observer.py) is passed on to every automaton and table
+# built, and also sees the grammar analysis as the "analysis" phase.
+
+LR1_BUILDERS = {
+    "minimal_lr1": build_minimal_lr1,
+    "clr1": lambda cg, budget=None, analysis=None, observer=None: LR1Automaton.build(
+        cg, budget, analysis=analysis, observer=observer),
+}
+
+class TableSelection:
+    def __init__(self, algorithm, automaton, action, goto, conflicts, report, precedence=None):
+        self.algorithm = algorithm  # "lr0", "slr1", "lalr1", "minimal_lr1" or "clr1"
+        self.automaton = automaton
+        self.action = action
+        self.goto = goto
+        self.conflicts = conflicts
+        self.report = report        # one dict per algorithm tried, in order
+        self.precedence = precedence
+
+    @property
+    def resolved(self):
+        """Conflicts settled by precedence declarations, see precedence.py"""
+        return self.precedence.resolved if self.precedence else []
+
+    @property
+    def errors(self):
+        """(state, terminal) slots %nonassoc made errors; table backends must
+        keep them from being filled by a default reduction"""
+        return self.precedence.errors if self.precedence else {}
+
+    @property
+    def n_states(self):
+        return self.automaton.n_states
+
+    def format_report(self):
+        lines = [f"{'Algorithm':<12} | {'States':>6} | {'Conflicts':>9} | {'Time (ms)':>9}", "-" * 46]
+        for row in self.report:
+            mark = " <-" if row["algorithm"] == self.algorithm else ""
+            lines.append(f"{row['algorithm']:<12} | {row['states']:>6} | {row['conflicts']:>9} | {row['seconds'] * 1000:>9.2f}{mark}")
+        return "\n".join(lines)
+
+def select_table(cg, lr1="minimal_lr1", budget=None, analysis=None, precedence=None, observer=None):
+    """Try LR(0), SLR(1), LALR(1) and then lr1 ("minimal_lr1" or "clr1") and
+    return a TableSelection for the first one without conflicts"""
+    if lr1 not in LR1_BUILDERS:
+        raise ValueError(f"Unknown LR(1) fallback {lr1!r}, expected one of {sorted(LR1_BUILDERS)}")
+    report = []
+
+    def attempt(algorithm, automaton, build, started):
+        log = precedence.fresh() if precedence else None
+        action, goto, conflicts = build(log)
+        report.append({
+            "algorithm": algorithm,
+            "states": automaton.n_states,
+            "conflicts": len(conflicts),
+            "seconds": time.perf_counter() - started,
+        })
+        return TableSelection(algorithm, automaton, action, goto, conflicts, report, log)
+
+    started = time.perf_counter()
+    lr0 = LR0Automaton(cg, budget, observer=observer)
+    selection = attempt("lr0", lr0, lambda log: lr_tables.build_lr0_table(cg, lr0, log, observer), started)
+    if not selection.conflicts:
+        return selection
+
+    started = time.perf_counter()
+    if analysis is None:
+        if observer:
+            observer.phase_started("analysis")
+        analysis = GrammarAnalysis(cg)
+        if observer:
+            observer.phase_finished("analysis")
+    selection = attempt("slr1", lr0, lambda log: lr_tables.build_slr_table(cg, lr0, analysis, log, observer), started)
+    if not selection.conflicts:
+        return selection
+
+    started = time.perf_counter()
+    selection = attempt("lalr1", lr0, lambda log: lr_tables.build_lalr_table(cg, lr0, analysis, log, observer), started)
+    if not selection.conflicts:
+        return selection
+
+    started = time.perf_counter()
+    automaton = LR1_BUILDERS[lr1](cg, budget=budget, analysis=analysis, observer=observer)
+    return attempt(lr1, automaton, lambda log: lr_tables.build_lr1_table(cg, automaton, log, observer, lr1), started)
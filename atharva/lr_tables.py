@@ -0,0 +1,126 @@
+from collections import defaultdict
+
+from grammar_analysis import GrammarAnalysis, iter_bits
+from lalr_lookaheads import LALRLookaheads
+
+# -------------------------------
+# ACTION / GOTO tables from the LR(0) and LR(1) automata
+# -------------------------------
+#
+# The automata in lr0_automaton and lr1_automaton work on the dense ints of
+# compiled_grammar, so symbols may be multi-character tokens. The builders
+# here turn them into LR(0), SLR(1), LALR(1) and CLR(1) tables. LALR(1) is
+# built on the LR(0) automaton with lalr_lookaheads; merging the cores of
+# the LR(1) automaton gives the same table at CLR(1) cost.
+#
+# Tables come back indexed by ids: action[state][terminal] is ("shift", n),
+# ("reduce", p) or ("accept",), goto[state][nonterminal] is a state.
+# named_tables() converts them to the dict-of-names form the simulate_*
+# drivers in this directory take.
+#
+# Conflicts are resolved the way the string builders mostly end up doing it:
+# shift (or accept) beats reduce, and between reductions the earlier
+# production wins. Every conflict is recorded as (state, terminal, kept,
+# dropped). With a precedence.Precedence, shift/reduce conflicts between
+# terminals and productions that have a declared precedence are settled by
+# it instead, logged there and not counted as conflicts.
+#
+# An observer (build_observer.py) sees each table build as a
+# "<name>_table" phase, LALR(1) lookaheads as "lalr_lookaheads", and the
+# finished table through its table() hook.
+
+def _beats(action, other):
+    if action[0] != "reduce":
+        return True
+    return other[0] == "reduce" and action[1] < other[1]
+
+def set_action(row, terminal, action, state, conflicts, precedence=None):
+    """Put action into row[terminal] under the conflict policy above"""
+    if precedence is not None and precedence.resolve(row, terminal, row.get(terminal), action, state):
+        return
+    current = row.get(terminal)  # resolve may have put back what an error slot replaced
+    if current is None or current == action:
+        row[terminal] = action
+        return
+    if _beats(current, action):
+        conflicts.append((state, terminal, current, action))
+    else:
+        conflicts.append((state, terminal, action, current))
+        row[terminal] = action
+
+def _build_table(cg, automaton, reductions, precedence=None, observer=None, name=None):
+    """reductions yields (state, prod, lookahead bitset) triples"""
+    if observer:
+        observer.phase_started(f"{name}_table")
+    action = [dict() for _ in range(automaton.n_states)]
+    goto_table = [dict() for _ in range(automaton.n_states)]
+    conflicts = []
+    for state, edges in enumerate(automaton.goto):
+        for symbol, target in edges.items():
+            if cg.is_terminal(symbol):
+                action[state][symbol] = ("shift", target)
+            else:
+                goto_table[state][symbol] = target
+    # Lookahead sets repeat a lot (SLR has one per nonterminal), so each is
+    # expanded to terminal ids once; a slot nothing else wants is filled
+    # directly, and only contested ones go through set_action
+    terminal_lists = {}
+    reduce_actions = [("accept",)] + [("reduce", p) for p in range(1, cg.n_productions)]
+    for state, prod, bits in reductions:
+        terminals = terminal_lists.get(bits)
+        if terminals is None:
+            terminals = terminal_lists[bits] = list(iter_bits(bits))
+        row, act = action[state], reduce_actions[prod]
+        for terminal in terminals:
+            if terminal in row or precedence is not None:
+                set_action(row, terminal, act, state, conflicts, precedence)
+            else:
+                row[terminal] = act
+    if observer:
+        observer.phase_finished(f"{name}_table")
+        observer.table(name, automaton, action, goto_table, conflicts)
+    return action, goto_table, conflicts
+
+def build_lr0_table(cg, automaton, precedence=None, observer=None):
+    every_terminal = (1 << cg.n_terminals) - 1
+    reductions = (
+        (state, prod, 1 if prod == 0 else every_terminal)
+        for state, prod in automaton.complete_items()
+    )
+    return _build_table(cg, automaton, reductions, precedence, observer, "lr0")
+
+def build_slr_table(cg, automaton, analysis=None, precedence=None, observer=None):
+    follow = (analysis or GrammarAnalysis(cg)).follow
+    reductions = (
+        (state, prod, follow[cg.prod_lhs[prod]])
+        for state, prod in automaton.complete_items()
+    )
+    return _build_table(cg, automaton, reductions, precedence, observer, "slr1")
+
+def build_lalr_table(cg, automaton, analysis=None, precedence=None, observer=None):
+    """LALR(1) table from an LR0Automaton, with DeRemer-Pennello lookaheads"""
+    if observer:
+        observer.phase_started("lalr_lookaheads")
+    la = LALRLookaheads(cg, automaton, analysis)
+    if observer:
+        observer.phase_finished("lalr_lookaheads")
+    reductions = ((state, prod, la.lookaheads(state, prod)) for state, prod in automaton.complete_items())
+    return _build_table(cg, automaton, reductions, precedence, observer, "lalr1")
+
+def build_lr1_table(cg, automaton, precedence=None, observer=None, name="lr1"):
+    """CLR(1) table from an LR1Automaton, or LALR(1) from its merge_cores();
+    name labels it for the observer"""
+    return _build_table(cg, automaton, automaton.reductions(), precedence, observer, name)
+
+def named_tables(cg, action, goto_table):
+    """Convert id-indexed tables to (ACTION, GOTO, productions) keyed by names"""
+    symbols = cg.symbols
+    ACTION = defaultdict(dict)
+    GOTO = defaultdict(dict)
+    for state, row in enumerate(action):
+        for terminal, act in row.items():
+            ACTION[state][symbols[terminal]] = act
+    for state, row in enumerate(goto_table):
+        for nonterminal, target in row.items():
+            GOTO[state][symbols[nonterminal]] = target
+    return ACTION, GOTO, cg.named_productions()
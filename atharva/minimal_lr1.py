@@ -0,0 +1,149 @@
+from collections import deque
+
+from grammar_analysis import GrammarAnalysis
+from lr1_automaton import LR1Automaton, closure_edges, closure_lr1
+
+# -------------------------------
+# Minimal LR(1) automaton (Pager's weak compatibility)
+# -------------------------------
+#
+# Built like the canonical LR(1) collection in lr1_automaton, except that a
+# new kernel is merged into an existing state with the same LR(0) core
+# whenever the two are weakly compatible, i.e. merging them cannot create a
+# reduce/reduce conflict the canonical automaton does not have. For kernel
+# lookahead sets L and M over the same core items, that holds when for every
+# pair i != j either
+#
+#   (L[i] & M[j]) | (M[i] & L[j]) is empty, or
+#   L[i] & L[j] or M[i] & M[j] is non-empty (the conflict was there anyway).
+#
+# States are bucketed by LR(0) core, so a successor is only compared with
+# the states sharing its core, and a successor whose lookaheads are already
+# in a compatible state is settled without a merge. A merge that grows a
+# state's lookaheads queues it to be expanded again so the new lookaheads
+# reach its successors; those re-expansions wait until no new state is left
+# to expand, so growth from many predecessors is propagated in one go, and
+# only successors that actually gain lookaheads are looked up again.
+# Successors may then land in other states, so states can become
+# unreachable; the result is renumbered breadth-first from state 0 and
+# keeps only reachable states.
+#
+# The outcome is LR(1)-powerful (same conflicts as CLR(1)) and, for LALR(1)
+# grammars, the same size as the LALR(1) automaton. An observer
+# (build_observer.py) sees the "minimal_lr1_collection" phase; a successor
+# merged into an existing state counts as a duplicate hit, and one skipped
+# on re-expansion is not counted.
+
+def weakly_compatible(L, M):
+    n = len(L)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if ((L[i] & M[j]) | (M[i] & L[j])) and not (L[i] & L[j]) and not (M[i] & M[j]):
+                return False
+    return True
+
+def build_minimal_lr1(cg, budget=None, analysis=None, observer=None):
+    analysis = analysis or GrammarAnalysis(cg)
+    closure_table = closure_edges(cg, analysis)
+    item_next = cg.item_next
+
+    cores = []      # state id -> tuple of kernel items
+    lookaheads = [] # state id -> tuple of bitsets, parallel to the core
+    goto = []
+    by_core = {}    # core -> state ids with that core, oldest first
+    queue = deque()   # new states, expanded first
+    regrow = deque()  # expanded states whose lookaheads grew since
+    queued = set()
+
+    def add_state(core, bits):
+        state = len(cores)
+        cores.append(core)
+        lookaheads.append(bits)
+        goto.append({})
+        by_core.setdefault(core, []).append(state)
+        queue.append(state)
+        queued.add(state)
+        return state
+
+    def find_or_merge(core, bits):
+        states = by_core.get(core)
+        if states is None:
+            return add_state(core, bits)
+        for state in states:
+            current = lookaheads[state]
+            if bits == current:
+                return state
+            if len(core) == 1:
+                # One kernel item is always compatible, so its core has one state
+                if not bits[0] & ~current[0]:
+                    return state
+                grown = (current[0] | bits[0],)
+            else:
+                grown = tuple([a | b for a, b in zip(current, bits)])
+                if grown == current:
+                    return state  # nothing new, and a subset is always compatible
+                if not weakly_compatible(current, bits):
+                    continue
+            lookaheads[state] = grown
+            if state not in queued:
+                regrow.append(state)
+                queued.add(state)
+            return state
+        return add_state(core, bits)
+
+    if budget:
+        budget.start()
+    if observer:
+        observer.phase_started("minimal_lr1_collection")
+    add_state((cg.item(0),), (1,))  # S' -> . S, {$}
+    items = 1
+
+    while queue or regrow:
+        state = queue.popleft() if queue else regrow.popleft()
+        queued.discard(state)
+        core = cores[state]
+        closure = closure_lr1(cg, analysis, closure_table, tuple(zip(core, lookaheads[state])))
+        buckets = {}
+        for item, bits in closure.items():
+            s = item_next[item]
+            if s >= 0:
+                if s in buckets:
+                    buckets[s].append((item + 1, bits))
+                else:
+                    buckets[s] = [(item + 1, bits)]
+
+        edges = goto[state]
+        looked_up = []
+        added = len(cores)
+        for symbol in sorted(buckets):
+            pairs = buckets[symbol]
+            if len(pairs) > 1:
+                pairs.sort()
+            successor, bits = zip(*pairs)
+            target = edges.get(symbol)
+            if target is not None and bits == lookaheads[target]:
+                continue  # expanded again, but nothing new for this successor
+            n_states = len(cores)
+            edges[symbol] = find_or_merge(successor, bits)
+            looked_up.append(symbol)
+            if len(cores) > n_states:
+                items += len(pairs)
+                if budget:
+                    budget.check_build(len(cores), items, len(queue) + len(regrow))
+        if observer:
+            observer.expanded(len(closure), looked_up, len(cores) - added)
+
+    # Renumber breadth-first from 0, dropping states no longer reachable
+    order = [0]
+    new_ids = {0: 0}
+    for state in order:
+        for symbol in sorted(goto[state]):
+            target = goto[state][symbol]
+            if target not in new_ids:
+                new_ids[target] = len(order)
+                order.append(target)
+    kernels = [tuple(zip(cores[state], lookaheads[state])) for state in order]
+    new_goto = [{symbol: new_ids[target] for symbol, target in goto[state].items()} for state in order]
+    if observer:
+        observer.phase_finished("minimal_lr1_collection")
+    return LR1Automaton(cg, analysis, kernels, new_goto)
@@ -0,0 +1,308 @@
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # optional: the stdlib array module is used instead
+    np = None
+
+# -------------------------------
+# Compressed ACTION / GOTO tables
+# -------------------------------
+#
+# The tables from lr_tables are one dict per state holding tuples. Here they
+# are compiled into a few flat int arrays:
+#
+# - Every action is one signed int: 0 is an error, n + 1 shifts to state n,
+#   -(p + 1) reduces by production p. Reducing by production 0 (S' -> S)
+#   is accepting, so ACCEPT is -1.
+# - Default reductions: the most common reduction of a state is moved out
+#   of its row into default_action[state] and used for any terminal the
+#   row has no entry for. As in yacc, an error may then be noticed a few
+#   reductions later, but never after a wrong shift. Slots that must stay
+#   errors whatever the default (%nonassoc, see precedence.py) are kept in
+#   the row as explicit 0 entries.
+# - Default gotos: per nonterminal, the most common target is kept in
+#   default_goto and dropped from the rows.
+# - Identical rows are stored once; action_row[state] and goto_row[state]
+#   are the state's shared row ids (row_of below).
+# - The distinct rows are overlaid into one vector (row displacement, or
+#   "comb vector" packing): row r puts its entry for column c at
+#   base[r] + c, and check[base[r] + c] == r says the slot belongs to it.
+#
+# A lookup is then a few array reads:
+#
+#   i = base[row_of[state]] + column
+#   value = table[i] if check[i] == row_of[state] else default
+#
+# The arrays are built, stored and saved as NumPy int32 arrays when NumPy
+# is installed and array("i") otherwise. Lookups always go through
+# array("i") copies (lookup_array): indexing a NumPy array from Python
+# boxes a NumPy scalar per read, which made every lookup several times
+# slower than the same read from array("i").
+
+ERROR = 0
+ACCEPT = -1
+
+def encode(action):
+    if action[0] == "shift":
+        return action[1] + 1
+    if action[0] == "reduce":
+        return -(action[1] + 1)
+    return ACCEPT
+
+def decode(code):
+    if code > 0:
+        return ("shift", code - 1)
+    if code == ACCEPT:
+        return ("accept",)
+    if code < 0:
+        return ("reduce", -code - 1)
+    return None
+
+def int_array(values):
+    if np is not None:
+        return np.array(values, dtype=np.int32)
+    return array("i", values)
+
+def lookup_array(values):
+    """values (any int32 buffer: NumPy, memoryview, array) as array("i")"""
+    if isinstance(values, array):
+        return values
+    copy = array("i")
+    copy.frombytes(memoryview(values).cast("B"))
+    return copy
+
+def pack_rows(rows, width):
+    """Overlay {column: value} rows into one vector.
+
+    Returns (row_of, base, table, check): equal rows share a row id, and
+    distinct rows are placed densest first at the lowest displacement where
+    none of their columns collide with a row already placed.
+    """
+    ids = {}
+    row_of = []
+    for row in rows:
+        key = tuple(sorted(row.items()))
+        row_of.append(ids.setdefault(key, len(ids)))
+    distinct = list(ids)
+
+    base = [0] * len(distinct)
+    table = []
+    check = []
+    taken = 0       # bitset of occupied slots
+    searched = {}   # column mask -> where the last row of that shape was put
+    for r in sorted(range(len(distinct)), key=lambda r: -len(distinct[r])):
+        entries = distinct[r]
+        if not entries:
+            continue
+        mask = 0
+        for c, _ in entries:
+            mask |= 1 << c
+        # Only displacements putting the first column on a free slot can fit,
+        # and a row of the same shape already ruled out everything before its
+        # own slot
+        c0 = entries[0][0]
+        f = searched.get(mask, c0)
+        while True:
+            free = ~taken >> f
+            f += (free & -free).bit_length() - 1
+            d = f - c0
+            if not (taken >> d) & mask:
+                break
+            f += 1
+        taken |= mask << d
+        searched[mask] = f + 1
+        end = d + entries[-1][0] + 1
+        if end > len(check):
+            table.extend([0] * (end - len(check)))
+            check.extend([-1] * (end - len(check)))
+        for c, value in entries:
+            table[d + c] = value
+            check[d + c] = r
+        base[r] = d
+
+    # Pad so that base + column never runs off the end
+    size = max(base, default=0) + width
+    if size > len(check):
+        table.extend([0] * (size - len(check)))
+        check.extend([-1] * (size - len(check)))
+    return row_of, base, table, check
+
+class PackedTables:
+    def __init__(self, symbols, n_terminals, prod_lhs, prod_len, arrays):
+        self.symbols = symbols          # id -> name, terminals first
+        self.n_terminals = n_terminals
+        self.prod_lhs = prod_lhs
+        self.prod_len = prod_len
+        self.arrays = arrays            # name -> int array, see ARRAYS
+        for name, values in arrays.items():
+            setattr(self, name, lookup_array(values))
+
+    ARRAYS = (
+        "action_row", "action_base", "action_table", "action_check", "default_action",
+        "goto_row", "goto_base", "goto_table", "goto_check", "default_goto",
+    )
+
+    @property
+    def n_states(self):
+        return len(self.action_row)
+
+    @classmethod
+    def from_tables(cls, cg, action, goto_table, default_reductions=True, errors=()):
+        """Compile id-indexed tables from lr_tables; errors holds (state,
+        terminal) slots that must stay errors, e.g. TableSelection.errors"""
+        action_rows = []
+        default_action = []
+        for row in action:
+            codes = {terminal: encode(act) for terminal, act in row.items()}
+            reductions = Counter(code for code in codes.values() if code < ACCEPT)
+            default = reductions.most_common(1)[0][0] if default_reductions and reductions else ERROR
+            default_action.append(default)
+            action_rows.append({t: code for t, code in codes.items() if code != default})
+        for state, terminal in errors:
+            if default_action[state] != ERROR:
+                action_rows[state][terminal] = ERROR
+
+        offset = cg.n_terminals  # goto columns count from the first nonterminal
+        targets = [Counter() for _ in range(cg.n_symbols - offset)]
+        for row in goto_table:
+            for A, target in row.items():
+                targets[A - offset][target] += 1
+        default_goto = [counts.most_common(1)[0][0] if counts else 0 for counts in targets]
+        goto_rows = [
+            {A - offset: target for A, target in row.items() if target != default_goto[A - offset]}
+            for row in goto_table
+        ]
+
+        arrays = {}
+        packed = pack_rows(action_rows, cg.n_terminals) + (default_action,)
+        packed += pack_rows(goto_rows, len(targets)) + (default_goto,)
+        for name, values in zip(cls.ARRAYS, packed):
+            arrays[name] = int_array(values)
+        prod_len = [len(rhs) for rhs in cg.prod_rhs]
+        return cls(list(cg.symbols), cg.n_terminals, list(cg.prod_lhs), prod_len, arrays)
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+
+    def action(self, state, terminal):
+        """Encoded action for a terminal id; decode() turns it into a tuple"""
+        row = self.action_row[state]
+        i = self.action_base[row] + terminal
+        if self.action_check[i] == row:
+            return self.action_table[i]
+        return self.default_action[state]
+
+    def goto(self, state, nonterminal):
+        column = nonterminal - self.n_terminals
+        row = self.goto_row[state]
+        i = self.goto_base[row] + column
+        if self.goto_check[i] == row:
+            return self.goto_table[i]
+        return self.default_goto[column]
+
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in self.arrays.values())
+
+    def named_views(self):
+        """(ACTION, GOTO) answering the simulate_* drivers' lookups,
+        ACTION.get(state, {}).get(token) and GOTO[state][nonterminal], by
+        decoding on the fly. Build with default_reductions=False for them,
+        so that an error stays an error."""
+        ids = {name: i for i, name in enumerate(self.symbols)}
+        return NamedActions(self, ids), NamedGotos(self, ids)
+
+    # -------------------------------
+    # Driver
+    # -------------------------------
+
+    def parse(self, input_string):
+        """Accept or reject whitespace-separated tokens; returns (accepted, steps)"""
+        ids = {name: i for i, name in enumerate(self.symbols[:self.n_terminals])}
+        tokens = [ids.get(token, -1) for token in input_string.split()] + [0]
+        # action() and goto() inlined
+        action_row, action_base, action_table = self.action_row, self.action_base, self.action_table
+        action_check, default_action = self.action_check, self.default_action
+        goto_row, goto_base, goto_table = self.goto_row, self.goto_base, self.goto_table
+        goto_check, default_goto = self.goto_check, self.default_goto
+        prod_lhs, prod_len, offset = self.prod_lhs, self.prod_len, self.n_terminals
+
+        stack = [0]
+        idx = 0
+        steps = 0
+        while True:
+            steps += 1
+            terminal = tokens[idx]
+            if terminal < 0:
+                return False, steps
+            state = stack[-1]
+            row = action_row[state]
+            i = action_base[row] + terminal
+            code = action_table[i] if action_check[i] == row else default_action[state]
+            if code > 0:
+                stack.append(code - 1)
+                idx += 1
+            elif code == ACCEPT:
+                return True, steps
+            elif code < 0:
+                prod = -code - 1
+                if prod_len[prod]:
+                    del stack[-prod_len[prod]:]
+                state = stack[-1]
+                column = prod_lhs[prod] - offset
+                row = goto_row[state]
+                i = goto_base[row] + column
+                stack.append(goto_table[i] if goto_check[i] == row else default_goto[column])
+            else:
+                return False, steps
+
+# -------------------------------
+# Name-keyed views for the simulate_* drivers
+# -------------------------------
+
+class NamedActions:
+    def __init__(self, packed, ids):
+        self.packed = packed
+        self.ids = ids
+
+    def get(self, state, default=None):
+        if 0 <= state < self.packed.n_states:
+            return ActionRow(self.packed, self.ids, state)
+        return default
+
+    def __getitem__(self, state):
+        row = self.get(state)
+        if row is None:
+            raise KeyError(state)
+        return row
+
+class ActionRow:
+    def __init__(self, packed, ids, state):
+        self.packed = packed
+        self.ids = ids
+        self.state = state
+
+    def get(self, token, default=None):
+        terminal = self.ids.get(token)
+        if terminal is None or terminal >= self.packed.n_terminals:
+            return default
+        return decode(self.packed.action(self.state, terminal)) or default
+
+class NamedGotos:
+    def __init__(self, packed, ids):
+        self.packed = packed
+        self.ids = ids
+
+    def __getitem__(self, state):
+        return GotoRow(self.packed, self.ids, state)
+
+class GotoRow:
+    def __init__(self, packed, ids, state):
+        self.packed = packed
+        self.ids = ids
+        self.state = state
+
+    def __getitem__(self, nonterminal):
+        return self.packed.goto(self.state, self.ids[nonterminal])
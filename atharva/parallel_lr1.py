@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+
+from grammar_analysis import GrammarAnalysis
+from lr1_automaton import LR1Automaton, closure_edges, successors
+
+# -------------------------------
+# Level-synchronous parallel LR(1) collection
+# -------------------------------
+#
+# LR1Automaton.build expands states one at a time from a FIFO queue, which
+# is a breadth-first search: every state of one BFS level is expanded, in id
+# order, before any state of the next. Here each level (the frontier) is
+# cut into chunks that a process pool expands, each worker computing
+# closure and successors for its share. The coordinator then walks the
+# results in frontier order and, per state, in symbol order, looking new
+# kernels up by hash and numbering them as it meets them. That is the order
+# the serial build meets them in, so the state ids and the goto table come
+# out identical to LR1Automaton.build.
+#
+# Workers get the grammar and its analysis once, through the pool
+# initializer; only kernels travel per level. An LR1Pool holds such a pool
+# for one grammar, so that several builds (or the LR(1) and LALR(1) ones)
+# pay the process startup once.
+#
+# It is off by default (workers=1 is the serial build). Measured on the
+# bench grammars (bench_parallel.py calibrate), a spawn pool takes about
+# 200 ms to start, a round trip to it 0.2-1.3 ms, and shipping a kernel
+# and its successors 6-20 us, about as much as expanding it (4-23 us). So
+# a level is only sent to the pool from MIN_PARALLEL states up, where the
+# round trip is paid for, and even on many cores the gain is bounded by
+# work / (work / cores + shipping) per state: 0.7-1.1x on 16 cores for
+# those grammars. No speedup has been measured (on one CPU); turn it on
+# only where bench_parallel.py shows one.
+
+MIN_PARALLEL = 256  # frontier states below which a level is expanded locally
+
+_worker = None  # (cg, analysis, closure_table) in each pool process
+
+def _init_worker(cg, analysis):
+    global _worker
+    _worker = (cg, analysis, closure_edges(cg, analysis))
+
+def _expand(kernels):
+    cg, analysis, closure_table = _worker
+    return [successors(cg, analysis, closure_table, kernel) for kernel in kernels]
+
+class LR1Pool:
+    """Worker processes loaded with one grammar, for any number of builds.
+    Use as a context manager, or close() it."""
+
+    def __init__(self, cg, analysis=None, workers=None):
+        self.cg = cg
+        self.analysis = analysis or GrammarAnalysis(cg)
+        self.workers = workers or os.cpu_count() or 1
+        ctx = multiprocessing.get_context("spawn")
+        self.pool = ctx.Pool(self.workers, _init_worker, (cg, self.analysis))
+
+    def map(self, batches):
+        return self.pool.map(_expand, batches)
+
+    def close(self):
+        self.pool.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def build_lr1_parallel(cg, workers=1, budget=None, analysis=None, pool=None,
+                       min_parallel=MIN_PARALLEL, chunks_per_worker=4):
+    """The canonical LR(1) automaton, state-for-state equal to LR1Automaton.build.
+
+    Levels of at least min_parallel states go to pool (an LR1Pool for cg),
+    or to a pool of workers processes started for this build; with neither
+    this is LR1Automaton.build.
+    """
+    if pool is not None and pool.cg is not cg:
+        raise ValueError("The LR1Pool was loaded with another grammar")
+    analysis = analysis or (pool.analysis if pool is not None else GrammarAnalysis(cg))
+    if pool is None and workers <= 1:
+        return LR1Automaton.build(cg, budget, analysis=analysis)
+    owned = pool is None
+    if owned:
+        pool = LR1Pool(cg, analysis, workers)
+    try:
+        return _build(cg, analysis, pool, budget, min_parallel, chunks_per_worker)
+    finally:
+        if owned:
+            pool.close()
+
+def build_lalr1_parallel(cg, workers=1, budget=None, analysis=None, pool=None, min_parallel=MIN_PARALLEL):
+    """LALR(1) states by merging the cores of the parallel LR(1) collection,
+    as lalr1.build_lalr1_states does with the serial one"""
+    return build_lr1_parallel(cg, workers, budget, analysis, pool, min_parallel).merge_cores()
+
+def _build(cg, analysis, pool, budget, min_parallel, chunks_per_worker):
+    closure_table = closure_edges(cg, analysis)
+    kernels = [((cg.item(0), 1),)]  # S' -> . S, {$}
+    goto = [{}]
+    state_ids = {kernels[0]: 0}
+    frontier = [0]
+    items = 1
+    if budget:
+        budget.start()
+
+    while frontier:
+        batch = [kernels[state] for state in frontier]
+        if len(frontier) < min_parallel:
+            expanded = [successors(cg, analysis, closure_table, kernel) for kernel in batch]
+        else:
+            size = -(-len(batch) // (pool.workers * chunks_per_worker))
+            parts = pool.map([batch[i:i + size] for i in range(0, len(batch), size)])
+            expanded = [result for part in parts for result in part]
+
+        next_frontier = []
+        for state, pairs in zip(frontier, expanded):
+            edges = goto[state]
+            for symbol, kernel in pairs:
+                target = state_ids.get(kernel)
+                if target is None:
+                    target = state_ids[kernel] = len(kernels)
+                    kernels.append(kernel)
+                    goto.append({})
+                    next_frontier.append(target)
+                    items += len(kernel)
+                    if budget:
+                        budget.check_build(len(kernels), items, len(next_frontier))
+                edges[symbol] = target
+        frontier = next_frontier
+
+    return LR1Automaton(cg, analysis, kernels, goto)
@@ -0,0 +1,190 @@
+from compiled_grammar import parse_rules
+
+# -------------------------------
+# yacc-style precedence and associativity
+# -------------------------------
+#
+# %left, %right and %nonassoc lines give terminals a precedence level, the
+# later lines binding tighter, as in yacc:
+#
+#   %left + -
+#   %left * /
+#   %right UMINUS
+#   E -> E + E | E - E | E * E | E / E | - E %prec UMINUS | ( E ) | n
+#
+# A production takes the level of its rightmost terminal that has one, or
+# of the name after %prec. When a table builder in lr_tables meets a
+# shift/reduce conflict and both the lookahead and the production have a
+# level, Precedence.resolve settles it: the higher level wins, and on the
+# same level %left reduces, %right shifts and %nonassoc leaves an error
+# entry. Those resolutions are logged in `resolved` as (state, terminal,
+# shift, reduce, outcome) and are not conflicts; everything else goes
+# through the default policy and is still reported in the conflicts list.
+# A later reduction on a %nonassoc error slot is settled against the shift
+# the error replaced in the same way: if it loses or ties, the slot stays
+# an error; otherwise it conflicts with the reduction the error replaced,
+# and that reduce/reduce conflict is reported.
+#
+# The log belongs to one table build; fresh() gives an empty copy for the
+# next one.
+
+ASSOCIATIVITY = ("left", "right", "nonassoc")
+
+def parse_grammar(text):
+    """parse_rules plus precedence lines and %prec markers.
+
+    Returns (rules, declarations, rule_prec): declarations are (assoc,
+    terminals) pairs, lowest precedence first, and rule_prec maps (lhs, rhs)
+    to the name given after %prec.
+    """
+    declarations = []
+    lines = []
+    for line in text.splitlines():
+        words = line.split()
+        if words and words[0].startswith("%"):
+            assoc = words[0][1:]
+            if assoc not in ASSOCIATIVITY or len(words) < 2:
+                raise ValueError(f"Expected %left, %right or %nonassoc and terminals but got {line.strip()!r}")
+            declarations.append((assoc, words[1:]))
+        else:
+            lines.append(line)
+
+    rules = parse_rules("\n".join(lines))
+    rule_prec = {}
+    for lhs, alternatives in rules.items():
+        for k, rhs in enumerate(alternatives):
+            if "%prec" in rhs:
+                at = rhs.index("%prec")
+                if at != len(rhs) - 2:
+                    raise ValueError(f"%prec must end an alternative and name one symbol, in {lhs} -> {' '.join(rhs)}")
+                alternatives[k] = rhs[:at]
+                rule_prec[(lhs, rhs[:at])] = rhs[at + 1]
+    return rules, declarations, rule_prec
+
+class Precedence:
+    def __init__(self, cg, declarations, rule_prec=None):
+        self.cg = cg
+        self.declarations = declarations
+        self.rule_prec = rule_prec or {}
+        levels = {}
+        for level, (assoc, names) in enumerate(declarations, 1):
+            if assoc not in ASSOCIATIVITY:
+                raise ValueError(f"Unknown associativity {assoc!r}, expected one of {ASSOCIATIVITY}")
+            for name in names:
+                levels[name] = (level, assoc)
+        self.levels = levels
+
+        # (level, assoc) per terminal id and level per production, or None
+        self.terminal_level = [levels.get(name) for name in cg.symbols[:cg.n_terminals]]
+        self.prod_level = []
+        for lhs, rhs in cg.named_productions():
+            name = self.rule_prec.get((lhs, rhs))
+            if name is None:
+                name = next((s for s in reversed(rhs) if s in levels and cg.is_terminal(cg.symbol_ids[s])), None)
+            elif name not in levels:
+                raise ValueError(f"%prec {name} in {lhs} -> {' '.join(rhs)} has no precedence declaration")
+            self.prod_level.append(levels[name][0] if name else None)
+
+        self.resolved = []
+        self.errors = {}  # (state, terminal) -> (shift, reduce) that %nonassoc turned into an error
+
+    def fresh(self):
+        """The same declarations with an empty log, for another table build"""
+        other = Precedence.__new__(Precedence)
+        other.__dict__.update(self.__dict__)
+        other.resolved = []
+        other.errors = {}
+        return other
+
+    def _outcome(self, terminal, reduce):
+        """"shift", "reduce" or "error" for reduce against a shift on
+        terminal, or None when either has no precedence"""
+        terminal_level, prod_level = self.terminal_level[terminal], self.prod_level[reduce[1]]
+        if terminal_level is None or prod_level is None:
+            return None
+        level, assoc = terminal_level
+        if prod_level > level or (prod_level == level and assoc == "left"):
+            return "reduce"
+        if prod_level < level or assoc == "right":
+            return "shift"
+        return "error"
+
+    def resolve(self, row, terminal, current, action, state):
+        """Settle action against row[terminal] by precedence; False leaves it
+        to lr_tables' default policy"""
+        slot = self.errors.get((state, terminal))
+        if slot is not None:
+            return self._resolve_error(row, terminal, slot, action, state)
+        if current is None or current == action:
+            return False
+        if current[0] == "shift" and action[0] == "reduce":
+            shift, reduce = current, action
+        elif current[0] == "reduce" and action[0] == "shift":
+            shift, reduce = action, current
+        else:
+            return False
+        outcome = self._outcome(terminal, reduce)
+        if outcome is None:
+            return False
+        if outcome == "error":
+            del row[terminal]
+            self.errors[(state, terminal)] = (shift, reduce)
+        else:
+            row[terminal] = shift if outcome == "shift" else reduce
+        self.resolved.append((state, terminal, shift, reduce, outcome))
+        return True
+
+    def _resolve_error(self, row, terminal, slot, action, state):
+        # Another action for a slot %nonassoc made an error. A reduction
+        # the shift beats or ties with is dropped, and the slot stays an
+        # error; one that beats the shift, or has no precedence, is a
+        # reduce/reduce conflict with the reduction the error replaced,
+        # which goes back in the row for the default policy to report
+        if action in slot:
+            return True
+        if action[0] == "reduce" and self._outcome(terminal, action) in ("shift", "error"):
+            self.resolved.append((state, terminal, None, action, "error"))
+            return True
+        del self.errors[(state, terminal)]
+        self.resolved = [r for r in self.resolved if r[:2] != (state, terminal)]
+        row[terminal] = slot[1]
+        return False
+
+    # -------------------------------
+    # Reporting
+    # -------------------------------
+
+    def format_report(self, conflicts=()):
+        """One line per resolution, then the conflicts precedence left alone"""
+        cg = self.cg
+        lines = []
+        for state, terminal, shift, reduce, outcome in self.resolved:
+            where = f"state {state} on {cg.symbols[terminal]!r}"
+            rule = cg.format_production(reduce[1])
+            if shift is None:
+                lines.append(f"{where}: reduce by {rule} dropped, the entry is an error (%nonassoc)")
+            elif outcome == "error":
+                lines.append(f"{where}: neither shift nor reduce by {rule}, an error (%nonassoc)")
+            else:
+                reason = _reason(self.terminal_level[terminal], self.prod_level[reduce[1]])
+                if outcome == "reduce":
+                    lines.append(f"{where}: reduce by {rule} over shift ({reason})")
+                else:
+                    lines.append(f"{where}: shift over reduce by {rule} ({reason})")
+        for state, terminal, kept, dropped in conflicts:
+            lines.append(f"state {state} on {cg.symbols[terminal]!r}: {_describe(cg, kept)} over "
+                         f"{_describe(cg, dropped)} (unresolved conflict)")
+        return "\n".join(lines)
+
+def _reason(terminal_level, prod_level):
+    level, assoc = terminal_level
+    if prod_level == level:
+        return f"%{assoc}"
+    return "rule binds tighter" if prod_level > level else "lookahead binds tighter"
+
+def _describe(cg, action):
+    if action[0] == "shift":
+        return f"shift {action[1]}"
+    if action[0] == "reduce":
+        return f"reduce by {cg.format_production(action[1])}"
+    return "accept"
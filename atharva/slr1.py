@@ -1,6 +1,8 @@
 
 from collections import defaultdict, deque
 
+from grammar_analysis import GrammarAnalysis
+
 # -------------------------------
 # 1. Input Grammar & Augmentation
 # -------------------------------
@@ -62,7 +64,7 @@ def get_terminals(grammar):
 # 3. Build LR(0) Canonical Collection
 # -------------------------------
 
-def build_canonical_collection(grammar, start_symbol):
+def build_canonical_collection(grammar, start_symbol, budget=None):
     start_items = get_items(start_symbol, grammar[start_symbol])
     I0 = closure(start_items, grammar)
     states = [I0]
@@ -76,15 +78,22 @@ def build_canonical_collection(grammar, start_symbol):
             symbols.update(prod)
     symbols.update(grammar.keys())
 
+    if budget:
+        budget.start()
+    items = sum(len(state) for state in states)
+
     while queue:
         current = queue.popleft()
         current_id = state_ids[current]
-        for symbol in symbols:
+        for symbol in sorted(symbols):
             next_state = goto(current, symbol, grammar)
             if next_state and next_state not in state_ids:
                 state_ids[next_state] = len(states)
                 states.append(next_state)
                 queue.append(next_state)
+                items += len(next_state)
+                if budget:
+                    budget.check_build(len(states), items, len(queue))
             if next_state:
                 transitions[(current_id, symbol)] = state_ids[next_state]
 
@@ -95,53 +104,8 @@ def build_canonical_collection(grammar, start_symbol):
 # -------------------------------
 
 def compute_follow(grammar, start_symbol):
-    follow = defaultdict(set)
-    follow[start_symbol].add("$")
-    changed = True
-
-    while changed:
-        changed = False
-        for lhs, prods in grammar.items():
-            for prod in prods:
-                for i, symbol in enumerate(prod):
-                    if symbol.isupper():
-                        trailer = set()
-                        beta = prod[i + 1:]
-                        if beta:
-                            for b in beta:
-                                if b.isupper():
-                                    trailer.update(first(grammar, b))
-                                    if 'ε' not in trailer:
-                                        break
-                                else:
-                                    trailer.add(b)
-                                    break
-                            else:
-                                trailer.add('ε')
-                        else:
-                            trailer.add('ε')
-                        trailer.discard('ε')
-                        old_len = len(follow[symbol])
-                        follow[symbol].update(trailer)
-                        if 'ε' in trailer or not beta:
-                            follow[symbol].update(follow[lhs])
-                        if len(follow[symbol]) > old_len:
-                            changed = True
-    return follow
-
-def first(grammar, symbol):
-    if not symbol.isupper():
-        return {symbol}
-    result = set()
-    for prod in grammar[symbol]:
-        if not prod:
-            result.add('ε')
-        else:
-            for char in prod:
-                result.update(first(grammar, char))
-                if 'ε' not in first(grammar, char):
-                    break
-    return result
+    analysis = GrammarAnalysis.from_strings(grammar, start_symbol)
+    return defaultdict(set, analysis.named_follow())
 
 # -------------------------------
 # 5. Build SLR(1) Parsing Table
@@ -185,7 +149,7 @@ def build_slr_parsing_table(states, transitions, grammar, augmented_start, follo
 # 6. Simulate Shift/Reduce Parsing
 # -------------------------------
 
-def simulate_slr_parsing(input_string, ACTION, GOTO, productions):
+def simulate_slr_parsing(input_string, ACTION, GOTO, productions, verbose=True, budget=None, trace=True):
     input_tokens = input_string.strip().split() + ["$"]
     stack = [0]
     steps = []
@@ -193,19 +157,27 @@ def simulate_slr_parsing(input_string, ACTION, GOTO, productions):
     idx = 0
     step = 1
 
+    if budget:
+        budget.start()
+
     while True:
+        if budget:
+            budget.check_step(step, idx, len(stack))
         current_state = stack[-1]
         current_token = input_tokens[idx]
 
         action = ACTION.get(current_state, {}).get(current_token)
 
-        stack_repr = ' '.join(str(s) for s in stack)
-        input_repr = ' '.join(input_tokens[idx:])
-        action_repr = str(action) if action else "ERROR"
-        steps.append((step, stack_repr, input_repr, action_repr))
+        if trace:
+            stack_repr = ' '.join(str(s) for s in stack)
+            input_repr = ' '.join(input_tokens[idx:])
+            action_repr = str(action) if action else "ERROR"
+            steps.append((step, stack_repr, input_repr, action_repr))
 
         if not action:
-            print("\n🚫 Parsing Error! String rejected.\n")
+            accepted = False
+            if verbose:
+                print("\n🚫 Parsing Error! String rejected.\n")
             break
 
         if action[0] == "shift":
@@ -224,46 +196,53 @@ def simulate_slr_parsing(input_string, ACTION, GOTO, productions):
             stack.append(GOTO[top_state][lhs])
 
         elif action[0] == "accept":
-            print("\n✅ String accepted by the grammar!\n")
+            accepted = True
+            if verbose:
+                print("\n✅ String accepted by the grammar!\n")
             break
 
         step += 1
 
-    print("\n=== PARSING STEPS ===")
-    print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
-    print("-" * 70)
-    for s in steps:
-        print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+    if verbose and trace:
+        print("\n=== PARSING STEPS ===")
+        print(f"{'Step':<5} | {'Stack':<30} | {'Input':<15} | {'Action'}")
+        print("-" * 70)
+        for s in steps:
+            print(f"{s[0]:<5} | {s[1]:<30} | {s[2]:<15} | {s[3]}")
+
+    # Without trace, only the number of steps is kept
+    return accepted, steps if trace else step
 
 # -------------------------------
 # 7. Run It All
 # -------------------------------
 
-states, transitions = build_canonical_collection(grammar, augmented_start)
-follow = compute_follow(grammar, start_symbol)
-ACTION, GOTO, productions = build_slr_parsing_table(states, transitions, grammar, augmented_start, follow)
-
-# Print item sets
-for i, state in enumerate(states):
-    print(f"\nItem Set I{i}:")
-    for lhs, rhs in sorted(state):
-        print(f"  {lhs} -> {rhs}")
-
-# Print parsing tables
-print("\n=== ACTION TABLE ===")
-for state in sorted(ACTION):
-    for symbol in sorted(ACTION[state]):
-        print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
-
-print("\n=== GOTO TABLE ===")
-for state in sorted(GOTO):
-    for symbol in sorted(GOTO[state]):
-        print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
-
-print("\n=== PRODUCTIONS ===")
-for i, (lhs, rhs) in enumerate(productions):
-    print(f"{i}: {lhs} → {rhs}")
-
-# Try it out
-test_string = "c d d"
-simulate_slr_parsing(test_string, ACTION, GOTO, productions)
\ No newline at end of file
+if __name__ == "__main__":
+    states, transitions = build_canonical_collection(grammar, augmented_start)
+    follow = compute_follow(grammar, start_symbol)
+    ACTION, GOTO, productions = build_slr_parsing_table(states, transitions, grammar, augmented_start, follow)
+
+    # Print item sets
+    for i, state in enumerate(states):
+        print(f"\nItem Set I{i}:")
+        for lhs, rhs in sorted(state):
+            print(f"  {lhs} -> {rhs}")
+
+    # Print parsing tables
+    print("\n=== ACTION TABLE ===")
+    for state in sorted(ACTION):
+        for symbol in sorted(ACTION[state]):
+            print(f"ACTION[{state}, '{symbol}'] = {ACTION[state][symbol]}")
+
+    print("\n=== GOTO TABLE ===")
+    for state in sorted(GOTO):
+        for symbol in sorted(GOTO[state]):
+            print(f"GOTO[{state}, '{symbol}'] = {GOTO[state][symbol]}")
+
+    print("\n=== PRODUCTIONS ===")
+    for i, (lhs, rhs) in enumerate(productions):
+        print(f"{i}: {lhs} → {rhs}")
+
+    # Try it out
+    test_string = "c d d"
+    simulate_slr_parsing(test_string, ACTION, GOTO, productions)
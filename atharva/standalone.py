@@ -0,0 +1,188 @@
+import py_compile
+import sys
+
+from compiled_grammar import CompiledGrammar
+from lr_select import select_table
+from packed_tables import PackedTables
+from precedence import Precedence, parse_grammar
+
+# -------------------------------
+# Standalone parser modules
+# -------------------------------
+#
+# Writes a self-contained Python module for one grammar: the packed tables
+# from packed_tables as tuple constants plus a small driver, in the spirit
+# of Lark's standalone mode. Importing the module only loads constants, so
+# startup costs no grammar analysis and the builders need not be deployed.
+#
+# Run with: python standalone.py grammar.txt parser_module.py
+# where grammar.txt holds 'E -> E + T | T' lines (see parse_rules), and
+# optionally %left/%right/%nonassoc lines (see precedence.py).
+
+# The parts of the driver both backends share (direct_codegen.py fills in
+# the middle of parse itself): token ids, ParseError, the head of parse and
+# accepts
+DRIVER_HEAD = '''
+TOKEN_IDS = {name: i for i, name in enumerate(SYMBOLS[:N_TERMINALS])}
+
+class ParseError(Exception):
+    def __init__(self, token, position, expected):
+        super().__init__(f"Unexpected {token!r} at token {position}, expected one of {expected}")
+        self.token = token
+        self.position = position
+        self.expected = expected
+
+def parse(tokens, on_reduce=None):
+    """Parse a whitespace-separated string or a sequence of token names.
+
+    on_reduce(lhs, children) builds the value of each reduction from the
+    values of its right-hand side (token names for terminals); by default
+    the result is a tree of (lhs, children) tuples. Raises ParseError.
+    """
+    if isinstance(tokens, str):
+        tokens = tokens.split()
+    tokens = list(tokens) + ["$"]
+'''
+
+DRIVER_TAIL = '''
+def accepts(tokens):
+    try:
+        parse(tokens, on_reduce=_discard)
+    except ParseError:
+        return False
+    return True
+
+def _discard(lhs, children):
+    return None
+'''
+
+DRIVER = DRIVER_HEAD + '''    action_row, action_base, action_table = ACTION_ROW, ACTION_BASE, ACTION_TABLE
+    action_check, default_action = ACTION_CHECK, DEFAULT_ACTION
+    goto_row, goto_base, goto_table = GOTO_ROW, GOTO_BASE, GOTO_TABLE
+    goto_check, default_goto = GOTO_CHECK, DEFAULT_GOTO
+    prod_lhs, prod_len, symbols, token_ids = PROD_LHS, PROD_LEN, SYMBOLS, TOKEN_IDS
+
+    states = [0]
+    values = []
+    position = 0
+    terminal = token_ids.get(tokens[0], -1)
+    while True:
+        state = states[-1]
+        if terminal >= 0:
+            row = action_row[state]
+            i = action_base[row] + terminal
+            code = action_table[i] if action_check[i] == row else default_action[state]
+        else:
+            # An unknown token: run default reductions up to a state that
+            # lists what it expects, then fail there
+            code = default_action[state]
+            if code == -1:
+                code = 0
+        if code > 0:
+            states.append(code - 1)
+            values.append(tokens[position])
+            position += 1
+            terminal = token_ids.get(tokens[position], -1)
+        elif code == -1:
+            return values[0]
+        elif code < 0:
+            prod = -code - 1
+            n = prod_len[prod]
+            lhs = prod_lhs[prod]
+            children = values[len(values) - n:]
+            if n:
+                del states[-n:]
+                del values[-n:]
+            name = symbols[lhs]
+            values.append(on_reduce(name, children) if on_reduce else (name, children))
+            state = states[-1]
+            column = lhs - N_TERMINALS
+            row = goto_row[state]
+            i = goto_base[row] + column
+            states.append(goto_table[i] if goto_check[i] == row else default_goto[column])
+        else:
+            raise ParseError(tokens[position], position, expected_tokens(state))
+
+def expected_tokens(state):
+    # Explicit 0 entries are %nonassoc error slots, not expected tokens
+    row = ACTION_ROW[state]
+    base = ACTION_BASE[row]
+    return [SYMBOLS[t] for t in range(N_TERMINALS) if ACTION_CHECK[base + t] == row and ACTION_TABLE[base + t]]
+''' + DRIVER_TAIL
+
+def tuple_constant(name, values, width=96):
+    """name = (...) wrapped to lines of about width characters"""
+    items = [repr(v) for v in values]
+    lines = []
+    line = ""
+    for item in items:
+        if line and len(line) + len(item) + 2 > width:
+            lines.append(line.rstrip())
+            line = ""
+        line += item + ", "
+    if line:
+        lines.append(line.rstrip())
+    if not lines:
+        return f"{name} = ()\n"
+    body = "".join(f"    {line}\n" for line in lines)
+    return f"{name} = (\n{body})\n"
+
+LABELS = {"lr0": "LR(0)", "slr1": "SLR(1)", "lalr1": "LALR(1)", "minimal_lr1": "Minimal LR(1)", "clr1": "CLR(1)"}
+
+def module_header(cg, selection, made_by, source=None):
+    """Module docstring naming the table kind and listing the grammar"""
+    lines = [
+        f'"""{LABELS[selection.algorithm]} parser for {cg.start}, {made_by}'
+        + (f" from {source}" if source else "") + ".",
+        "",
+        "Do not edit; regenerate from the grammar instead.",
+        "",
+        "Grammar:",
+    ]
+    lines += [f"    {cg.format_production(p)}" for p in range(1, cg.n_productions)]
+    if selection.precedence:
+        lines += ["", "Precedence, lowest first:"]
+        lines += [f"    %{assoc} {' '.join(names)}" for assoc, names in selection.precedence.declarations]
+        lines += [f"    %prec {name} on {lhs} -> {' '.join(rhs)}" for (lhs, rhs), name in selection.precedence.rule_prec.items()]
+        lines += [f"{len(selection.resolved)} shift/reduce conflicts were settled by precedence."]
+    if selection.conflicts:
+        lines += ["", f"{len(selection.conflicts)} conflicts were resolved: shift over reduce, then the earlier production."]
+    lines.append('"""')
+    return "\n".join(lines) + "\n\n"
+
+def generate_module(cg, selection, source=None):
+    """Source text of a standalone parser module for a TableSelection"""
+    packed = PackedTables.from_tables(cg, selection.action, selection.goto, errors=selection.errors)
+    parts = [module_header(cg, selection, "generated by atharva/standalone.py", source)]
+    parts.append(tuple_constant("SYMBOLS", cg.symbols))
+    parts.append(f"N_TERMINALS = {cg.n_terminals}\n")
+    parts.append(tuple_constant("PROD_LHS", packed.prod_lhs))
+    parts.append(tuple_constant("PROD_LEN", packed.prod_len))
+    for name in PackedTables.ARRAYS:
+        parts.append(tuple_constant(name.upper(), [int(v) for v in packed.arrays[name]]))
+    parts.append(DRIVER)
+    return "".join(parts)
+
+def load_grammar(grammar_path):
+    """(CompiledGrammar, Precedence or None) from a grammar file"""
+    with open(grammar_path) as f:
+        rules, declarations, rule_prec = parse_grammar(f.read())
+    cg = CompiledGrammar(rules)
+    return cg, Precedence(cg, declarations, rule_prec) if declarations else None
+
+def write_module(grammar_path, module_path, lr1="minimal_lr1"):
+    cg, precedence = load_grammar(grammar_path)
+    selection = select_table(cg, lr1, precedence=precedence)
+    with open(module_path, "w") as f:
+        f.write(generate_module(cg, selection, source=grammar_path))
+    # Ship the bytecode too: compiling the table literals is most of the
+    # import cost, unmarshalling them is about a millisecond
+    py_compile.compile(module_path)
+    return selection
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python standalone.py grammar.txt parser_module.py")
+        sys.exit(2)
+    selection = write_module(sys.argv[1], sys.argv[2])
+    print(f"✅ Wrote {sys.argv[2]}: {selection.algorithm}, {selection.n_states} states, {len(selection.conflicts)} conflicts")
@@ -0,0 +1,122 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from packed_tables import PackedTables, np
+
+# -------------------------------
+# Versioned binary table files
+# -------------------------------
+#
+# Layout, all integers native-endian:
+#
+#   magic  b"LRTB"
+#   u32    FORMAT_VERSION
+#   u32    length of the JSON header
+#   ...    JSON header, padded with spaces to a multiple of 8 bytes
+#   ...    int32 arrays back to back, as listed in header["arrays"]
+#
+# The header carries the byte order, whatever metadata the caller stores
+# (fingerprint, algorithm, symbols, ...) and the (offset, length) of each
+# array. Reading maps the file and slices the arrays straight out of the
+# mapping (numpy.frombuffer or memoryview.cast("i")), so nothing is parsed
+# besides the header. PackedTables copies the arrays into array("i") for
+# its lookups (see packed_tables.py), which is one memcpy per array.
+#
+# A file with the wrong magic, version or byte order, or a header that does
+# not parse, raises TableFileError, which callers treat as a cache miss.
+
+MAGIC = b"LRTB"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("=4sII")
+
+class TableFileError(ValueError):
+    pass
+
+def write_table_file(path, header, arrays):
+    """Write header (a JSON-able dict) and {name: int32 array} to path atomically"""
+    header = dict(header, byteorder=sys.byteorder, arrays={})
+    offset = 0
+    for name, values in arrays.items():
+        header["arrays"][name] = [offset, len(values)]
+        offset += 4 * len(values)
+    encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+    encoded += b" " * (-(PREFIX.size + len(encoded)) % 8)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        for values in arrays.values():
+            f.write(values.tobytes())
+    os.replace(tmp, path)
+
+def read_table_file(path):
+    """Map path and return (header, {name: int32 array view})"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < PREFIX.size:
+            raise TableFileError(f"{path}: truncated table file")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_len = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise TableFileError(f"{path}: not a table file")
+    if version != FORMAT_VERSION:
+        raise TableFileError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+    try:
+        header = json.loads(data[PREFIX.size:PREFIX.size + header_len])
+    except ValueError as e:  # JSONDecodeError, UnicodeDecodeError
+        raise TableFileError(f"{path}: corrupt header ({e})") from None
+    if not isinstance(header, dict) or not isinstance(header.get("arrays"), dict):
+        raise TableFileError(f"{path}: corrupt header")
+    if header.get("byteorder") != sys.byteorder:
+        raise TableFileError(f"{path}: written on a {header.get('byteorder')}-endian machine")
+
+    start = PREFIX.size + header_len
+    spans = _array_spans(path, header["arrays"])
+    if len(data) != start + sum(4 * length for _, length in spans.values()):
+        raise TableFileError(f"{path}: truncated table file")
+    arrays = {}
+    for name, (offset, length) in spans.items():
+        if np is not None:
+            arrays[name] = np.frombuffer(data, dtype=np.int32, count=length, offset=start + offset)
+        else:
+            arrays[name] = memoryview(data)[start + offset:start + offset + 4 * length].cast("i")
+    return header, arrays
+
+def _array_spans(path, entries):
+    """header["arrays"] checked to be [offset, length] pairs of ints that
+    tile the data section back to back, as write_table_file lays them out"""
+    spans = {}
+    for name, entry in entries.items():
+        if (not isinstance(entry, list) or len(entry) != 2
+                or not all(type(v) is int and v >= 0 for v in entry)):
+            raise TableFileError(f"{path}: corrupt header, array {name!r} is {entry!r}")
+        spans[name] = tuple(entry)
+    end = 0
+    for name, (offset, length) in sorted(spans.items(), key=lambda item: item[1]):
+        if offset != end:
+            raise TableFileError(f"{path}: corrupt header, array {name!r} at byte {offset}, expected {end}")
+        end += 4 * length
+    return spans
+
+# -------------------------------
+# Packed LR tables
+# -------------------------------
+
+def save_packed(path, packed, **meta):
+    header = dict(meta, symbols=packed.symbols, n_terminals=packed.n_terminals,
+                  prod_lhs=packed.prod_lhs, prod_len=packed.prod_len)
+    write_table_file(path, header, packed.arrays)
+
+def load_packed(path):
+    """(PackedTables over the mapped file, header)"""
+    header, arrays = read_table_file(path)
+    return packed_from(path, header, arrays), header
+
+def packed_from(path, header, arrays):
+    """PackedTables from what read_table_file returned for path"""
+    if set(arrays) != set(PackedTables.ARRAYS):
+        raise TableFileError(f"{path}: not a packed LR table")
+    return PackedTables(header["symbols"], header["n_terminals"], header["prod_lhs"], header["prod_len"], arrays)
@@ -0,0 +1,251 @@
+from collections import OrderedDict
+
+from compiled_grammar import CompiledGrammar
+
+# -------------------------------
+# Unit (chain) reductions
+# -------------------------------
+#
+# In E -> E + T | T, T -> T * F | F a lone identifier is reduced three
+# times, to F, to T and to E, before the parser can look at the next
+# token, and each of those unit reductions only renames the value on top of
+# the stack. Two ways to drop them, both optional:
+#
+# - UnitFreeGrammar rewrites the grammar: every A -> B with B a nonterminal
+#   is replaced by A -> w for each non-unit B -> w (through chains of unit
+#   productions too). The grammar gets more productions, and may need a
+#   stronger table than the original (select_table finds out).
+#
+# - ChainBypass rewrites built tables instead. When the parser enters
+#   state t from s0 on a nonterminal and t reduces by a unit production
+#   A -> B, that reduction always lands in goto(s0, A). So the edge is
+#   pointed at a merged state acting as goto(s0, A) on the lookaheads of
+#   the reduction and as t on every other lookahead, and the merge repeats
+#   while the new target has unit reductions of its own. States left
+#   unreachable are dropped and the rest renumbered. Accepting and
+#   rejecting are unchanged; as with default reductions, an error can only
+#   be noticed at a different reduction, never after a wrong shift.
+#
+# Both record what they elide, so the full concrete tree can be rebuilt:
+# UnitFreeGrammar.restore wraps the node of a rewritten production in the
+# chain it stands for, and ChainBypass.restore wraps the value on top of the
+# stack before a merged state acts on a lookahead whose unit reductions it
+# skipped. parse_tree takes the first as its after_reduce hook and the
+# tables behind the second (ChainBypass.elided) directly, which keeps the
+# lookup off the states that skipped nothing.
+
+def unit_productions(cg):
+    """Ids of the productions A -> B with B a nonterminal"""
+    return {p for p in range(1, cg.n_productions)
+            if len(cg.prod_rhs[p]) == 1 and not cg.is_terminal(cg.prod_rhs[p][0])}
+
+# -------------------------------
+# In the grammar
+# -------------------------------
+
+class UnitFreeGrammar:
+    def __init__(self, rules, start=None):
+        start = start or next(iter(rules))
+        rules = OrderedDict((lhs, [tuple(rhs) for rhs in prods]) for lhs, prods in rules.items())
+
+        def is_unit(rhs):
+            return len(rhs) == 1 and rhs[0] in rules
+
+        new_rules = OrderedDict()
+        origins = {}  # (lhs, rhs) -> the original productions it stands for, outermost first
+        for lhs in rules:
+            chains = {lhs: ()}
+            order = [lhs]
+            for B in order:
+                for rhs in rules[B]:
+                    if is_unit(rhs) and rhs[0] not in chains:
+                        chains[rhs[0]] = chains[B] + ((B, rhs),)
+                        order.append(rhs[0])
+            prods = new_rules[lhs] = []
+            for B in order:
+                for rhs in rules[B]:
+                    if not is_unit(rhs) and (lhs, rhs) not in origins:
+                        prods.append(rhs)
+                        origins[(lhs, rhs)] = chains[B] + ((B, rhs),)
+
+        # Nonterminals only reached through unit productions are gone
+        reachable = {start}
+        stack = [start]
+        while stack:
+            for rhs in new_rules[stack.pop()]:
+                for symbol in rhs:
+                    if symbol in new_rules and symbol not in reachable:
+                        reachable.add(symbol)
+                        stack.append(symbol)
+        self.start = start
+        self.rules = OrderedDict((lhs, prods) for lhs, prods in new_rules.items() if lhs in reachable)
+        self.origins = {key: chain for key, chain in origins.items() if key[0] in reachable}
+        self.cg = CompiledGrammar(self.rules, start)
+
+        # Per production id, the names to nest the node under, innermost
+        # last, or None when the production is an original one
+        self.chains = [None]
+        for lhs, rhs in self.cg.named_productions()[1:]:
+            chain = self.origins[(lhs, rhs)]
+            self.chains.append(tuple(B for B, _ in chain) if len(chain) > 1 else None)
+
+    @property
+    def n_elided(self):
+        """Productions whose reduction now stands for a chain of unit reductions"""
+        return sum(chain is not None for chain in self.chains)
+
+    def restore(self, prod, node):
+        """after_reduce hook for parse_tree: the node as the original grammar builds it"""
+        chain = self.chains[prod]
+        if chain is None:
+            return node
+        node = (chain[-1], node[1])
+        for name in reversed(chain[:-1]):
+            node = (name, [node])
+        return node
+
+    def parse_tree(self, action, goto_table, input_string, full=True):
+        return parse_tree(self.cg, action, goto_table, input_string, after_reduce=self.restore if full else None)
+
+# -------------------------------
+# In the tables
+# -------------------------------
+
+class ChainBypass:
+    def __init__(self, cg, action, goto_table):
+        self.cg = cg
+        units = unit_productions(cg)
+        action = [dict(row) for row in action]
+        goto_table = [dict(row) for row in goto_table]
+        elided = [{} for _ in action]  # state -> {terminal: unit productions skipped, innermost first}
+        merged = {}
+
+        def merge(state, other, prod):
+            """A state acting as other where state reduces by prod, else as state"""
+            key = (state, other, prod)
+            if key in merged:
+                return merged[key]
+            gotos = dict(goto_table[state])
+            for A, target in goto_table[other].items():
+                if gotos.setdefault(A, target) != target:
+                    merged[key] = None  # the two disagree on a goto; keep the reduction
+                    return None
+            row, wraps = {}, {}
+            for terminal, act in action[state].items():
+                if act == ("reduce", prod):
+                    follow = action[other].get(terminal)
+                    if follow is not None:
+                        row[terminal] = follow
+                        wraps[terminal] = (prod,) + elided[other].get(terminal, ())
+                else:
+                    row[terminal] = act
+                    if terminal in elided[state]:
+                        wraps[terminal] = elided[state][terminal]
+            m = merged[key] = len(action)
+            action.append(row)
+            goto_table.append(gotos)
+            elided.append(wraps)
+            return m
+
+        bypassed = 0
+        state = 0
+        while state < len(action):  # merged states are appended and walked too
+            for symbol, first in list(goto_table[state].items()):
+                target = first
+                for _ in range(cg.n_symbols):  # bounds A -> B -> A cycles
+                    prods = [act[1] for act in action[target].values() if act[0] == "reduce" and act[1] in units]
+                    if not prods:
+                        break
+                    prod = min(prods)
+                    other = goto_table[state].get(cg.prod_lhs[prod])
+                    m = merge(target, other, prod) if other is not None else None
+                    if m is None:
+                        break
+                    target = m
+                if target != first:
+                    goto_table[state][symbol] = target
+                    bypassed += 1
+            state += 1
+
+        # Drop the states no edge leads to any more
+        reachable = [False] * len(action)
+        reachable[0] = True
+        stack = [0]
+        while stack:
+            state = stack.pop()
+            targets = [act[1] for act in action[state].values() if act[0] == "shift"]
+            for target in targets + list(goto_table[state].values()):
+                if not reachable[target]:
+                    reachable[target] = True
+                    stack.append(target)
+        order = [state for state in range(len(action)) if reachable[state]]
+        new_id = {state: i for i, state in enumerate(order)}
+        self.action = [
+            {t: ("shift", new_id[act[1]]) if act[0] == "shift" else act for t, act in action[state].items()}
+            for state in order
+        ]
+        self.goto = [{A: new_id[target] for A, target in goto_table[state].items()} for state in order]
+        self.elided = [elided[state] for state in order]
+        self.bypassed = bypassed
+        self.merged = sum(m is not None for m in merged.values())
+        self.dropped = len(action) - len(order)
+
+    @property
+    def n_states(self):
+        return len(self.action)
+
+    def restore(self, state, terminal, value):
+        """The value on top of the stack wrapped in the unit reductions
+        skipped in state on terminal, for drivers of their own"""
+        for prod in self.elided[state].get(terminal, ()):
+            value = (self.cg.symbols[self.cg.prod_lhs[prod]], [value])
+        return value
+
+    def parse_tree(self, input_string, full=True):
+        return parse_tree(self.cg, self.action, self.goto, input_string, elided=self.elided if full else None)
+
+# -------------------------------
+# Tree driver
+# -------------------------------
+
+def parse_tree(cg, action, goto_table, input_string, elided=None, after_reduce=None):
+    """(lhs, children) tree for whitespace-separated tokens, with token names
+    as leaves, or None on a syntax error.
+
+    With elided (ChainBypass.elided), the value on top of the stack is
+    wrapped in the unit reductions a state skipped before it acts; with
+    after_reduce(prod, node) (UnitFreeGrammar.restore), each node a
+    reduction builds is passed through it.
+    """
+    ids = cg.symbol_ids
+    n_terminals, prod_lhs, prod_rhs, symbols = cg.n_terminals, cg.prod_lhs, cg.prod_rhs, cg.symbols
+    tokens = input_string.split()
+    terminals = [ids.get(token, -1) for token in tokens] + [0]
+    states = [0]
+    values = []
+    idx = 0
+    while True:
+        state = states[-1]
+        terminal = terminals[idx]
+        act = action[state].get(terminal) if 0 <= terminal < n_terminals else None
+        if act is None:
+            return None
+        if elided is not None and elided[state]:
+            for prod in elided[state].get(terminal, ()):
+                values[-1] = (symbols[prod_lhs[prod]], [values[-1]])
+        if act[0] == "shift":
+            states.append(act[1])
+            values.append(tokens[idx])
+            idx += 1
+        elif act[0] == "reduce":
+            prod = act[1]
+            n = len(prod_rhs[prod])
+            children = values[len(values) - n:]
+            if n:
+                del states[-n:]
+                del values[-n:]
+            node = (symbols[prod_lhs[prod]], children)
+            values.append(after_reduce(prod, node) if after_reduce is not None else node)
+            states.append(goto_table[states[-1]][prod_lhs[prod]])
+        else:
+            return values[0]
@@ -0,0 +1,79 @@
+import random
+import sys
+import time
+
+try:
+    import lark  # noqa: F401
+except ImportError:
+    print("⏭️  lark is not installed (pip install -r requirements.txt), skipping")
+    sys.exit(0)
+
+from parser import parse_expression
+from tree_json import to_d3_json
+
+# Differential check of the pratt engine against the Lark reference, then a
+# throughput comparison on long expressions. Exits cleanly when lark is not
+# installed.
+# Run with: python bench_engines.py
+
+OPERATORS = ["+", "-", "*", "/"]
+NUMBERS = ["0", "7", "42", "3.5", "10.", ".25", "1e3", "2.5E-2"]
+
+# Inputs the random ones are unlikely to hit: non-ASCII digits, which
+# Lark's common.NUMBER rejects
+FIXED_CASES = ["\uff11", "1 + \uff12", "\u0663 * 4", "1e\uff13", "(\u0968)"]
+
+def random_expression(rng, n_terms, depth=0):
+    parts = []
+    for i in range(n_terms):
+        if i:
+            parts.append(rng.choice(OPERATORS))
+        if depth < 4 and rng.random() < 0.2:
+            parts.append("(" + random_expression(rng, rng.randint(1, 4), depth + 1) + ")")
+        else:
+            parts.append(rng.choice(NUMBERS))
+    return rng.choice(["", " ", "\t"]).join(parts)
+
+def mutate(rng, expression):
+    # Drop or insert a character so both engines also see invalid input
+    pos = rng.randrange(len(expression) + 1)
+    if rng.random() < 0.5 and expression:
+        return expression[:pos] + expression[pos + 1:]
+    return expression[:pos] + rng.choice("()+*. x1e") + expression[pos:]
+
+def check_against_lark(cases=2000, seed=0):
+    rng = random.Random(seed)
+    expressions = list(FIXED_CASES)
+    for _ in range(cases):
+        expression = random_expression(rng, rng.randint(1, 8))
+        if rng.random() < 0.3:
+            expression = mutate(rng, expression)
+        expressions.append(expression)
+    for expression in expressions:
+        expected = parse_expression(expression, "lark")
+        actual = parse_expression(expression, "pratt")
+        expected = to_d3_json(expected) if expected is not None else None
+        actual = to_d3_json(actual) if actual is not None else None
+        assert actual == expected, f"engines disagree on {expression!r}"
+    print(f"✅ pratt matches lark on {len(expressions)} expressions")
+
+def time_engine(engine, expressions, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for expression in expressions:
+            parse_expression(expression, engine)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    check_against_lark()
+
+    rng = random.Random(1)
+    parse_expression("1", "lark")  # build the Lark tables outside the timing
+    print(f"\n{'Terms':<7} | {'lark (ms)':>10} | {'pratt (ms)':>10} | {'Speedup':>7}")
+    print("-" * 44)
+    for n_terms in (10, 100, 1000, 10000):
+        expressions = [random_expression(rng, n_terms) for _ in range(5)]
+        repeat = max(1, 2000 // n_terms)
+        lark = time_engine("lark", expressions, repeat) / (repeat * len(expressions))
+        pratt = time_engine("pratt", expressions, repeat) / (repeat * len(expressions))
+        print(f"{n_terms:<7} | {lark * 1000:>10.3f} | {pratt * 1000:>10.3f} | {lark / pratt:>6.1f}x")
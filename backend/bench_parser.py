@@ -0,0 +1,71 @@
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import lark  # noqa: F401
+except ImportError:
+    print("⏭️  lark is not installed (pip install -r requirements.txt), skipping")
+    sys.exit(0)
+
+import parser
+from bench_engines import mutate, random_expression
+from parser import grammar, build_parser, get_parser, load_parser
+from tree_json import to_d3_json
+
+# Differential check that parsers from the compiled parser cache (memoized
+# and read back from Lark's on-disk cache) give the same trees and errors
+# as a parser built from scratch, then per-request parse latency with and
+# without the cache. Exits cleanly when lark is not installed.
+# Run with: python bench_parser.py
+
+EXPRESSIONS = [
+    "6 + 9 - 9 + (51*9)/8",
+    "1 + 2 * 3",
+    "((((1 + 2) * 3) - 4) / 5)",
+    " + ".join(str(i) for i in range(200)),
+]
+REPEAT = 50
+
+def outcome(p, expression):
+    try:
+        return to_d3_json(p.parse(expression))
+    except lark.exceptions.LarkError as e:
+        return type(e).__name__
+
+def check_cache(cases=1000, seed=0):
+    rng = random.Random(seed)
+    expressions = list(EXPRESSIONS)
+    for _ in range(cases):
+        expression = random_expression(rng, rng.randint(1, 8))
+        expressions.append(mutate(rng, expression) if rng.random() < 0.3 else expression)
+    with tempfile.TemporaryDirectory() as directory:
+        parser.TABLE_CACHE_DIR = directory
+        load_parser(grammar)  # writes the on-disk cache
+        parsers = {"memoized": get_parser(), "from disk": load_parser(grammar)}
+        fresh = build_parser(grammar)
+        for expression in expressions:
+            expected = outcome(fresh, expression)
+            for name, p in parsers.items():
+                assert outcome(p, expression) == expected, f"{name} parser differs on {expression!r}"
+    print(f"✅ memoized and disk-cached parsers match an uncached Lark parser on {len(expressions)} expressions")
+
+def time_requests(get):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for expr in EXPRESSIONS:
+            get().parse(expr)
+    return (time.perf_counter() - start) / (REPEAT * len(EXPRESSIONS))
+
+if __name__ == "__main__":
+    check_cache()
+    uncached = time_requests(lambda: build_parser(grammar))
+    get_parser()  # warm the cache once, as the first request would
+    cached = time_requests(get_parser)
+
+    print(f"{'Mode':<10} | {'Per request (ms)':>16}")
+    print("-" * 30)
+    print(f"{'uncached':<10} | {uncached * 1000:>16.3f}")
+    print(f"{'cached':<10} | {cached * 1000:>16.3f}")
+    print(f"\nSpeedup: {uncached / cached:.1f}x")
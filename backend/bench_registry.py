@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+from table_cache import TableCache
+from table_file import PREFIX, TableFileError, read_table_file
+from table_registry import PARSE_LIMITS, TRACE_LIMITS, BudgetExceeded, TableRegistry, make_budget
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atharva"))
+from bench_tables import statement_grammar
+
+# Compile latency of the table registry cold, from memory and from the disk
+# cache, after checking the guards the service relies on: budgets reject
+# junk and stop parses that would never end, and LL(1) collisions are
+# reported instead of silently overwritten, and a corrupt cache file is
+# (unparsable header or bad array offsets) is rebuilt rather than failing
+# the compile.
+# Run with: python bench_registry.py
+
+# Not LL(1), and indirectly left-recursive: with A -> B a kept for x, the
+# parser expands A, B, A, B, ... on the input x without ever matching
+LOOPING = {"A": [["x"], ["B", "a"]], "B": [["y"], ["A", "b"]]}
+
+def check(directory):
+    for junk in (5, "fast", ["max_steps", 10]):
+        try:
+            make_budget(PARSE_LIMITS, junk)
+        except ValueError:
+            continue
+        raise AssertionError(f"make_budget accepted {junk!r}")
+    print("✅ make_budget rejects a budget that is not an object")
+
+    registry = TableRegistry(cache=TableCache(directory))
+    compiled = registry.compile(LOOPING, "ll1")
+    conflicts = compiled.summary()["conflicts"]
+    assert {(c["nonterminal"], c["terminal"]) for c in conflicts} == {("A", "x"), ("B", "y")}, conflicts
+    try:
+        compiled.parse("x", make_budget(PARSE_LIMITS, {"max_steps": 10000}))
+    except BudgetExceeded as e:
+        assert e.limit == "max_steps", e.result()
+    else:
+        raise AssertionError("LL(1) parse of a looping table finished")
+    print(f"✅ LL(1) reports {len(conflicts)} table conflicts and its parse stops at the step budget")
+
+    # Parses return a step count; the per-step trace only when asked for,
+    # and the endpoint caps traced parses with TRACE_LIMITS
+    rules = {"S": [["a", "S"], ["b"]]}
+    for algorithm in ("lr0", "slr1", "lalr1", "clr1", "minimal_lr1", "auto", "ll1"):
+        tables = TableRegistry().compile(rules, algorithm)
+        accepted, steps = tables.parse("a a a b")
+        traced, trace = tables.parse("a a a b", trace=True)
+        assert accepted and traced and steps == len(trace), (algorithm, steps, trace)
+    assert TRACE_LIMITS["max_steps"] < PARSE_LIMITS["max_steps"]
+    print("✅ parses return a step count unless the trace is asked for, for every algorithm")
+
+    reloaded = TableRegistry(cache=TableCache(directory)).compile(LOOPING, "ll1")
+    assert reloaded.cached and reloaded.summary()["conflicts"] == conflicts
+    print("✅ LL(1) conflicts survive the disk cache")
+
+    # A header that no longer parses is a cache miss, and the table is rebuilt
+    cache = TableCache(directory)
+    path = cache.path(compiled.handle, "ll1")
+    with open(path, "r+b") as f:
+        f.seek(PREFIX.size)
+        f.write(b'{"handle": \xff')
+    try:
+        read_table_file(path)
+    except TableFileError:
+        pass
+    else:
+        raise AssertionError("read_table_file accepted a corrupt header")
+    rebuilt = TableRegistry(cache=cache).compile(LOOPING, "ll1")
+    assert not rebuilt.cached and cache.misses == 1 and rebuilt.summary()["conflicts"] == conflicts
+    print("✅ a corrupt table file header is a cache miss")
+
+    # So are array offsets that are not ints, not 4-aligned or in the wrong
+    # place, for an LR table too
+    rules = {"S": [["a", "S"], ["b"]]}
+    handle = TableRegistry(cache=cache).compile(rules, "lalr1").handle
+    path = cache.path(handle, "lalr1")
+    with open(path, "rb") as f:
+        original = f.read()
+    for corrupt in (lambda span: [0.5, span[1]], lambda span: [span[0] + 2, span[1]],
+                    lambda span: [span[0] + 4, span[1]], lambda span: [span[0], -1]):
+        rewrite_arrays(path, original, corrupt)
+        try:
+            read_table_file(path)
+        except TableFileError:
+            pass
+        else:
+            raise AssertionError("read_table_file accepted a corrupt array offset")
+        misses = cache.misses
+        rebuilt = TableRegistry(cache=cache).compile(rules, "lalr1")
+        assert not rebuilt.cached and cache.misses == misses + 1 and rebuilt.parse("a a b")[0]
+    print("✅ corrupt array offsets in a table file are a cache miss")
+
+def rewrite_arrays(path, original, corrupt):
+    """original with corrupt([offset, length]) applied to its first array"""
+    _, _, header_len = PREFIX.unpack_from(original)
+    header = json.loads(original[PREFIX.size:PREFIX.size + header_len])
+    first = min(header["arrays"], key=lambda name: header["arrays"][name][0])
+    header["arrays"][first] = corrupt(header["arrays"][first])
+    encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+    encoded += b" " * (-(PREFIX.size + len(encoded)) % 8)
+    with open(path, "wb") as f:
+        f.write(PREFIX.pack(*PREFIX.unpack_from(original)[:2], len(encoded)))
+        f.write(encoded)
+        f.write(original[PREFIX.size + header_len:])
+
+def best_ms(run, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def report(directory, rules):
+    print(f"\nstatement_grammar(100), {len(rules)} nonterminals")
+    print(f"{'algorithm':<12} {'cold (ms)':>10} {'memory (ms)':>12} {'disk (ms)':>10}")
+    warm = TableRegistry(cache=TableCache(directory))
+    for algorithm in ("lalr1", "minimal_lr1", "clr1"):
+        cold = best_ms(lambda: TableRegistry().compile(rules, algorithm), repeat=1)
+        warm.compile(rules, algorithm)
+        memory = best_ms(lambda: warm.compile(rules, algorithm))
+        disk = best_ms(lambda: TableRegistry(cache=TableCache(directory)).compile(rules, algorithm))
+        print(f"{algorithm:<12} {cold:>10.1f} {memory:>12.3f} {disk:>10.1f}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        check(directory)
+        rules = {lhs: [list(rhs) for rhs in prods] for lhs, prods in statement_grammar(100).items()}
+        report(directory, rules)
@@ -0,0 +1,306 @@
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+
+import table_registry
+
+# Table builds as background jobs. Each job runs in its own worker process
+# and streams progress (states discovered, worklist length) back to the
+# service. Cancellation is cooperative: every builder reports each new state
+# to its budget, and the worker's budget checks a shared event there. Phases
+# that add no states (lookahead computation, table emission, LL(1)) cannot
+# notice it, so a worker still running CANCEL_GRACE seconds after a cancel
+# is terminated. Long CLR(1) builds periodically checkpoint their state
+# table and worklist to disk, so a job whose worker dies (or a service
+# restart) resumes from the last checkpoint instead of from scratch.
+
+JOB_DIR = os.environ.get("BUILD_JOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".build_jobs"))
+PROGRESS_INTERVAL = 0.25  # seconds between progress reports
+CHECKPOINT_INTERVAL = float(os.environ.get("BUILD_CHECKPOINT_INTERVAL", "30"))
+MAX_RESTARTS = 3
+CANCEL_GRACE = float(os.environ.get("BUILD_CANCEL_GRACE", "5"))
+
+# Jobs exist for builds too slow for a request, so only the size limits
+# apply to them, not the wall clock
+JOB_LIMITS = dict(table_registry.BUILD_LIMITS, max_seconds=None)
+
+class BuildCancelled(Exception):
+    pass
+
+# -------------------------------
+# Worker process side
+# -------------------------------
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def load_checkpoint(path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+class _JobBudget(table_registry.Budget):
+    """The job's limits, plus the cancel check and progress report on every new state"""
+
+    def __init__(self, job_id, events, cancel, **limits):
+        super().__init__(**limits)
+        self.job_id = job_id
+        self.events = events
+        self.cancel = cancel
+        self.last_report = 0.0
+
+    def check_build(self, states, items, queue=0):
+        if self.cancel.is_set():
+            raise BuildCancelled()
+        now = time.monotonic()
+        if now - self.last_report >= PROGRESS_INTERVAL:
+            self.events.put(("progress", self.job_id, {"states": states, "queue": queue}))
+            self.last_report = now
+        super().check_build(states, items, queue)
+
+def _run_build(job_id, spec, checkpoint_path, events, cancel):
+    last_checkpoint = time.monotonic()
+
+    def checkpoint(states, transitions, pending):
+        nonlocal last_checkpoint
+        now = time.monotonic()
+        if now - last_checkpoint >= CHECKPOINT_INTERVAL:
+            snapshot = (states, transitions, list(pending))
+            _write_atomic(checkpoint_path, pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))
+            events.put(("checkpoint", job_id, {"states": len(states), "queue": len(pending)}))
+            last_checkpoint = now
+
+    try:
+        grammar, start, algorithm = spec["grammar"], spec["start"], spec["algorithm"]
+        budget = _JobBudget(job_id, events, cancel, **spec["limits"])
+        if algorithm == "clr1":
+            resume = load_checkpoint(checkpoint_path)
+            if resume:
+                events.put(("resumed", job_id, {"states": len(resume[0]), "queue": len(resume[2])}))
+            built = table_registry.build_clr1(grammar, start, budget, checkpoint, resume)
+        else:
+            built = table_registry.ALGORITHMS[algorithm](grammar, start, budget)
+        if cancel.is_set():
+            raise BuildCancelled()
+        events.put(("done", job_id, built))
+    except BuildCancelled:
+        events.put(("cancelled", job_id, None))
+    except table_registry.BudgetExceeded as e:
+        events.put(("budget_exceeded", job_id, e.result()))
+    except Exception as e:
+        events.put(("failed", job_id, f"{type(e).__name__}: {e}"))
+
+# -------------------------------
+# Service side
+# -------------------------------
+
+class BuildJob:
+    def __init__(self, job_id, spec):
+        self.job_id = job_id
+        self.spec = spec
+        self.status = "queued"
+        self.progress = {"states": 0, "queue": 0}
+        self.error = None
+        self.restarts = 0
+        self.checkpoints = 0
+        self.created_at = time.time()
+        self.finished_at = None
+        self.process = None
+        self.cancel = None
+        self.cancelled_at = None  # monotonic time of the cancel request
+
+    def describe(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "algorithm": self.spec["algorithm"],
+            "handle": self.spec["handle"],
+            "progress": self.progress,
+            "checkpoints": self.checkpoints,
+            "restarts": self.restarts,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobManager:
+    def __init__(self, registry, job_dir=JOB_DIR):
+        self.registry = registry
+        self.job_dir = job_dir
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def _spec_path(self, job_id):
+        return os.path.join(self.job_dir, job_id + ".json")
+
+    def _checkpoint_path(self, job_id):
+        return os.path.join(self.job_dir, job_id + ".ckpt")
+
+    def start(self):
+        """Start the monitor and resume jobs left unfinished by a previous run"""
+        if self._monitor is not None:
+            return
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._stop.clear()
+        self._monitor = threading.Thread(target=self._watch, name="build-jobs", daemon=True)
+        self._monitor.start()
+        for filename in sorted(os.listdir(self.job_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.job_dir, filename)) as f:
+                    spec = json.load(f)
+                job = BuildJob(filename[:-len(".json")], spec)
+                with self._lock:
+                    self._jobs[job.job_id] = job
+                self._launch(job)
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            # Leave spec and checkpoint on disk so the next start resumes
+            if job.process is not None and job.process.is_alive():
+                job.process.terminate()
+                job.process.join()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+    def submit(self, grammar_spec, algorithm, start=None, limits=None):
+        grammar, start, handle = self.registry.prepare(grammar_spec, algorithm, start)
+        budget = table_registry.make_budget(JOB_LIMITS, limits)
+        spec = {
+            "grammar": grammar,
+            "start": start,
+            "algorithm": algorithm,
+            "handle": handle,
+            "limits": {name: getattr(budget, name) for name in JOB_LIMITS},
+        }
+        job = BuildJob(uuid.uuid4().hex, spec)
+        # Register before launching so the monitor never sees an unknown id
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        if self.registry.find(handle, algorithm, grammar, start) is not None:
+            job.status = "done"
+            job.finished_at = time.time()
+        else:
+            os.makedirs(self.job_dir, exist_ok=True)
+            with open(self._spec_path(job.job_id), "w") as f:
+                json.dump(spec, f)
+            self._launch(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status in ("queued", "running") and job.cancel is not None:
+                job.status = "cancelling"
+                job.cancelled_at = time.monotonic()
+                job.cancel.set()
+        return job
+
+    def _launch(self, job):
+        job.cancel = self._ctx.Event()
+        job.process = self._ctx.Process(
+            target=_run_build,
+            args=(job.job_id, job.spec, self._checkpoint_path(job.job_id), self._events, job.cancel),
+            daemon=True,
+        )
+        job.status = "running"
+        job.process.start()
+
+    def _finish(self, job, status, error=None):
+        """Settle a job once and return its final status. A cancel that was
+        requested wins over a build that finished anyway"""
+        with self._lock:
+            if job.finished_at is not None:
+                return job.status
+            if job.status == "cancelling" and status == "done":
+                status = "cancelled"
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+        for path in (self._spec_path(job.job_id), self._checkpoint_path(job.job_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return status
+
+    def _watch(self):
+        while not self._stop.is_set():
+            self._check_workers()
+            try:
+                kind, job_id, payload = self._events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            job = self.get(job_id)
+            if job is None or job.finished_at is not None:
+                continue
+            if kind in ("progress", "resumed"):
+                job.progress = payload
+            elif kind == "checkpoint":
+                job.progress = payload
+                job.checkpoints += 1
+            elif kind == "done":
+                if self._finish(job, "done") == "done":
+                    spec = job.spec
+                    compiled = table_registry.CompiledTables(
+                        spec["handle"], spec["algorithm"], spec["grammar"], spec["start"], built=payload
+                    )
+                    self.registry.add(compiled)
+            elif kind == "cancelled":
+                self._finish(job, "cancelled")
+            elif kind == "failed":
+                self._finish(job, "failed", payload)
+            elif kind == "budget_exceeded":
+                self._finish(job, "budget_exceeded", payload)
+
+    def _check_workers(self):
+        """Terminate workers that ignore a cancel and restart the ones that died"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.status in ("running", "cancelling")]
+        for job in jobs:
+            if job.process is None:
+                continue
+            if job.process.is_alive():
+                if job.status == "cancelling" and time.monotonic() - job.cancelled_at > CANCEL_GRACE:
+                    # Stuck in a phase that never checks the cancel event
+                    job.process.terminate()
+                    job.process.join()
+                    self._finish(job, "cancelled")
+                continue
+            # Died without reporting a result; give it a moment to drain
+            # its last message before deciding it crashed
+            job.process.join()
+            if not self._events.empty():
+                continue
+            if job.status == "cancelling":
+                self._finish(job, "cancelled")
+            elif job.restarts < MAX_RESTARTS:
+                job.restarts += 1
+                self._launch(job)
+            else:
+                self._finish(job, "failed", f"Worker exited with code {job.process.exitcode}")
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+# Hot-reloadable grammars loaded from <name>.lark files in a directory.
+#
+# Readers never lock: they grab the current snapshot (an immutable dict of
+# name -> GrammarVersion) with a single attribute read. A background watcher
+# compiles changed files off the request path and publishes a brand new
+# snapshot, so requests already running keep the parser they started with
+# and new requests see the new one (read-copy-update). Loads themselves are
+# serialized, so a grammar is never compiled twice at once and versions are
+# published in the order they were numbered.
+
+GRAMMAR_SUFFIX = ".lark"
+POLL_INTERVAL = float(os.environ.get("GRAMMAR_POLL_INTERVAL", "1.0"))
+HISTORY_SIZE = int(os.environ.get("GRAMMAR_HISTORY_SIZE", "3"))
+
+class GrammarVersion:
+    __slots__ = ("name", "version", "fingerprint", "text", "parser", "mtime", "loaded_at")
+
+    def __init__(self, name, version, text, parser, mtime):
+        self.name = name
+        self.version = version
+        self.fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.text = text
+        self.parser = parser
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+        }
+
+class GrammarStore:
+    def __init__(self, directory, compile_grammar, history_size=HISTORY_SIZE, poll_interval=POLL_INTERVAL):
+        self.directory = directory
+        self.compile_grammar = compile_grammar
+        self.history_size = history_size
+        self.poll_interval = poll_interval
+        self.errors = {}  # name -> message from the last failed reload
+
+        self._snapshot = {}
+        self._history = {}  # name -> deque of the other kept versions, by version number
+        self._versions = {}  # name -> last version number handed out
+        self._write_lock = threading.Lock()
+        self._load_lock = threading.Lock()  # taken before _write_lock, never after
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- readers (lock-free) ----
+
+    def current(self, name):
+        version = self._snapshot.get(name)
+        if version is None:
+            # First use before the watcher has run: load on this thread,
+            # unless the watcher or another request got there while we waited
+            with self._load_lock:
+                version = self._snapshot.get(name)
+                if version is None:
+                    self._reload(name)
+                    version = self._snapshot.get(name)
+            if version is None:
+                raise KeyError(f"Unknown grammar {name!r}: {self.errors.get(name, 'no such file')}")
+        return version
+
+    def versions(self):
+        snapshot = self._snapshot
+        return {
+            name: {
+                "current": version.describe(),
+                "history": [old.describe() for old in self._history.get(name, ())],
+                "error": self.errors.get(name),
+            }
+            for name, version in snapshot.items()
+        }
+
+    # ---- writers ----
+
+    def path_for(self, name):
+        return os.path.join(self.directory, name + GRAMMAR_SUFFIX)
+
+    def reload(self, name):
+        """Compile <name>.lark if it changed and swap it in; returns True on swap"""
+        with self._load_lock:
+            return self._reload(name)
+
+    def _reload(self, name):
+        path = self.path_for(name)
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path) as f:
+                text = f.read()
+        except OSError as e:
+            self.errors[name] = str(e)
+            return False
+
+        old = self._snapshot.get(name)
+        if old is not None and old.mtime == mtime:
+            return False
+        if old is not None and old.text == text:
+            # Touched but unchanged; remember the mtime and keep the parser
+            self._publish(name, GrammarVersion(name, old.version, text, old.parser, mtime), keep_old=False)
+            return False
+
+        # The expensive part happens before taking the write lock, so
+        # readers never wait on it; a broken grammar leaves the old version
+        # serving
+        try:
+            parser = self.compile_grammar(text)
+        except Exception as e:
+            self.errors[name] = str(e)
+            print(f"Grammar {name!r} failed to compile, keeping the current version:", e)
+            return False
+
+        self.errors.pop(name, None)
+        with self._write_lock:
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+        self._publish(name, GrammarVersion(name, version, text, parser, mtime))
+        return True
+
+    def rollback(self, name, version=None):
+        """Swap a kept version back in: by default the newest one older than
+        the current, otherwise the given version number, which may be newer
+        to roll forward again. The current version stays in history.
+        Returns the version swapped in, or None if there is none"""
+        with self._load_lock, self._write_lock:
+            current = self._snapshot.get(name)
+            history = self._history.get(name)
+            if current is None or not history:
+                return None
+            if version is None:
+                older = [old for old in history if old.version < current.version]
+                target = older[-1] if older else None
+            else:
+                target = next((old for old in history if old.version == version), None)
+            if target is None:
+                return None
+            history.remove(target)
+            self._keep(name, current)
+            # Stamp it with the file's current mtime so the watcher does not
+            # immediately reapply the file; the next edit will
+            try:
+                mtime = os.path.getmtime(self.path_for(name))
+            except OSError:
+                mtime = target.mtime
+            target = GrammarVersion(name, target.version, target.text, target.parser, mtime)
+            snapshot = dict(self._snapshot)
+            snapshot[name] = target
+            self._snapshot = snapshot
+            return target
+
+    def _publish(self, name, version, keep_old=True):
+        with self._write_lock:
+            old = self._snapshot.get(name)
+            if keep_old and old is not None:
+                self._keep(name, old)
+            snapshot = dict(self._snapshot)
+            snapshot[name] = version
+            self._snapshot = snapshot  # the atomic swap
+
+    def _keep(self, name, old):
+        # After a rollback the version replaced is not always the newest, so
+        # keep history sorted; when it is full the oldest number drops out
+        history = list(self._history.get(name, ())) + [old]
+        history.sort(key=lambda kept: kept.version)
+        self._history[name] = deque(history[-self.history_size:], maxlen=self.history_size)
+
+    def scan(self):
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError as e:
+            print("Cannot read grammar directory:", e)
+            return
+        for filename in sorted(filenames):
+            if filename.endswith(GRAMMAR_SUFFIX):
+                self.reload(filename[:-len(GRAMMAR_SUFFIX)])
+
+    # ---- background watcher ----
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.scan()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="grammar-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.scan()
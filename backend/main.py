@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from lexer import tokenize
-from parser import parse_expression
-import json
+from build_jobs import JobManager
+from table_registry import BUILD_LIMITS, PARSE_LIMITS, TRACE_LIMITS, BudgetExceeded, TableRegistry, make_budget
+from table_cache import TableCache
+from parser import DEFAULT_ENGINE, ENGINES, grammars, parse_expression
+from tree_json import iter_d3_json
+from tree_window import ParseResultCache, read_budget
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Watch grammars/ and hot-swap parsers while the service runs
+    grammars.start()
+    jobs.start()
+    yield
+    jobs.stop()
+    grammars.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for frontend-backend communication
 app.add_middleware(
@@ -15,6 +31,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+parse_results = ParseResultCache()
+# Tables also persist on disk so restarts map them back in instead of rebuilding
+tables = TableRegistry(cache=TableCache())
+jobs = JobManager(tables)
+
 @app.post("/tokenize")
 async def analyze_code(data: dict):
     cpp_code = data.get("code", "")
@@ -30,9 +51,124 @@ async def parse_code(data: dict):
     if not cpp_code:
         raise HTTPException(status_code=400, detail="No C++ code provided")
 
-    parse_tree = parse_expression(cpp_code)
-    print(parse_tree)
-    return {"parse_tree": parse_tree}
+    engine = data.get("engine", DEFAULT_ENGINE)
+    if not isinstance(engine, str) or engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine, expected one of {sorted(ENGINES)}")
+
+    parse_tree = parse_expression(cpp_code, engine)
+    if parse_tree is None:
+        return {"parse_tree": None}
+
+    # Full trees are only sent when explicitly asked for (e.g. for export)
+    if data.get("full"):
+        return StreamingResponse(stream_parse_tree(parse_tree), media_type="application/json")
+
+    max_depth, max_nodes = request_budget(data)
+    result_id, tree = parse_results.put(parse_tree)
+    return {
+        "result_id": result_id,
+        "node_count": len(tree.nodes),
+        "parse_tree": tree.window(0, max_depth, max_nodes),
+    }
+
+@app.post("/parse/{result_id}/subtree")
+async def parse_subtree(result_id: str, data: dict):
+    tree = parse_results.get(result_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Parse result expired or unknown")
+    index = tree.resolve(data.get("handle"))
+    if index is None:
+        raise HTTPException(status_code=400, detail="Invalid subtree handle")
+
+    max_depth, max_nodes = request_budget(data)
+    return {"result_id": result_id, "parse_tree": tree.window(index, max_depth, max_nodes)}
+
+@app.get("/grammars")
+async def list_grammars():
+    return {"grammars": grammars.versions()}
+
+@app.post("/grammars/{name}/rollback")
+async def rollback_grammar(name: str, version: Optional[int] = None):
+    # Without a version, back to the one before the current; with one, to
+    # any kept version, including the newer ones a rollback set aside
+    swapped = grammars.rollback(name, version)
+    if swapped is None:
+        raise HTTPException(status_code=404, detail="No such version to roll back to")
+    return {"grammar": swapped.describe()}
+
+# Plain (non-async) handlers so table builds run in the threadpool
+# Budgets come from the server caps, optionally tightened by the request's
+# "budget" object; running over returns 422 with the partial statistics
+@app.post("/tables")
+def compile_tables(data: dict):
+    try:
+        budget = make_budget(BUILD_LIMITS, data.get("budget"))
+        compiled = tables.compile(data.get("grammar"), data.get("algorithm", "lalr1"), data.get("start"), budget)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=e.result())
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return compiled.summary()
+
+@app.post("/tables/{handle}/parse")
+def parse_with_tables(handle: str, data: dict):
+    compiled = tables.get(handle)
+    if compiled is None:
+        raise HTTPException(status_code=404, detail="Unknown or evicted table handle, compile the grammar again")
+    # "steps" is a count; "trace": true also returns each step, under the
+    # much smaller TRACE_LIMITS step cap
+    trace = data.get("trace", False)
+    if not isinstance(trace, bool):
+        raise HTTPException(status_code=400, detail="trace must be true or false")
+    try:
+        budget = make_budget(TRACE_LIMITS if trace else PARSE_LIMITS, data.get("budget"))
+        accepted, steps = compiled.parse(data.get("input", ""), budget, trace)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=e.result())
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if trace:
+        return {"handle": handle, "accepted": accepted, "steps": len(steps), "trace": [list(step) for step in steps]}
+    return {"handle": handle, "accepted": accepted, "steps": steps}
+
+@app.get("/tables")
+def table_stats():
+    return tables.stats()
+
+# Long builds (e.g. CLR(1) on big grammars) run as background jobs
+@app.post("/jobs")
+def submit_job(data: dict):
+    try:
+        job = jobs.submit(data.get("grammar"), data.get("algorithm", "clr1"), data.get("start"), data.get("budget"))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.describe()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.describe()
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.describe()
+
+def request_budget(data):
+    try:
+        return read_budget(data)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="max_depth and max_nodes must be integers")
+
+def stream_parse_tree(parse_tree):
+    # Encode straight into the response body; no intermediate dicts
+    yield '{"parse_tree":'
+    yield from iter_d3_json(parse_tree)
+    yield '}'
     
 
 # Run with: uvicorn main:app --reload
\ No newline at end of file
@@ -1,74 +1,105 @@
 from lark import Lark, Transformer, Token
-import json
+from lark.exceptions import LarkError
+import hashlib
+import os
+import threading
+from grammar_store import GrammarStore
+from pratt import ExpressionSyntaxError, parse_arithmetic
+from tree_json import TreeNode
 
-# Define the grammar
-grammar = """
-    ?start: expr
-    ?expr: expr "+" term   -> add
-         | expr "-" term   -> sub
-         | term
-    ?term: term "*" factor -> mul
-         | term "/" factor -> div
-         | factor
-    ?factor: NUMBER        -> number
-           | "(" expr ")"  -> paren
-    %import common.NUMBER
-    %import common.WS
-    %ignore WS
-"""
+# Grammars live in grammars/*.lark and are hot-reloaded by grammar_store.
+# The arithmetic grammar is the one /parse serves; the text read at import
+# is the bootstrap version.
+GRAMMAR_DIR = os.environ.get("GRAMMAR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "grammars"))
+DEFAULT_GRAMMAR = "arithmetic"
 
-# Transformer to convert parse tree into JSON for react-d3-tree
+with open(os.path.join(GRAMMAR_DIR, DEFAULT_GRAMMAR + ".lark")) as f:
+    grammar = f.read()
+
+# Transformer to convert parse tree into TreeNodes for react-d3-tree.
+# It runs inline with the LALR parser, so nodes are built bottom-up on the
+# parser's own value stack instead of by recursing over a finished tree.
 class JsonTreeTransformer(Transformer):
     def add(self, children):
-        # print("add children:", children)
         subtrees = [c for c in children if not isinstance(c, Token)]
-        return {'name': '+', 'children': subtrees}
+        return TreeNode('+', subtrees)
     
     def sub(self, children):
-        # print("sub children:", children)
         subtrees = [c for c in children if not isinstance(c, Token)]
-        return {'name': '-', 'children': subtrees}
+        return TreeNode('-', subtrees)
     
     def mul(self, children):
-        # print("mul children:", children)
         subtrees = [c for c in children if not isinstance(c, Token)]
-        return {'name': '*', 'children': subtrees}
+        return TreeNode('*', subtrees)
     
     def div(self, children):
-        # print("div children:", children)
         subtrees = [c for c in children if not isinstance(c, Token)]
-        return {'name': '/', 'children': subtrees}
+        return TreeNode('/', subtrees)
     
     def number(self, children):
-        # print("number children:", children)
-        return {'name': children[0].value, 'children': []}
+        return TreeNode(children[0].value)
     
     def paren(self, children):
-        # print("paren children:", children)
         return children[0]  # Just return the transformed expr
     
     # Handle pass-through rules
     def expr(self, children):
-        # print("expr children:", children)
         return children[0]
     
     def term(self, children):
-        # print("term children:", children)
         return children[0]
     
     def factor(self, children):
-        # print("factor children:", children)
         return children[0]
 
-# Parse the expression and output JSON
-def parse_expression(expression):
-    parser = Lark(grammar, parser='lalr', transformer=JsonTreeTransformer())
+# Compiled parsers, keyed by grammar fingerprint. Building the LALR tables
+# costs far more than a parse, so each grammar is only analyzed once per
+# process, and Lark's on-disk cache keeps new processes warm too.
+TABLE_CACHE_DIR = os.environ.get(
+    "PARSER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".parser_cache")
+)
+_parsers = {}
+_parsers_lock = threading.Lock()
+
+def grammar_fingerprint(grammar_text):
+    return hashlib.sha256(grammar_text.encode("utf-8")).hexdigest()
+
+def build_parser(grammar_text, cache_path=None):
+    return Lark(grammar_text, parser='lalr', transformer=JsonTreeTransformer(), cache=cache_path or False)
+
+def load_parser(grammar_text):
+    """Build a parser backed by the on-disk table cache, without memoizing it"""
+    os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+    cache_path = os.path.join(TABLE_CACHE_DIR, grammar_fingerprint(grammar_text) + ".lark")
+    return build_parser(grammar_text, cache_path)
+
+def get_parser(grammar_text=grammar):
+    key = grammar_fingerprint(grammar_text)
+    parser = _parsers.get(key)
+    if parser is None:
+        with _parsers_lock:
+            # Another thread may have built it while we were waiting
+            parser = _parsers.get(key)
+            if parser is None:
+                parser = load_parser(grammar_text)
+                _parsers[key] = parser
+    return parser
+
+# Hot-reloaded grammars; versions hold their own parsers, so they bypass the
+# fingerprint cache above and old versions can be garbage collected
+grammars = GrammarStore(GRAMMAR_DIR, load_parser)
+
+# Parse engines for the grammar above. "lark" is the reference
+# implementation; "pratt" is the hand-written precedence-climbing fast path.
+ENGINES = {
+    "lark": lambda expression: grammars.current(DEFAULT_GRAMMAR).parser.parse(expression),
+    "pratt": parse_arithmetic,
+}
+DEFAULT_ENGINE = "pratt"
+
+# Parse the expression into a TreeNode tree (encode it with tree_json)
+def parse_expression(expression, engine=DEFAULT_ENGINE):
     try:
-        parse_tree = parser.parse(expression)
-        print("---------------------------------------------------------------------")
-        print(json.dumps(parse_tree, indent=2))
-        print("---------------------------------------------------------------------")
-        return parse_tree
-    except Exception as e:
-        print("Syntax Error:", e)
+        return ENGINES[engine](expression)
+    except (LarkError, ExpressionSyntaxError):
         return None
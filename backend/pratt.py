@@ -0,0 +1,84 @@
+import re
+from tree_json import TreeNode
+
+# Hand-tuned precedence-climbing engine for the arithmetic grammar in
+# parser.py. It accepts exactly the same language and builds the same
+# TreeNode shape as Lark + JsonTreeTransformer, but skips the generic LALR
+# driver and per-rule callbacks. Operators and parentheses live on an
+# explicit stack, so deeply nested input never recurses.
+
+# Same token set as the Lark grammar: common.NUMBER, + - * / ( ) and WS.
+# re.ASCII keeps \d to 0-9 like common.NUMBER, so e.g. fullwidth digits are
+# rejected by both engines.
+TOKEN_RE = re.compile(
+    r"[ \t\f\r\n]+"
+    r"|((?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|([-+*/()])"
+    r"|(.)",
+    re.DOTALL | re.ASCII,
+)
+NUMBER, PUNCT, BAD = 1, 2, 3
+
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+class ExpressionSyntaxError(ValueError):
+    def __init__(self, message, pos):
+        super().__init__(f"{message} at position {pos}")
+        self.pos = pos
+
+def parse_arithmetic(expression):
+    operands = []
+    operators = []  # binary operators and "(" markers
+    expect_operand = True
+    pos = 0
+
+    for match in TOKEN_RE.finditer(expression):
+        kind = match.lastindex
+        if kind is None:
+            continue  # whitespace
+        pos = match.start()
+        value = match.group(kind)
+
+        if kind == BAD:
+            raise ExpressionSyntaxError(f"Unexpected character {value!r}", pos)
+
+        if expect_operand:
+            if kind == NUMBER:
+                operands.append(TreeNode(value))
+                expect_operand = False
+            elif value == "(":
+                operators.append(value)
+            else:
+                raise ExpressionSyntaxError(f"Expected a number or '(' but got {value!r}", pos)
+            continue
+
+        if kind == NUMBER or value == "(":
+            raise ExpressionSyntaxError(f"Expected an operator but got {value!r}", pos)
+
+        if value == ")":
+            while operators and operators[-1] != "(":
+                _reduce(operands, operators.pop())
+            if not operators:
+                raise ExpressionSyntaxError("Unmatched ')'", pos)
+            operators.pop()
+            continue
+
+        # Left-associative: pop everything that binds at least as tightly
+        prec = PRECEDENCE[value]
+        while operators and operators[-1] != "(" and PRECEDENCE[operators[-1]] >= prec:
+            _reduce(operands, operators.pop())
+        operators.append(value)
+        expect_operand = True
+
+    if expect_operand:
+        raise ExpressionSyntaxError("Unexpected end of input", len(expression))
+    while operators:
+        op = operators.pop()
+        if op == "(":
+            raise ExpressionSyntaxError("Unclosed '('", len(expression))
+        _reduce(operands, op)
+    return operands[0]
+
+def _reduce(operands, op):
+    right = operands.pop()
+    operands[-1] = TreeNode(op, [operands[-1], right])
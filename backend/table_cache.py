@@ -0,0 +1,127 @@
+import os
+
+import table_registry  # puts atharva/ and yash/ on sys.path
+from compiled_grammar import CompiledGrammar
+from ll1 import LL1Parser
+from packed_tables import PackedTables, int_array
+from table_file import TableFileError, packed_from, read_table_file, save_packed, write_table_file
+
+# Built tables on disk, one versioned table_file per grammar fingerprint and
+# algorithm, so a new process maps them back in instead of rebuilding. LR
+# tables are stored packed (without default reductions, so the simulate_*
+# drivers see exactly the table that was built) and parsed through
+# name-keyed views; the LL(1) parsing table is stored as a dense
+# nonterminal x terminal matrix of production numbers.
+
+TABLE_CACHE_DIR = os.environ.get(
+    "TABLE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".table_cache")
+)
+
+class TableCache:
+    def __init__(self, directory=TABLE_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def path(self, handle, algorithm):
+        return os.path.join(self.directory, f"{handle}.{algorithm}.tbl")
+
+    def load(self, handle, algorithm):
+        """The (tables, states, simulate) triple of a builder, or None"""
+        try:
+            header, arrays = read_table_file(self.path(handle, algorithm))
+            if header.get("handle") != handle or header.get("algorithm") != algorithm:
+                raise TableFileError("fingerprint mismatch")
+            if algorithm == "ll1":
+                built = _load_ll1(header, arrays)
+            else:
+                built = _load_lr(self.path(handle, algorithm), header, arrays)
+        except (OSError, ValueError, KeyError):  # ValueError covers TableFileError
+            self.misses += 1
+            return None
+        self.hits += 1
+        return built
+
+    def save(self, handle, algorithm, grammar, start, built):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(handle, algorithm)
+        if algorithm == "ll1":
+            _save_ll1(path, handle, built)
+        else:
+            _save_lr(path, handle, algorithm, grammar, start, built)
+        self.writes += 1
+
+    def stats(self):
+        return {"directory": self.directory, "hits": self.hits, "misses": self.misses, "writes": self.writes}
+
+# -------------------------------
+# LR tables
+# -------------------------------
+
+def _save_lr(path, handle, algorithm, grammar, start, built):
+    (ACTION, GOTO, productions), states, simulate = built
+    cg = CompiledGrammar(grammar, start)
+    ids = cg.symbol_ids
+    action = [{ids[t]: act for t, act in ACTION.get(state, {}).items()} for state in range(states)]
+    goto_table = [{ids[A]: target for A, target in GOTO.get(state, {}).items()} for state in range(states)]
+    packed = PackedTables.from_tables(cg, action, goto_table, default_reductions=False)
+    driver = next(name for name, fn in table_registry.DRIVERS.items() if fn is simulate)
+    save_packed(path, packed, handle=handle, algorithm=algorithm, driver=driver,
+                states=states, productions=[[lhs, list(rhs)] for lhs, rhs in productions])
+
+def _load_lr(path, header, arrays):
+    packed = packed_from(path, header, arrays)
+    ACTION, GOTO = packed.named_views()
+    productions = [(lhs, tuple(rhs)) for lhs, rhs in header["productions"]]
+    return (ACTION, GOTO, productions), header["states"], table_registry.DRIVERS[header["driver"]]
+
+# -------------------------------
+# LL(1) parsing table
+# -------------------------------
+
+def _save_ll1(path, handle, built):
+    parser = built[0]
+    nonterminals = list(parser.grammar)
+    terminals = sorted(parser.terminals)
+    productions = []
+    numbers = {}
+    matrix = []
+    for nt in nonterminals:
+        row = parser.parsing_table.get(nt, {})
+        for terminal in terminals:
+            prod = row.get(terminal)
+            if prod is None:
+                matrix.append(0)
+                continue
+            key = (nt, tuple(prod))
+            if key not in numbers:
+                numbers[key] = len(productions) + 1
+                productions.append(list(prod))
+            matrix.append(numbers[key])
+    header = {
+        "handle": handle,
+        "algorithm": "ll1",
+        "grammar": {nt: prods for nt, prods in parser.grammar.items()},
+        "start": parser.start_symbol,
+        "nonterminals": nonterminals,
+        "terminals": terminals,
+        "productions": productions,
+        "rows": len(parser.parsing_table),
+        "conflicts": [list(conflict) for conflict in parser.conflicts],
+    }
+    write_table_file(path, header, {"parsing_table": int_array(matrix)})
+
+def _load_ll1(header, arrays):
+    rules = {header["start"]: header["grammar"][header["start"]]}
+    rules.update(header["grammar"])
+    parser = LL1Parser(rules)
+    matrix, terminals, productions = arrays["parsing_table"], header["terminals"], header["productions"]
+    width = len(terminals)
+    for i, nt in enumerate(header["nonterminals"]):
+        for j, terminal in enumerate(terminals):
+            number = matrix[i * width + j]
+            if number:
+                parser.parsing_table[nt][terminal] = productions[number - 1]
+    parser.conflicts = [tuple(conflict) for conflict in header.get("conflicts", ())]
+    return parser, header["rows"], None
@@ -0,0 +1,359 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Compile user grammars with the table builders in atharva/ (LR) and yash/
+# (LL(1)) and keep the results in a registry keyed by grammar fingerprint.
+# The registry is an LRU bounded by the measured size of the tables, so many
+# grammars can be served without rebuilding and without unbounded memory.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _dir in ("atharva", "yash"):
+    _path = os.path.join(ROOT, _dir)
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+import lr0
+import slr1
+import clr1
+import lalr1
+import lr_tables
+import minimal_lr1
+import lr_select
+from budgets import Budget, BudgetExceeded
+from compiled_grammar import CompiledGrammar
+from lr0_automaton import LR0Automaton
+from lr1_automaton import LR1Automaton
+from ll1 import LL1Parser
+
+REGISTRY_MAX_BYTES = int(os.environ.get("TABLE_REGISTRY_MAX_BYTES", str(64 * 1024 * 1024)))
+EPSILON = "ε"
+
+def _env_limit(name, default, kind=int):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return kind(value) if value.strip() else None
+
+# Server-side caps for user grammars on shared hosts; requests may only
+# tighten them. An empty environment value disables that limit.
+BUILD_LIMITS = {
+    "max_states": _env_limit("BUILD_MAX_STATES", 20000),
+    "max_items": _env_limit("BUILD_MAX_ITEMS", 2000000),
+    "max_memory": _env_limit("BUILD_MAX_MEMORY", 256 * 1024 * 1024),
+    "max_seconds": _env_limit("BUILD_MAX_SECONDS", 10.0, float),
+}
+PARSE_LIMITS = {
+    "max_steps": _env_limit("PARSE_MAX_STEPS", 1000000),
+    "max_seconds": _env_limit("PARSE_MAX_SECONDS", 5.0, float),
+}
+# A parse asked to return its trace keeps a copy of the stack and the
+# remaining input per step, so it gets far fewer steps
+TRACE_LIMITS = dict(PARSE_LIMITS, max_steps=_env_limit("PARSE_TRACE_MAX_STEPS", 1000))
+
+def make_budget(defaults, overrides=None):
+    """A Budget of the server caps tightened by a request's overrides, its
+    clock started now so the whole request counts against max_seconds"""
+    if overrides is not None and not isinstance(overrides, dict):
+        raise ValueError("Budget must be an object of limits")
+    limits = dict(defaults)
+    for name, value in (overrides or {}).items():
+        if name not in limits or value is None:
+            continue
+        value = float(value) if name == "max_seconds" else int(value)
+        limits[name] = value if limits[name] is None else min(limits[name], value)
+    return Budget(**limits).start()
+
+# -------------------------------
+# Grammar input
+# -------------------------------
+
+def normalize_grammar(spec, start=None):
+    """Accept {"S": ["CC"], ...}, {"E": [["E", "+", "T"], ["T"]], ...} or
+    "S -> CC\nC -> cC | d" and validate it.
+
+    String alternatives are single characters with uppercase letters as
+    nonterminals. List alternatives are token sequences: a symbol is a
+    nonterminal if it is a key of the grammar and a terminal otherwise, so
+    tokens like "id" or "==" work. An empty alternative (or ε) is an
+    epsilon production. Productions come back as lists of symbols.
+    """
+    if isinstance(spec, str):
+        rules = {}
+        for line in spec.splitlines():
+            if not line.strip():
+                continue
+            if "->" not in line:
+                raise ValueError(f"Expected 'A -> ...' but got {line.strip()!r}")
+            lhs, rhs = line.split("->", 1)
+            rules.setdefault(lhs.strip(), []).extend(rhs.split("|"))
+        spec = rules
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Grammar must be a non-empty mapping or rule text")
+
+    grammar = {}
+    for lhs, alternatives in spec.items():
+        if not (isinstance(lhs, str) and lhs.split() == [lhs]):
+            raise ValueError(f"Nonterminal {lhs!r} must be a non-empty name without spaces")
+        if isinstance(alternatives, str):
+            alternatives = [alternatives]
+        prods = []
+        for alt in alternatives:
+            if isinstance(alt, str):
+                alt = "".join(alt.split())
+                symbols = [] if alt == EPSILON else list(alt)
+                for symbol in symbols:
+                    if symbol.isupper() and symbol not in spec:
+                        raise ValueError(f"Nonterminal {symbol} is used but never defined")
+            elif isinstance(alt, (list, tuple)):
+                symbols = []
+                for symbol in alt:
+                    if not (isinstance(symbol, str) and symbol.split() == [symbol]):
+                        raise ValueError(f"Symbol {symbol!r} in a production for {lhs} must be a non-empty token")
+                    if symbol != EPSILON:
+                        symbols.append(symbol)
+            else:
+                raise ValueError(f"Production for {lhs} must be a string or a list of symbols")
+            for symbol in symbols:
+                if symbol in (".", "$"):
+                    raise ValueError(f"{symbol!r} is reserved and cannot be a grammar symbol")
+            prods.append(symbols)
+        grammar[lhs] = prods
+
+    start = start or next(iter(grammar))
+    if start not in grammar:
+        raise ValueError(f"Start symbol {start!r} has no productions")
+    return grammar, start
+
+def grammar_fingerprint(grammar, start, algorithm):
+    canonical = json.dumps({"grammar": grammar, "start": start, "algorithm": algorithm}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# -------------------------------
+# Table builders
+# -------------------------------
+
+# The LR builders run on the integer-interned grammar from
+# compiled_grammar; their tables are converted back to names so the
+# simulate_* drivers can run them on whitespace-separated tokens.
+
+def build_lr0(grammar, start, budget=None):
+    cg = CompiledGrammar(grammar, start)
+    automaton = LR0Automaton(cg, budget)
+    action, goto, _ = lr_tables.build_lr0_table(cg, automaton)
+    return lr_tables.named_tables(cg, action, goto), automaton.n_states, lr0.simulate_lr0_parsing
+
+def build_slr1(grammar, start, budget=None):
+    cg = CompiledGrammar(grammar, start)
+    automaton = LR0Automaton(cg, budget)
+    action, goto, _ = lr_tables.build_slr_table(cg, automaton)
+    return lr_tables.named_tables(cg, action, goto), automaton.n_states, slr1.simulate_slr_parsing
+
+def build_clr1(grammar, start, budget=None, progress=None, resume=None):
+    cg = CompiledGrammar(grammar, start)
+    automaton = LR1Automaton.build(cg, budget, progress, resume)
+    action, goto, _ = lr_tables.build_lr1_table(cg, automaton)
+    return lr_tables.named_tables(cg, action, goto), automaton.n_states, clr1.simulate_clr_parsing
+
+def build_lalr1(grammar, start, budget=None):
+    cg = CompiledGrammar(grammar, start)
+    automaton = LR0Automaton(cg, budget)
+    action, goto, _ = lr_tables.build_lalr_table(cg, automaton)
+    return lr_tables.named_tables(cg, action, goto), automaton.n_states, lalr1.simulate_parsing
+
+def build_minimal_lr1(grammar, start, budget=None):
+    # Full LR(1) power at close to LALR(1) size; uses the CLR(1) driver
+    cg = CompiledGrammar(grammar, start)
+    automaton = minimal_lr1.build_minimal_lr1(cg, budget)
+    action, goto, _ = lr_tables.build_lr1_table(cg, automaton)
+    return lr_tables.named_tables(cg, action, goto), automaton.n_states, clr1.simulate_clr_parsing
+
+# simulate_* driver per LR table kind; lr_select's choice and the on-disk
+# table cache refer to drivers by these names
+DRIVERS = {
+    "lr0": lr0.simulate_lr0_parsing,
+    "slr1": slr1.simulate_slr_parsing,
+    "lalr1": lalr1.simulate_parsing,
+    "clr1": clr1.simulate_clr_parsing,
+}
+SELECTED_DRIVERS = dict(DRIVERS, minimal_lr1=clr1.simulate_clr_parsing)
+
+def build_auto(grammar, start, budget=None):
+    # The weakest of LR(0) < SLR(1) < LALR(1) < minimal LR(1) without conflicts
+    cg = CompiledGrammar(grammar, start)
+    selection = lr_select.select_table(cg, budget=budget)
+    tables = lr_tables.named_tables(cg, selection.action, selection.goto)
+    return tables, selection.n_states, SELECTED_DRIVERS[selection.algorithm]
+
+def build_ll1(grammar, start, budget=None):
+    # LL1Parser takes symbol lists and treats its first key as the start.
+    # Its table is bounded by |nonterminals| x |terminals|, so no budget
+    # checks are needed here; colliding entries end up in parser.conflicts
+    rules = {start: grammar[start]}
+    rules.update(grammar)
+    ll1_grammar = {lhs: [list(prod) or [EPSILON] for prod in prods] for lhs, prods in rules.items()}
+    parser = LL1Parser(ll1_grammar)
+    parser.remove_left_recursion()
+    parser.compute_first()
+    parser.compute_follow()
+    parser.build_parsing_table()
+    return parser, len(parser.parsing_table), None
+
+ALGORITHMS = {
+    "lr0": build_lr0,
+    "slr1": build_slr1,
+    "clr1": build_clr1,
+    "lalr1": build_lalr1,
+    "minimal_lr1": build_minimal_lr1,
+    "auto": build_auto,
+    "ll1": build_ll1,
+}
+
+def measure_size(obj):
+    """Approximate deep memory use of a table structure in bytes"""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+class CompiledTables:
+    def __init__(self, handle, algorithm, grammar, start, built=None, budget=None, cached=False):
+        # built is a (tables, states, simulate) triple from a builder that
+        # already ran elsewhere, e.g. in a build job worker, or loaded from
+        # the table cache (cached=True)
+        self.handle = handle
+        self.algorithm = algorithm
+        self.grammar = grammar
+        self.start = start
+        self.tables, self.states, self._simulate = built or ALGORITHMS[algorithm](grammar, start, budget)
+        self.cached = cached
+        self.size_bytes = measure_size(self.tables)
+
+    def parse(self, input_string, budget=None, trace=False):
+        """Returns (accepted, steps) for whitespace-separated input tokens:
+        the number of steps, or with trace the list of (step, stack, input,
+        action) tuples, which grows with steps times stack depth.
+
+        Raises BudgetExceeded if the driver runs past the budget.
+        """
+        if self.algorithm == "ll1":
+            return self.tables.parse(input_string, verbose=False, budget=budget, trace=trace)
+        action, goto, productions = self.tables
+        return self._simulate(input_string, action, goto, productions, verbose=False, budget=budget, trace=trace)
+
+    def summary(self):
+        summary = {
+            "handle": self.handle,
+            "algorithm": self.algorithm,
+            "start": self.start,
+            "states": self.states,
+            "size_bytes": self.size_bytes,
+        }
+        if self.algorithm == "ll1":
+            summary["conflicts"] = [
+                {"nonterminal": nt, "terminal": terminal, "kept": kept, "dropped": dropped}
+                for nt, terminal, kept, dropped in self.tables.conflicts
+            ]
+        return summary
+
+# -------------------------------
+# Registry
+# -------------------------------
+
+class TableRegistry:
+    def __init__(self, max_bytes=REGISTRY_MAX_BYTES, cache=None):
+        # cache is an optional table_cache.TableCache backing the LRU on disk
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, grammar_spec, algorithm, start=None):
+        """Validate a request and return (grammar, start, handle) without building"""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {sorted(ALGORITHMS)}")
+        grammar, start = normalize_grammar(grammar_spec, start)
+        return grammar, start, grammar_fingerprint(grammar, start, algorithm)
+
+    def compile(self, grammar_spec, algorithm, start=None, budget=None):
+        """Build (or fetch) tables; raises BudgetExceeded if the build runs over"""
+        grammar, start, handle = self.prepare(grammar_spec, algorithm, start)
+        compiled = self.find(handle, algorithm, grammar, start)
+        if compiled is not None:
+            return compiled
+
+        # Build outside the lock; a concurrent duplicate build is harmless
+        return self.add(CompiledTables(handle, algorithm, grammar, start, budget=budget))
+
+    def find(self, handle, algorithm, grammar, start):
+        """Tables already built, in memory or in the disk cache, or None"""
+        compiled = self.get(handle)
+        if compiled is not None:
+            return compiled
+        built = self.cache.load(handle, algorithm) if self.cache else None
+        if built is not None:
+            return self.add(CompiledTables(handle, algorithm, grammar, start, built=built, cached=True))
+        return None
+
+    def add(self, compiled):
+        handle = compiled.handle
+        if self.cache and not compiled.cached:
+            built = (compiled.tables, compiled.states, compiled._simulate)
+            try:
+                self.cache.save(handle, compiled.algorithm, compiled.grammar, compiled.start, built)
+            except OSError:
+                pass  # an unwritable cache directory only costs the persistence
+        with self._lock:
+            self.misses += 1
+            if handle not in self._entries:
+                self._entries[handle] = compiled
+                self.total_bytes += compiled.size_bytes
+                self._evict()
+            return self._entries.get(handle, compiled)
+
+    def get(self, handle):
+        with self._lock:
+            compiled = self._entries.get(handle)
+            if compiled is not None:
+                self._entries.move_to_end(handle)
+                self.hits += 1
+            return compiled
+
+    def _evict(self):
+        # Least recently used first; the newest entry always stays
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.total_bytes -= old.size_bytes
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk": self.cache.stats() if self.cache else None,
+            }
@@ -0,0 +1,59 @@
+from json.encoder import encode_basestring_ascii
+
+# Parse tree nodes and d3 JSON encoding for react-d3-tree.
+# Everything here walks the tree with an explicit stack, so arbitrarily
+# deep trees never hit Python's recursion limit.
+
+CHUNK_PARTS = 4096  # JSON fragments buffered per streamed chunk
+
+class TreeNode:
+    __slots__ = ("name", "children")
+
+    def __init__(self, name, children=None):
+        self.name = name
+        self.children = children if children is not None else []
+
+    def __repr__(self):
+        return f"TreeNode({self.name!r}, {len(self.children)} children)"
+
+def to_d3_json(root):
+    """Build the nested {'name', 'children'} dicts without recursion"""
+    result = {"name": root.name, "children": []}
+    stack = [(root, result)]
+    while stack:
+        node, out = stack.pop()
+        for child in node.children:
+            child_out = {"name": child.name, "children": []}
+            out["children"].append(child_out)
+            stack.append((child, child_out))
+    return result
+
+def iter_d3_json(root, chunk_parts=CHUNK_PARTS):
+    """Yield compact d3 JSON for the tree in chunks, without building dicts"""
+    buf = []
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            # Separator or closing bracket queued by a parent
+            buf.append(item)
+        elif item.children:
+            buf.append('{"name":' + encode_basestring_ascii(item.name) + ',"children":[')
+            stack.append("]}")
+            for i in range(len(item.children) - 1, -1, -1):
+                stack.append(item.children[i])
+                if i:
+                    stack.append(",")
+        else:
+            buf.append('{"name":' + encode_basestring_ascii(item.name) + ',"children":[]}')
+
+        if len(buf) >= chunk_parts:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+def write_d3_json(root, fp):
+    """Stream compact d3 JSON for the tree into a file-like object"""
+    for chunk in iter_d3_json(root):
+        fp.write(chunk)
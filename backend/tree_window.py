@@ -0,0 +1,110 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+# Depth/node-budget windows over parse trees, plus a server-side cache of
+# recent results so collapsed subtrees can be expanded on demand.
+#
+# A node's handle is its preorder index in the cached tree. The subtree
+# rooted at index i occupies indices i .. i + sizes[i] - 1, so children can
+# be walked from the index arrays alone.
+
+DEFAULT_MAX_DEPTH = None  # no depth limit unless the client asks for one
+DEFAULT_MAX_NODES = 500
+RESULT_CACHE_SIZE = int(os.environ.get("PARSE_RESULT_CACHE_SIZE", "128"))
+
+class IndexedTree:
+    __slots__ = ("nodes", "sizes")
+
+    def __init__(self, root):
+        nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(reversed(node.children))
+
+        # Children sit after their parent in preorder, so a reverse sweep
+        # always sees child sizes before the parent needs them
+        sizes = [1] * len(nodes)
+        for i in range(len(nodes) - 1, -1, -1):
+            j = i + 1
+            for _ in range(len(nodes[i].children)):
+                sizes[i] += sizes[j]
+                j += sizes[j]
+
+        self.nodes = nodes
+        self.sizes = sizes
+
+    def window(self, index=0, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES):
+        """Breadth-first d3 JSON for the subtree at index, within the budgets"""
+        nodes, sizes = self.nodes, self.sizes
+        root = {"name": nodes[index].name, "children": []}
+        queue = deque([(index, root, 0)])
+        count = 1
+
+        while queue:
+            i, out, depth = queue.popleft()
+            n_children = len(nodes[i].children)
+            if not n_children:
+                continue
+            too_deep = max_depth is not None and depth >= max_depth
+            if too_deep or count + n_children > max_nodes:
+                out["collapsed"] = True
+                out["descendants"] = sizes[i] - 1
+                out["handle"] = str(i)
+                continue
+
+            j = i + 1
+            for _ in range(n_children):
+                child = {"name": nodes[j].name, "children": []}
+                out["children"].append(child)
+                queue.append((j, child, depth + 1))
+                j += sizes[j]
+            count += n_children
+
+        return root
+
+    def resolve(self, handle):
+        """Turn a client handle back into a node index, or None if invalid"""
+        try:
+            index = int(handle)
+        except (TypeError, ValueError):
+            return None
+        if 0 <= index < len(self.nodes):
+            return index
+        return None
+
+class ParseResultCache:
+    """Small thread-safe LRU of indexed parse trees keyed by result id"""
+
+    def __init__(self, capacity=RESULT_CACHE_SIZE):
+        self.capacity = capacity
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, root):
+        tree = IndexedTree(root)
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = tree
+            if len(self._results) > self.capacity:
+                self._results.popitem(last=False)
+        return result_id, tree
+
+    def get(self, result_id):
+        with self._lock:
+            tree = self._results.get(result_id)
+            if tree is not None:
+                self._results.move_to_end(result_id)
+            return tree
+
+def read_budget(data):
+    """Pull max_depth / max_nodes out of a request body, falling back to defaults"""
+    max_depth = data.get("max_depth", DEFAULT_MAX_DEPTH)
+    max_nodes = data.get("max_nodes", DEFAULT_MAX_NODES)
+    if max_depth is not None:
+        max_depth = max(0, int(max_depth))
+    max_nodes = max(1, int(max_nodes))
+    return max_depth, max_nodes
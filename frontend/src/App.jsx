@@ -7,6 +7,7 @@ function App() {
   const [code, setCode] = useState("// Type your C++ code here...");
   const [tokens, setTokens] = useState([]);
   const [tree, setTree] = useState({});
+  const [resultId, setResultId] = useState(null);
 
   const analyzeCode = async () => {
     try {
@@ -24,13 +25,27 @@ function App() {
       const response = await axios.post("http://127.0.0.1:8000/parse", {
         code,
       });
-      console.log(response.data.parse_tree);
-      setTree(response.data.parse_tree);
+      setResultId(response.data.result_id);
+      setTree(response.data.parse_tree || {});
     } catch (error) {
       console.error("Error analyzing code:", error);
     }
   };
 
+  // Collapsed nodes carry a handle; fetch that subtree and splice it in
+  const expandNode = async (nodeDatum) => {
+    if (!nodeDatum.collapsed || !resultId) return;
+    try {
+      const response = await axios.post(
+        `http://127.0.0.1:8000/parse/${resultId}/subtree`,
+        { handle: nodeDatum.handle }
+      );
+      setTree((current) => replaceByHandle(current, nodeDatum.handle, response.data.parse_tree));
+    } catch (error) {
+      console.error("Error expanding subtree:", error);
+    }
+  };
+
   return (
     <div className="min-h-screen bg-gray-900 text-white flex flex-col items-center p-6">
       <h1 className="text-3xl font-bold mb-4">C++ Visual Compiler</h1>
@@ -103,10 +118,10 @@ function App() {
           },
         }}
         renderCustomNodeElement={({ nodeDatum }) => (
-          <g>
+          <g onClick={() => expandNode(nodeDatum)}>
             <circle
               r={15} // Slightly larger node size
-              fill="#777777" // White nodes
+              fill={nodeDatum.collapsed ? "#3b82f6" : "#777777"} // Blue marks a collapsed subtree
               stroke="#ffffff" // White border
               strokeWidth={1}
             />
@@ -118,6 +133,11 @@ function App() {
             >
               {nodeDatum.name}
             </text>
+            {nodeDatum.collapsed && (
+              <text fill="#ffffff" x="20" dy=".31em" fontSize="14">
+                +{nodeDatum.descendants}
+              </text>
+            )}
           </g>
         )}
       />
@@ -128,4 +148,22 @@ function App() {
   );
 }
 
+// Copy the tree, swapping the node with the given handle for its expansion
+function replaceByHandle(root, handle, subtree) {
+  const copy = structuredClone(root);
+  const stack = [copy];
+  while (stack.length > 0) {
+    const node = stack.pop();
+    if (node.handle === handle) {
+      node.children = subtree.children;
+      delete node.collapsed;
+      delete node.descendants;
+      delete node.handle;
+      break;
+    }
+    stack.push(...(node.children || []));
+  }
+  return copy;
+}
+
 export default App;
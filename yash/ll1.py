@@ -1,4 +1,10 @@
 from collections import defaultdict, OrderedDict
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atharva"))
+from compiled_grammar import CompiledGrammar
+from grammar_analysis import GrammarAnalysis
 
 class LL1Parser:
     def __init__(self, grammar):
@@ -9,6 +15,7 @@ class LL1Parser:
         self.first = defaultdict(set)
         self.follow = defaultdict(set)
         self.parsing_table = defaultdict(dict)
+        self.conflicts = []  # (non-terminal, terminal, production kept, production dropped)
         self.epsilon = 'ε'
         
         # Initialize terminals
@@ -43,50 +50,17 @@ class LL1Parser:
         self.grammar = new_grammar
         self.non_terminals = set(new_grammar.keys())
 
+    def _analysis(self):
+        return GrammarAnalysis(CompiledGrammar(self.grammar, self.start_symbol))
+
     def compute_first(self):
-        for nt in self.grammar:
-            self._first(nt)
+        self.first = defaultdict(set, self._analysis().named_first())
 
     def _first(self, symbol):
-        if symbol in self.terminals:
-            return {symbol}
-        
-        if symbol in self.first and self.first[symbol]:
-            return self.first[symbol]
-        
-        for production in self.grammar[symbol]:
-            if production[0] == self.epsilon:
-                self.first[symbol].add(self.epsilon)
-            else:
-                for s in production:
-                    s_first = self._first(s) if s in self.non_terminals else {s}
-                    self.first[symbol].update(s_first - {self.epsilon})
-                    if self.epsilon not in s_first:
-                        break
-                else:
-                    self.first[symbol].add(self.epsilon)
-        return self.first[symbol]
+        return self.first[symbol] if symbol in self.non_terminals else {symbol}
 
     def compute_follow(self):
-        self.follow[self.start_symbol].add('$')
-        updated = True
-        
-        while updated:
-            updated = False
-            for nt in self.grammar:
-                for prod in self.grammar[nt]:
-                    for i, symbol in enumerate(prod):
-                        if symbol in self.non_terminals:
-                            next_symbols = prod[i+1:]
-                            first_of_next = self._compute_sequence_first(next_symbols)
-                            before_size = len(self.follow[symbol])
-                            
-                            self.follow[symbol].update(first_of_next - {self.epsilon})
-                            if self.epsilon in first_of_next or not next_symbols:
-                                self.follow[symbol].update(self.follow[nt])
-                            
-                            if len(self.follow[symbol]) > before_size:
-                                updated = True
+        self.follow = defaultdict(set, self._analysis().named_follow())
 
     def _compute_sequence_first(self, sequence):
         first_set = set()
@@ -104,16 +78,25 @@ class LL1Parser:
         else:
             first_set.add(self.epsilon)
         return first_set
+    def _set_entry(self, nt, terminal, prod):
+        # Not LL(1): the later production wins, as it always has, and the
+        # collision is recorded
+        existing = self.parsing_table[nt].get(terminal)
+        if existing is not None and existing != prod:
+            self.conflicts.append((nt, terminal, prod, existing))
+        self.parsing_table[nt][terminal] = prod
+
     def build_parsing_table(self):
+        self.conflicts = []
         for nt in self.grammar:
             for prod in self.grammar[nt]:
                 first_alpha = self._compute_sequence_first(prod)
                 for terminal in first_alpha - {self.epsilon}:
-                    self.parsing_table[nt][terminal] = prod
+                    self._set_entry(nt, terminal, prod)
                 
                 if self.epsilon in first_alpha:
                     for terminal in self.follow[nt]:
-                        self.parsing_table[nt][terminal] = prod
+                        self._set_entry(nt, terminal, prod)
 
     def print_grammar(self, title):
         print(f"\n{title}:")
@@ -144,47 +127,63 @@ class LL1Parser:
                 print("{:<20}".format(f"{nt}->{' '.join(prod)}" if prod else ""), end="")
             print()
 
-    def parse(self, input_string):
+    def parse(self, input_string, verbose=True, budget=None, trace=True):
+        # A table with conflicts can expand forever (A -> B a, B -> A b), so
+        # with a budget every step is checked against it. Without trace,
+        # the number of steps is returned instead of the step list
+        if budget:
+            budget.start()
         stack = ['$', self.start_symbol]
         input = list(input_string.split()) + ['$']
-        print("\nParsing Steps:")
+        position = 0
+        steps = []
+        if verbose:
+            print("\nParsing Steps:")
         step = 1
         
+        def log(message):
+            if trace:
+                steps.append((step, ' '.join(stack), ' '.join(input), message))
+            if verbose:
+                print(f"\nStep {step}:")
+                print(f"Stack: {' '.join(stack)}")
+                print(f"Input: {' '.join(input)}")
+                print(message)
+        
         while stack:
-            print(f"\nStep {step}:")
-            print(f"Stack: {' '.join(stack)}")
-            print(f"Input: {' '.join(input)}")
-            
+            if budget:
+                budget.check_step(step, position, len(stack))
             top = stack[-1]
             current_input = input[0]
             
             if top == current_input == '$':
-                print("Accepted!")
-                return True
+                log("Accepted!")
+                return True, steps if trace else step
             
             if top == current_input:
+                log(f"Matched {top}")
                 stack.pop()
                 input.pop(0)
-                print(f"Matched {top}")
+                position += 1
                 step += 1
                 continue
                 
             if top in self.terminals:
-                print(f"Error: Mismatch between stack ({top}) and input ({current_input})")
-                return False
+                log(f"Error: Mismatch between stack ({top}) and input ({current_input})")
+                return False, steps if trace else step
                 
             production = self.parsing_table.get(top, {}).get(current_input, None)
             if not production:
-                print(f"Error: No production found for {top} on input {current_input}")
-                return False
+                log(f"Error: No production found for {top} on input {current_input}")
+                return False, steps if trace else step
                 
+            log(f"Applied {top} -> {' '.join(production)}")
             stack.pop()
             if production[0] != self.epsilon:
                 stack.extend(reversed(production))
-            print(f"Applied {top} -> {' '.join(production)}")
             step += 1
         
-        return False
+        return False, steps if trace else step
 
 # Input processing
 def get_grammar():